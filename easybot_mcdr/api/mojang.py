@@ -0,0 +1,177 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from mcdreforged.api.all import ServerInterface
+
+from easybot_mcdr.config import get_config
+from easybot_mcdr.metrics import registry
+
+_lookups = registry.counter("easybot_mojang_lookups_total", "Mojang UUID 查询次数", "source")
+_request_seconds = registry.histogram("easybot_mojang_request_seconds", "Mojang 批量查询请求耗时(秒)", "result")
+
+BULK_PATH = "/minecraft/profile/lookup/bulk/byname"
+BATCH_SIZE = 10  # 批量接口每次最多接受的名字数量
+
+_MISS = object()
+
+
+class MojangLookupError(Exception):
+    pass
+
+
+def format_uuid(raw_id: str) -> str:
+    raw_id = raw_id.replace("-", "").lower()
+    return f"{raw_id[:8]}-{raw_id[8:12]}-{raw_id[12:16]}-{raw_id[16:20]}-{raw_id[20:]}"
+
+
+class MojangResolver:
+    """
+    正版玩家 UUID 查询服务
+    同一时间窗口内的查询合并为批量请求 (每批最多 10 个名字), 结果连同"玩家不存在"的否定结果
+    按 TTL 缓存并写入玩家数据库; 请求按配置的速率限制发送, HTTP 请求在线程池中执行.
+    resolve() 需在插件运行时线程的事件循环上调用
+    """
+
+    def __init__(self):
+        self.store = None  # PlayerDB, 由 player.open_player_db 设置
+        self._memory: Dict[str, tuple] = {}  # 小写玩家名 -> (UUID 或 None, 查询时间)
+        self._futures: Dict[str, asyncio.Future] = {}  # 小写玩家名 -> 尚未完成的查询 (排队中或请求中)
+        self._queue: List[str] = []  # 等待合并发送的玩家名
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tokens = 0.0
+        self._token_time = 0.0
+        self._blocked_until = 0.0
+
+    @staticmethod
+    def _get_mojang_config() -> dict:
+        return get_config().get("mojang", {})
+
+    # --- 缓存 ---
+    def _get_cached(self, key: str):
+        entry = self._memory.get(key)
+        if entry is None and self.store is not None:
+            try:
+                entry = self.store.get_profile(key)
+            except Exception as e:
+                ServerInterface.get_instance().logger.warning(f"读取 Mojang 查询缓存失败: {e}")
+            if entry is not None:
+                self._memory[key] = entry
+        if entry is None:
+            return _MISS
+        uuid, fetched_at = entry
+        mojang_config = self._get_mojang_config()
+        ttl = mojang_config.get("positive_ttl", 2592000) if uuid else mojang_config.get("negative_ttl", 3600)
+        if time.time() - fetched_at > ttl:
+            return _MISS
+        return uuid
+
+    def _put_cached(self, results: Dict[str, Optional[str]]):
+        now = time.time()
+        for key, uuid in results.items():
+            self._memory[key] = (uuid, now)
+        if self.store is not None:
+            try:
+                self.store.save_profiles([(key, uuid, now) for key, uuid in results.items()])
+            except Exception as e:
+                ServerInterface.get_instance().logger.warning(f"写入 Mojang 查询缓存失败: {e}")
+
+    # --- 查询 ---
+    async def resolve(self, name: str) -> Optional[str]:
+        """
+        查询正版玩家的 UUID (带连字符)
+        :return: 玩家不存在时返回 None
+        :raises MojangLookupError: 请求失败、超时或被限流
+        """
+        key = name.lower()
+        cached = self._get_cached(key)
+        if cached is not _MISS:
+            _lookups.labels("cache" if cached else "negative_cache").inc()
+            return cached
+
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._queue.append(name)
+            if len(self._queue) >= BATCH_SIZE:
+                self._flush()
+            elif self._flush_handle is None:
+                window = float(self._get_mojang_config().get("batch_window", 0.1))
+                self._flush_handle = loop.call_later(window, self._flush)
+        # 一个调用方被取消不影响同批次的其他调用方
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        names, self._queue = self._queue, []
+        if names:
+            asyncio.get_running_loop().create_task(self._lookup_batch(names))
+
+    async def _lookup_batch(self, names: List[str]):
+        for start in range(0, len(names), BATCH_SIZE):
+            chunk = names[start:start + BATCH_SIZE]
+            try:
+                await self._acquire()
+                results = await asyncio.get_running_loop().run_in_executor(None, self._request, chunk)
+                self._put_cached(results)
+            except Exception as e:
+                results = None
+                error = e if isinstance(e, MojangLookupError) else MojangLookupError(str(e))
+            for name in chunk:
+                future = self._futures.pop(name.lower(), None)
+                if future is None or future.done():
+                    continue
+                if results is None:
+                    future.set_exception(error)
+                else:
+                    _lookups.labels("api").inc()
+                    future.set_result(results[name.lower()])
+
+    async def _acquire(self):
+        """令牌桶限流: 按 requests_per_minute 匀速补充, 最多积累 BATCH_SIZE 个令牌"""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            raise MojangLookupError(f"Mojang API 限流中, {self._blocked_until - now:.0f} 秒后重试")
+        rate = max(float(self._get_mojang_config().get("requests_per_minute", 60)), 1) / 60
+        self._tokens = min(BATCH_SIZE, self._tokens + (now - self._token_time) * rate) if self._token_time else BATCH_SIZE
+        self._token_time = now
+        if self._tokens < 1:
+            await asyncio.sleep((1 - self._tokens) / rate)
+            self._token_time = time.monotonic()
+            self._tokens = 1
+        self._tokens -= 1
+
+    def _request(self, names: List[str]) -> Dict[str, Optional[str]]:
+        import requests  # 导入耗时较长, 首次查询时才加载
+        mojang_config = self._get_mojang_config()
+        url = mojang_config.get("api_base", "https://api.minecraftservices.com").rstrip("/") + BULK_PATH
+        started = time.perf_counter()
+        try:
+            response = requests.post(url, json=names, timeout=float(mojang_config.get("timeout", 5)))
+        except requests.RequestException as e:
+            _request_seconds.labels("error").observe(time.perf_counter() - started)
+            raise MojangLookupError(f"请求 Mojang API 失败: {e}")
+        if response.status_code == 429:
+            _request_seconds.labels("rate_limited").observe(time.perf_counter() - started)
+            retry_after = response.headers.get("Retry-After", "")
+            self._blocked_until = time.monotonic() + (int(retry_after) if retry_after.isdigit() else 60)
+            raise MojangLookupError("Mojang API 返回 429 (请求过于频繁)")
+        if response.status_code != 200:
+            _request_seconds.labels("error").observe(time.perf_counter() - started)
+            raise MojangLookupError(f"Mojang API 返回 HTTP {response.status_code}")
+        _request_seconds.labels("ok").observe(time.perf_counter() - started)
+
+        # 响应中只包含存在的玩家, 其余名字记为否定结果
+        results: Dict[str, Optional[str]] = dict.fromkeys(name.lower() for name in names)
+        for profile in response.json():
+            key = str(profile.get("name", "")).lower()
+            if key in results and profile.get("id"):
+                results[key] = format_uuid(profile["id"])
+        return results
+
+
+mojang_resolver = MojangResolver()
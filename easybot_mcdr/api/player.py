@@ -1,12 +1,23 @@
-import json
-from typing import List
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
 from mcdreforged.api.all import *
 import re
-import requests
 import hashlib
 from easybot_mcdr.impl.get_server_info import get_online_mode
+from easybot_mcdr.log_classifier import classify, UUID
+from easybot_mcdr.api.player_cache import BoundedPlayerMap
+from easybot_mcdr.api.player_db import PlayerDB
+from easybot_mcdr.api.mojang import mojang_resolver
+from easybot_mcdr.metrics import registry
+from easybot_mcdr.runtime import runtime
 
 class PlayerInfo:
+    __slots__ = ("ip", "name", "uuid")
+
     ip: str
     name: str
     uuid: str
@@ -16,9 +27,122 @@ class PlayerInfo:
         self.name = name
         self.uuid = uuid
 
-online_players = {} 
-uuid_map = {}
-cached_data = {} 
+    def to_dict(self) -> dict:
+        return {"ip": self.ip, "name": self.name, "uuid": self.uuid}
+
+# 旧版本在卸载时整体写出的缓存文件, 首次打开数据库时自动导入
+LEGACY_CACHE_FILE = "easybot_cache.json"
+
+player_db: PlayerDB = None
+
+def _db_write(method, *args):
+    if player_db is None:
+        return
+    try:
+        getattr(player_db, method)(*args)
+    except Exception as e:
+        ServerInterface.get_instance().logger.warning(f"写入玩家数据库失败 ({method}): {e}")
+
+def _db_read(method, *args):
+    if player_db is None:
+        return None
+    try:
+        return getattr(player_db, method)(*args)
+    except Exception as e:
+        ServerInterface.get_instance().logger.warning(f"读取玩家数据库失败 ({method}): {e}")
+        return None
+
+def _load_cached(player: str):
+    row = _db_read("get_player", player)
+    return PlayerInfo(row[0], player, row[1]) if row else None
+
+def _save_cached(player: str, info: PlayerInfo):
+    _db_write("save_player", player, info.ip, info.uuid)
+
+def _save_uuid(player: str, uuid: str):
+    _db_write("save_uuid", player, uuid)
+
+_online_listeners = []
+
+def add_online_listener(listener):
+    """
+    注册在线玩家变化的回调 listener(玩家名, PlayerInfo), 玩家离开时 PlayerInfo 为 None;
+    在线表整体替换 (服务器关闭、恢复数据) 时以 (None, None) 调用
+    """
+    _online_listeners.append(listener)
+
+def _notify_online(player, info):
+    for listener in _online_listeners:
+        try:
+            listener(player, info)
+        except Exception as e:
+            ServerInterface.get_instance().logger.warning(f"在线玩家变化回调出错: {e}")
+
+class OnlinePlayerMap(dict):
+    """在线玩家表, 加入/离开会同步记录到玩家数据库, 插件重载或崩溃后可恢复"""
+
+    def __setitem__(self, player: str, info: PlayerInfo):
+        is_new = player not in self
+        super().__setitem__(player, info)
+        if is_new:
+            _db_write("set_online", player, True)
+        _notify_online(player, info)
+
+    def __delitem__(self, player: str):
+        super().__delitem__(player)
+        _db_write("set_online", player, False)
+        _notify_online(player, None)
+
+    def pop(self, player: str, *default):
+        if player not in self:
+            return super().pop(player, *default)
+        info = super().pop(player)
+        _db_write("set_online", player, False)
+        _notify_online(player, None)
+        return info
+
+def _is_online(player: str) -> bool:
+    return player in online_players
+
+def _new_caches(uuids: dict = None, cache: dict = None):
+    # 离线玩家的 UUID 与缓存信息有容量/过期上限, 在线玩家的条目永不淘汰;
+    # 写入时逐条保存到玩家数据库, 内存未命中时再从数据库读取
+    return (BoundedPlayerMap("uuid_map", _is_online, uuids, loader=lambda player: _db_read("get_uuid", player),
+                             on_set=_save_uuid),
+            BoundedPlayerMap("cache", _is_online, cache, loader=_load_cached, on_set=_save_cached))
+
+online_players = OnlinePlayerMap()
+uuid_map, cached_data = _new_caches()
+
+def open_player_db(server: PluginServerInterface):
+    """打开玩家数据库 (首次运行时导入旧版缓存文件), 插件重载时恢复上次记录的在线玩家"""
+    global player_db, online_players
+    db = PlayerDB(os.path.join(server.get_data_folder(), "players.db"))
+    db.open()
+    if os.path.exists(LEGACY_CACHE_FILE):
+        try:
+            count = db.migrate_json(LEGACY_CACHE_FILE)
+            server.logger.info(f"已将旧版缓存文件 {LEGACY_CACHE_FILE} 导入玩家数据库 ({count} 条记录)")
+        except Exception as e:
+            server.logger.error(f"导入旧版缓存文件 {LEGACY_CACHE_FILE} 失败: {e}")
+    player_db = db
+    mojang_resolver.store = db
+    if not server.is_server_running():
+        # 服务器未运行 (上次崩溃或断电, 没有经过 on_server_stop), 记录的在线玩家已失效
+        db.clear_online()
+        return
+    # 插件重载: 直接填充, 不重复写回数据库
+    online_players = OnlinePlayerMap({name: PlayerInfo(ip, name, uuid) for name, ip, uuid in db.get_online()})
+    _notify_online(None, None)
+    if online_players:
+        server.logger.info(f"已恢复在线玩家: {', '.join(online_players)}")
+
+def close_player_db():
+    global player_db
+    mojang_resolver.store = None
+    if player_db is not None:
+        player_db.close()
+        player_db = None
 
 def get_data_map():
     global online_players, uuid_map, cached_data
@@ -30,9 +154,9 @@ def get_data_map():
 
 def load_data_map(data: dict):
     global online_players, uuid_map, cached_data
-    online_players = data["online_players"]
-    uuid_map = data["uuid_map"]
-    cached_data = data["cache"]
+    online_players = OnlinePlayerMap(data["online_players"])
+    _notify_online(None, None)
+    uuid_map, cached_data = _new_caches(data["uuid_map"], data["cache"])
 
 def init_player_api(server: PluginServerInterface, old):
     reload_player_api(old)
@@ -57,14 +181,11 @@ def list_player(sender: CommandSource):
     return True
 
 def on_stdout(server, info: Info):
-    raw = info.raw_content
-    # 正则解析 UUID, 构建UUIDMap
-    if match := re.search(
-        r"UUID of player (\w+) is ([0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12})",
-        raw
-    ):
-        name = match.group(1)
-        uuid = match.group(2).lower()
+    # 与 main.on_info 共用同一行的分类结果, 构建UUIDMap
+    event = classify(info.raw_content)
+    if event is not None and event.kind == UUID:
+        name = event.player
+        uuid = event.uuid
         uuid_map[name] = uuid
         logger = ServerInterface.get_instance().logger
         logger.info("已缓存玩家 %s 的UUID: %s" % (name, uuid))
@@ -78,9 +199,30 @@ def on_server_stop(server, return_code):
     global online_players
     global uuid_map
     global cached_data
-    online_players = {}
-    uuid_map = {}
-    cached_data = {}
+    online_players = OnlinePlayerMap()
+    uuid_map, cached_data = _new_caches()
+    _db_write("clear_online")
+    _notify_online(None, None)
+
+def get_memory_stats() -> dict:
+    """各玩家数据结构的条目数与估算内存占用"""
+    online_bytes = sys.getsizeof(online_players) + sum(
+        sys.getsizeof(name) + sys.getsizeof(info) for name, info in list(online_players.items()))
+    return {
+        "online_players": {"entries": len(online_players), "bytes": online_bytes, "evicted": 0},
+        "uuid_map": uuid_map.memory_stats(),
+        "cache": cached_data.memory_stats(),
+    }
+
+def _collect_metrics():
+    samples = []
+    for structure, stats in get_memory_stats().items():
+        samples.append(("easybot_player_cache_entries", {"structure": structure}, stats["entries"]))
+        samples.append(("easybot_player_cache_bytes", {"structure": structure}, stats["bytes"]))
+        samples.append(("easybot_player_cache_evicted", {"structure": structure}, stats["evicted"]))
+    return samples
+
+registry.register_collector("player_cache", _collect_metrics)
 
 
 def is_bot_player(player: str) -> bool:
@@ -115,16 +257,58 @@ def update_player_uuid(player: str, new_uuid: str):
     # 更新在线玩家信息
     if player in online_players:
         online_players[player].uuid = new_uuid
+        _notify_online(player, online_players[player])
     
     # 更新缓存信息
     if player in cached_data:
         cached_data[player].uuid = new_uuid
+        _save_cached(player, cached_data[player])
     
     logger = ServerInterface.get_instance().logger
     if old_uuid != new_uuid:
         logger.info(f"玩家 {player} 的UUID已更新: {old_uuid} -> {new_uuid}")
 
-def on_player_joined(server, player, info: Info):
+# 玩家名 -> 加入处理 (UUID 解析与缓存) 完成时设置结果的 Future
+_pending_joins: Dict[str, Future] = {}
+_pending_joins_lock = threading.Lock()
+
+def _get_join_future(player: str) -> Future:
+    with _pending_joins_lock:
+        future = _pending_joins.get(player)
+        if future is None:
+            future = _pending_joins[player] = Future()
+        return future
+
+async def wait_player_joined(player: str, timeout: float) -> Optional[PlayerInfo]:
+    """
+    等待 on_player_joined 完成该玩家的 UUID 解析并写入在线表
+    MCDR 将异步监听器作为独立任务调度, 其他 player_joined 监听器可能先于本模块执行, 需先等待本函数返回
+    :return: 玩家信息, 超时或玩家为假人时返回 None
+    """
+    with _pending_joins_lock:
+        if player not in _pending_joins and player in online_players:
+            return online_players[player]
+    future = _get_join_future(player)
+    try:
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+    except asyncio.TimeoutError:
+        with _pending_joins_lock:
+            if _pending_joins.get(player) is future and not future.done():
+                del _pending_joins[player]
+        return online_players.get(player)
+
+async def on_player_joined(server, player, info: Info):
+    future = _get_join_future(player)
+    try:
+        await _handle_player_joined(player, info)
+    finally:
+        with _pending_joins_lock:
+            if _pending_joins.get(player) is future:
+                del _pending_joins[player]
+        if not future.done():
+            future.set_result(online_players.get(player))
+
+async def _handle_player_joined(player, info: Info):
     logger = ServerInterface.get_instance().logger
     
     # Skip bot players
@@ -137,10 +321,11 @@ def on_player_joined(server, player, info: Info):
     if uuid is None:
         if get_online_mode():
             try:
-                response = requests.get(f"https://api.mojang.com/users/profiles/minecraft/{player}")
-                response.raise_for_status()
-                id = json.loads(response.text)['id']
-                uuid = f"{id[:8]}-{id[8:12]}-{id[12:16]}-{id[16:20]}-{id[20:]}"
+                # 批量/缓存/限流的正版查询在插件运行时线程上执行, 不阻塞 MCDR 的事件处理
+                uuid = await runtime.wrap(mojang_resolver.resolve(player))
+                if uuid is None:
+                    logger.warning(f"Mojang 未找到玩家 {player} 的正版档案")
+                    uuid = generate_offline_uuid(player)
             except Exception as e:
                 logger.warning(f"获取玩家 {player} 正版UUID失败: {e}")
                 uuid = generate_offline_uuid(player)  # 降级到离线UUID
@@ -0,0 +1,131 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, MutableMapping, Optional
+
+from easybot_mcdr.config import get_config
+
+
+class BoundedPlayerMap(MutableMapping):
+    """
+    按玩家名索引、有容量与过期时间上限的缓存 (LRU + TTL)
+    读写都会刷新条目的访问时间; 超出 max_entries 或超过 ttl_seconds 未访问的离线玩家条目会被淘汰,
+    is_protected 返回 True 的条目 (在线玩家) 永不淘汰. 上限取自配置 player_cache
+    loader 在未命中时从持久化存储读取条目 (返回 None 表示不存在), on_set 在写入条目后调用
+    """
+
+    def __init__(self, name: str, is_protected: Callable[[str], bool], initial: Optional[dict] = None,
+                 loader: Optional[Callable[[str], Any]] = None, on_set: Optional[Callable[[str, Any], None]] = None):
+        self.name = name
+        self._is_protected = is_protected
+        self._loader = loader
+        self._on_set = on_set
+        self._data: "OrderedDict[str, list]" = OrderedDict()  # 玩家名 -> [值, 最后访问时间]
+        self._lock = threading.RLock()
+        self.evicted = 0
+        self.loaded = 0
+        if initial:
+            now = time.monotonic()
+            for key, value in initial.items():
+                self._data[key] = [value, now]
+            self._evict(now)
+
+    @staticmethod
+    def _limits():
+        cache_config = get_config().get("player_cache", {})
+        return int(cache_config.get("max_entries", 10000)), float(cache_config.get("ttl_seconds", 0))
+
+    def _evict(self, now: float):
+        max_entries, ttl = self._limits()
+        victims = []
+        overflow = len(self._data) - max_entries
+        # 从最久未访问的一端开始, 遇到既不超量也未过期的条目即可停止
+        for key, (_, accessed) in self._data.items():
+            expired = ttl > 0 and now - accessed > ttl
+            if overflow <= 0 and not expired:
+                break
+            if self._is_protected(key):
+                continue
+            victims.append(key)
+            overflow -= 1
+        for key in victims:
+            del self._data[key]
+        self.evicted += len(victims)
+
+    def _expired(self, key: str, accessed: float, now: float) -> bool:
+        ttl = self._limits()[1]
+        return ttl > 0 and now - accessed > ttl and not self._is_protected(key)
+
+    def __getitem__(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            now = time.monotonic()
+            if entry is not None and self._expired(key, entry[1], now):
+                del self._data[key]
+                self.evicted += 1
+                entry = None
+            if entry is None:
+                return self._load(key, now)
+            entry[1] = now
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def _load(self, key: str, now: float):
+        value = self._loader(key) if self._loader is not None else None
+        if value is None:
+            raise KeyError(key)
+        self.loaded += 1
+        self._data[key] = [value, now]
+        self._evict(now)
+        return value
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def __setitem__(self, key: str, value):
+        with self._lock:
+            now = time.monotonic()
+            self._data[key] = [value, now]
+            self._data.move_to_end(key)
+            self._evict(now)
+        if self._on_set is not None:
+            self._on_set(key, value)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {key: entry[0] for key, entry in self._data.items()}
+
+    def memory_stats(self) -> dict:
+        """估算占用的内存 (字节): 映射本身 + 键 + 访问记录 + 值"""
+        with self._lock:
+            size = sys.getsizeof(self._data)
+            for key, entry in self._data.items():
+                size += sys.getsizeof(key) + sys.getsizeof(entry) + _sizeof_value(entry[0])
+            return {"entries": len(self._data), "bytes": size, "evicted": self.evicted, "loaded": self.loaded}
+
+
+def _sizeof_value(value) -> int:
+    slots = getattr(type(value), "__slots__", None)
+    if slots is None:
+        return sys.getsizeof(value)
+    return sys.getsizeof(value) + sum(sys.getsizeof(getattr(value, slot, None)) for slot in slots)
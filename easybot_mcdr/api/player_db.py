@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uuids (
+    name TEXT PRIMARY KEY,
+    uuid TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    ip TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS online (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS mojang_profiles (
+    name TEXT PRIMARY KEY,
+    uuid TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class PlayerDB:
+    """
+    玩家数据的持久化存储 (SQLite, WAL 模式)
+    每次变化只写入对应的一行, 插件或服务端崩溃也不会丢失已写入的数据;
+    启动时只恢复在线玩家列表, 其余记录在内存缓存未命中时按需读取
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 下 NORMAL 只在检查点时 fsync, 进程崩溃不会丢失已提交的数据
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        self._conn = conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute(sql, params)
+            self.writes += 1
+
+    def _query_one(self, sql: str, params: tuple) -> Optional[tuple]:
+        with self._lock:
+            if self._conn is None:
+                return None
+            return self._conn.execute(sql, params).fetchone()
+
+    # --- 读取 ---
+    def get_uuid(self, name: str) -> Optional[str]:
+        row = self._query_one("SELECT uuid FROM uuids WHERE name = ?", (name,))
+        return row[0] if row else None
+
+    def get_player(self, name: str) -> Optional[Tuple[str, str]]:
+        """返回 (ip, uuid)"""
+        return self._query_one("SELECT ip, uuid FROM players WHERE name = ?", (name,))
+
+    def get_profile(self, name: str) -> Optional[Tuple[Optional[str], float]]:
+        """Mojang 查询缓存, 返回 (UUID, 查询时间), UUID 为 None 表示玩家不存在"""
+        return self._query_one("SELECT uuid, fetched_at FROM mojang_profiles WHERE name = ?", (name,))
+
+    def get_online(self) -> List[Tuple[str, str, str]]:
+        """上次记录为在线的玩家 [(name, ip, uuid)]"""
+        with self._lock:
+            if self._conn is None:
+                return []
+            return self._conn.execute(
+                "SELECT online.name, COALESCE(players.ip, '127.0.0.1'), COALESCE(players.uuid, uuids.uuid, 'unknown') "
+                "FROM online LEFT JOIN players ON players.name = online.name LEFT JOIN uuids ON uuids.name = online.name"
+            ).fetchall()
+
+    def count(self) -> dict:
+        with self._lock:
+            if self._conn is None:
+                return {}
+            return {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("uuids", "players", "online")}
+
+    # --- 写入 ---
+    def save_uuid(self, name: str, uuid: str):
+        self._execute(
+            "INSERT INTO uuids (name, uuid, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET uuid = excluded.uuid, updated_at = excluded.updated_at "
+            "WHERE uuids.uuid != excluded.uuid",
+            (name, uuid, time.time()))
+
+    def save_player(self, name: str, ip: str, uuid: str):
+        self._execute(
+            "INSERT INTO players (name, ip, uuid, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET ip = excluded.ip, uuid = excluded.uuid, updated_at = excluded.updated_at "
+            "WHERE players.ip != excluded.ip OR players.uuid != excluded.uuid",
+            (name, ip, uuid, time.time()))
+
+    def set_online(self, name: str, online: bool):
+        if online:
+            self._execute("INSERT OR IGNORE INTO online (name) VALUES (?)", (name,))
+        else:
+            self._execute("DELETE FROM online WHERE name = ?", (name,))
+
+    def clear_online(self):
+        self._execute("DELETE FROM online")
+
+    def save_profiles(self, rows: List[Tuple[str, Optional[str], float]]):
+        """保存一批 Mojang 查询结果 [(小写玩家名, UUID 或 None, 查询时间)]"""
+        with self._lock:
+            if self._conn is None:
+                return
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO mojang_profiles (name, uuid, fetched_at) VALUES (?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self.writes += 1
+
+    # --- 迁移 ---
+    def migrate_json(self, path: str) -> int:
+        """
+        导入旧版 easybot_cache.json (online_players/uuid_map/cache), 完成后重命名为 .migrated
+        :return: 导入的记录数
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            saved_data = json.load(f)
+
+        def records(section):
+            # 旧版本可能保存为列表格式
+            if isinstance(section, list):
+                return {item.get("name"): item for item in section if isinstance(item, dict) and item.get("name")}
+            return section if isinstance(section, dict) else {}
+
+        now = time.time()
+        uuids = [(name, uuid, now) for name, uuid in records(saved_data.get("uuid_map")).items() if isinstance(uuid, str)]
+        players = [
+            (name, str(info.get("ip", "127.0.0.1")), str(info.get("uuid", "unknown")), now)
+            for section in ("cache", "online_players")
+            for name, info in records(saved_data.get(section)).items() if isinstance(info, dict)
+        ]
+        online = [(name,) for name in records(saved_data.get("online_players"))]
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO uuids (name, uuid, updated_at) VALUES (?, ?, ?)", uuids)
+                conn.executemany("INSERT OR REPLACE INTO players (name, ip, uuid, updated_at) VALUES (?, ?, ?, ?)", players)
+                conn.executemany("INSERT OR IGNORE INTO online (name) VALUES (?)", online)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        os.replace(path, path + ".migrated")
+        return len(uuids) + len(players)
@@ -54,6 +54,10 @@ def load_config(server: PluginServerInterface):
             
         server.logger.info(f"配置文件路径: {config_file_path}")
         server.logger.info("配置文件加载成功")
+
+        # 预编译命令模板并校验占位符
+        from easybot_mcdr.template import compile_templates
+        compile_templates(server.logger)
         
     except json.JSONDecodeError as e:
         server.logger.error(f"配置文件解析失败: {e}")
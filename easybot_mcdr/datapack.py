@@ -0,0 +1,126 @@
+import json
+import os
+from typing import Dict, Optional
+
+from mcdreforged.api.all import PluginServerInterface
+
+from easybot_mcdr.config import get_config
+from easybot_mcdr.server_properties import server_properties
+from easybot_mcdr.template import PLACEHOLDER_PATTERN, TEMPLATE_FIELDS, get_templates
+
+# 事件 -> 对应的命令列表配置路径
+EVENT_COMMANDS = {
+    "bind_success": ("events", "bind_success", "comamnds"),
+    "un_bind": ("events", "un_bind", "comamnds"),
+    "on_at": ("events", "message", "on_at", "comamnds"),
+}
+
+
+class CommandDatapack:
+    """
+    将事件命令列表生成为数据包函数 (<世界>/datapacks/easybot)
+    开启后每个事件只需一次 `function <namespace>:<事件> {player:"...",...}` 调用,
+    占位符通过函数宏参数 $(player) 传入 (需要 1.20.2+)
+    """
+
+    def __init__(self):
+        self.namespace = "easybot"
+        self._functions = frozenset()  # 已生成且可用的事件函数
+
+    @staticmethod
+    def _get_datapack_config() -> dict:
+        return get_config().get("command_datapack", {})
+
+    def is_active(self, event: str) -> bool:
+        return event in self._functions and self._get_datapack_config().get("enabled", False)
+
+    def call(self, event: str, values: Dict[str, str]) -> str:
+        """构造调用事件函数的命令"""
+        arguments = ",".join(f"{key}:{json.dumps(str(value), ensure_ascii=False)}" for key, value in values.items())
+        return f"function {self.namespace}:{event} {{{arguments}}}"
+
+    @staticmethod
+    def _get_datapack_dir(server: PluginServerInterface) -> str:
+        properties = server_properties.get()
+        return os.path.join(os.path.dirname(properties.path), properties.level_name, "datapacks", "easybot")
+
+    def _render_files(self, pack_format: int) -> Dict[str, str]:
+        templates = get_templates()
+        files = {
+            "pack.mcmeta": json.dumps({"pack": {"pack_format": pack_format, "description": "EasyBot 事件命令"}},
+                                      indent=4, ensure_ascii=False) + "\n",
+        }
+        for event, path in EVENT_COMMANDS.items():
+            allowed = TEMPLATE_FIELDS[path]
+            lines = []
+            for template in templates.get(*path):
+                command = template.source.strip().lstrip("/")
+                if not command:
+                    continue
+                if template.fields & allowed:
+                    # 宏行必须以 $ 开头且至少包含一个 $(参数)
+                    command = "$" + PLACEHOLDER_PATTERN.sub(
+                        lambda match: f"$({match.group(1)})" if match.group(1) in allowed else match.group(0), command)
+                lines.append(command)
+            if lines:
+                content = "\n".join(lines) + "\n"
+                # 1.21 起目录名为 function, 之前为 functions, 同时写入以兼容两者
+                files[os.path.join("data", self.namespace, "function", f"{event}.mcfunction")] = content
+                files[os.path.join("data", self.namespace, "functions", f"{event}.mcfunction")] = content
+        return files
+
+    def sync(self, server: PluginServerInterface, reload: bool = True) -> bool:
+        """
+        按当前配置生成数据包, 内容有变化且服务器正在运行时执行 reload
+        :return: 数据包内容是否发生变化
+        """
+        datapack_config = self._get_datapack_config()
+        if not datapack_config.get("enabled", False):
+            self._functions = frozenset()
+            return False
+        self.namespace = datapack_config.get("namespace", "easybot")
+        try:
+            root = self._get_datapack_dir(server)
+            files = self._render_files(int(datapack_config.get("pack_format", 48)))
+            changed = False
+            for relative_path, content in files.items():
+                path = os.path.join(root, relative_path)
+                if _read_text(path) == content:
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w", encoding="utf-8", newline="\n") as f:
+                    f.write(content)
+                changed = True
+            # 删除已从配置中移除的事件函数
+            for event in EVENT_COMMANDS:
+                for folder in ("function", "functions"):
+                    relative_path = os.path.join("data", self.namespace, folder, f"{event}.mcfunction")
+                    path = os.path.join(root, relative_path)
+                    if relative_path not in files and os.path.exists(path):
+                        os.remove(path)
+                        changed = True
+        except OSError as e:
+            server.logger.error(f"生成命令数据包失败, 将逐条执行命令: {e}")
+            self._functions = frozenset()
+            return False
+
+        self._functions = frozenset(
+            event for event in EVENT_COMMANDS
+            if os.path.join("data", self.namespace, "function", f"{event}.mcfunction") in files
+        )
+        if changed:
+            server.logger.info(f"命令数据包已更新: {root}")
+            if reload and server.is_server_startup():
+                server.execute("reload")
+        return changed
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+command_datapack = CommandDatapack()
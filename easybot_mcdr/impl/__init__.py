@@ -1,8 +1,19 @@
+from easybot_mcdr.websocket.ws import EasyBotWsClient
+
+# 鉴权成功后立即需要的模块直接导入
 from . import get_server_info
-from . import bind_success_notify
-from . import un_bind_notify
-from . import papi
-from . import player_list
-from . import message_sync
-from . import exec_command
-from . import cross_server_chat
\ No newline at end of file
+from . import report_players
+
+# 其余处理器在首次收到对应 exec_op 时才导入, 减少插件加载(重载)耗时
+_LAZY_EXEC_OPS = {
+    "BIND_SUCCESS_NOTIFY": "bind_success_notify",
+    "UN_BIND_NOTIFY": "un_bind_notify",
+    "PLACEHOLDER_API_QUERY": "papi",
+    "PLAYER_LIST": "player_list",
+    "SEND_TO_CHAT": "message_sync",
+    "RUN_COMMAND": "exec_command",
+    "CROSS_SERVER_SAY": "cross_server_chat",
+}
+
+for _exec_op, _module in _LAZY_EXEC_OPS.items():
+    EasyBotWsClient.lazy_exec_op(_exec_op, f"{__name__}.{_module}")
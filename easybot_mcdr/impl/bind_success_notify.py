@@ -1,4 +1,6 @@
 from easybot_mcdr.config import get_config
+from easybot_mcdr.datapack import command_datapack
+from easybot_mcdr.template import get_templates
 from easybot_mcdr.utils import is_white_list_enable
 from easybot_mcdr.websocket.context import ExecContext
 from easybot_mcdr.websocket.ws import EasyBotWsClient
@@ -9,17 +11,25 @@ async def exec_bind_success_notify(ctx: ExecContext, data:dict, _):
     player_name = data['player_name']
     account_id = data['account_id']
     account_name = data['account_name']
-    message = str(get_config()["message"]["bind_success"]).replace("#name", account_name).replace("#account", account_id).replace("#player", player_name)
+    # 绑定状态已变化, 丢弃该玩家的绑定信息缓存
+    ctx.ws.invalidate_request_cache("GET_SOCIAL_ACCOUNT", {"player_name": player_name})
+    templates = get_templates()
+    values = {"player": player_name, "name": account_name, "account": account_id}
+    message = templates.first("message", "bind_success").render(values)
     logger.info(f"收到广播,玩家{player_name}绑定成功, 即将使用tallraw发送消息到玩家(如果玩家在线)")
     logger.info(message)
 
-    if get_config()["events"]["bind_success"]["add_whitelist"] and is_white_list_enable():
+    event_config = get_config()["events"]["bind_success"]
+    if event_config["add_whitelist"] and is_white_list_enable():
         logger.info(f"尝试添加玩家 {player_name} 到白名单")
         ServerInterface.get_instance().execute("whitelist add " + player_name)
 
     ServerInterface.get_instance().tell(player_name, message)
-    if get_config()["events"]["bind_success"]["exec_command"]:
-        commands = get_config()["events"]["bind_success"]["comamnds"]
+    if event_config["exec_command"] and command_datapack.is_active("bind_success"):
+        logger.info("即将通过数据包函数执行绑定成功预设指令")
+        ServerInterface.get_instance().execute(command_datapack.call("bind_success", values))
+    elif event_config["exec_command"]:
+        commands = templates.get("events", "bind_success", "comamnds")
         logger.info(f"即将执行绑定成功预设指令 ({len(commands)}个)")
         for command in commands:
-            ServerInterface.get_instance().execute(command.replace("#name", account_name).replace("#account", account_id).replace("#player", player_name))
\ No newline at end of file
+            ServerInterface.get_instance().execute(command.render(values))
\ No newline at end of file
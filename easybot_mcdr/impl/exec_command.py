@@ -1,3 +1,6 @@
+import asyncio
+
+from easybot_mcdr.rcon_pool import rcon_pool
 from easybot_mcdr.websocket.context import ExecContext
 from easybot_mcdr.websocket.ws import EasyBotWsClient
 from mcdreforged.api.all import *
@@ -7,9 +10,9 @@ async def exec_bind_success_notify(ctx: ExecContext, data:dict, _):
     server = ServerInterface.get_instance()
     logger = server.logger
 
-    if not server.is_rcon_running():
+    if not rcon_pool.is_available():
         logger.error(f"RCON未开启,无法执行命令 -> {data['command']}")
-        ctx.callback({
+        await ctx.callback({
             "success": False,
             "text": "目标MCDR未开启未开启RCON,无法执行命令!"
         })
@@ -19,16 +22,19 @@ async def exec_bind_success_notify(ctx: ExecContext, data:dict, _):
         from easybot_mcdr.impl.papi import run_placeholder
         command = await run_placeholder(command, data["player_name"])
     try:
-        if not server.is_rcon_running():
-            raise Exception("RCON未启用")
-            
-        resp = server.rcon_query(command)
+        resp = await rcon_pool.query(command)
         logger.debug(f"执行命令 -> {command}")
         logger.debug(f"执行结果 -> {resp}")
         await ctx.callback({
             "success": True,
             "text": resp
         })
+    except asyncio.TimeoutError:
+        logger.warning(f"RCON命令执行超时 -> {command}")
+        await ctx.callback({
+            "success": False,
+            "text": "RCON命令执行超时"
+        })
     except Exception as e:
         logger.warning(f"RCON查询失败: {str(e)}")
         await ctx.callback({
@@ -1,23 +1,18 @@
-import os
-import re
 from easybot_mcdr.meta import get_plugin_version
+from easybot_mcdr.server_properties import server_properties
 from easybot_mcdr.websocket.context import ExecContext
 from easybot_mcdr.websocket.ws import EasyBotWsClient
 from mcdreforged.api.all import *
 
 # 初始化在线模式变量，默认为False（离线模式）
 is_online_mode = False
+_warned_snapshot = None
 
 @EasyBotWsClient.listen_exec_op("GET_SERVER_INFO")
 async def exec_get_server_info(ctx: ExecContext, data:dict, _):
     global is_online_mode
     server = ServerInterface.get_instance()
-    working_directory = server.get_mcdr_config()["working_directory"]
-    properties_path = os.path.join(working_directory, "server.properties")
-    online_mode = False
-    with open(properties_path, "r", encoding='utf-8') as f:
-        online_mode = re.search(r"online-mode=(.*)", f.read()).group(1)
-        online_mode = str(online_mode).lower().strip() == "true"
+    online_mode = server_properties.get().online_mode
     try:
         packet = {
             "server_name": "mcdr",
@@ -41,28 +36,18 @@ async def exec_get_server_info(ctx: ExecContext, data:dict, _):
 
 def get_online_mode():
     """
-    读取server.properties文件获取服务器在线模式设置
+    获取服务器在线模式设置 (读取缓存的server.properties快照, 文件变化时自动重新解析)
     直接返回解析结果，并更新全局变量
     """
-    global is_online_mode
+    global is_online_mode, _warned_snapshot
     try:
-        server = ServerInterface.get_instance()
-        working_directory = server.get_mcdr_config()["working_directory"]
-        properties_path = os.path.join(working_directory, "server.properties")
-        
-        # 直接读取并解析文件，与exec_get_server_info中的逻辑类似
-        with open(properties_path, "r", encoding='utf-8') as f:
-            content = f.read()
-            match = re.search(r"online-mode=(.*)", content)
-            if match:
-                online_mode = str(match.group(1)).lower().strip() == "true"
-                # 更新全局变量
-                is_online_mode = online_mode
-                return online_mode
-            else:
-                server.logger.warning("在server.properties中未找到online-mode配置，默认为离线模式")
-                is_online_mode = False
-                return False
+        properties = server_properties.get()
+        if "online-mode" not in properties.raw and properties is not _warned_snapshot:
+            # 每个快照只提示一次
+            _warned_snapshot = properties
+            ServerInterface.get_instance().logger.warning("在server.properties中未找到online-mode配置，默认为离线模式")
+        is_online_mode = properties.online_mode
+        return is_online_mode
     except Exception as e:
         server = ServerInterface.get_instance()
         server.logger.error(f"读取服务器在线模式时出错: {str(e)}")
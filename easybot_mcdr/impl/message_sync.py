@@ -1,5 +1,7 @@
-import time
 from easybot_mcdr.config import get_config
+from easybot_mcdr.datapack import command_datapack
+from easybot_mcdr.scheduler import scheduler
+from easybot_mcdr.template import get_templates
 from easybot_mcdr.websocket.context import ExecContext
 from easybot_mcdr.websocket.ws import EasyBotWsClient
 from mcdreforged.api.all import *
@@ -103,61 +105,44 @@ async def sync_message(ctx: ExecContext, data:dict, _):
 
     config = get_config()["events"]["message"]["on_at"]
     logger = ServerInterface.get_instance().logger
+    templates = get_templates()
+    if has_at_all:
+        targets = ["@a"]
+    else:
+        from easybot_mcdr.api.player import check_online
+        targets = [player for player in at_players if check_online(player)]
+    if not targets:
+        return
+
     # @判断
     if config["exec_command"] and "comamnds" in config:
-        commands = config["comamnds"]
-        if not isinstance(commands, list):
+        if not isinstance(config["comamnds"], list):
             logger.warning("命令列表格式无效，已跳过执行")
             return
-            
-        if has_at_all:
-            for command in commands:
-                if not isinstance(command, str):
-                    continue
+
+        if command_datapack.is_active("on_at"):
+            # 整个命令列表由数据包函数执行, 每个目标只需一条命令
+            rendered = [[command_datapack.call("on_at", {"player": player}) for player in targets]]
+        else:
+            # 每条命令对全部目标玩家一次性展开, 再按玩家顺序执行
+            rendered = [command.fan_out(targets) for command in templates.get("events", "message", "on_at", "comamnds")]
+        for player_commands in zip(*rendered):
+            for cmd in player_commands:
                 try:
-                    cmd = command.replace("#player", "@a")
                     ServerInterface.get_instance().execute(cmd)
                 except Exception as e:
                     logger.error(f"执行命令失败: {cmd} ({str(e)})")
-        else:
-            for player in at_players:
-                from easybot_mcdr.api.player import check_online
-                if check_online(player):
-                    for command in commands:
-                        if not isinstance(command, str):
-                            continue
-                        try:
-                            cmd = command.replace("#player", player)
-                            ServerInterface.get_instance().execute(cmd)
-                        except Exception as e:
-                            logger.error(f"执行命令失败: {cmd} ({str(e)})")
-
-    def play_sound(count, interval, sound_command, player):
-        for i in range(count):
-            logger.info(command.replace("#player", player))
-            ServerInterface.get_instance().execute(sound_command.replace("#player", player))
-            time.sleep(interval / 1000)
 
     if "sound" in config and config["sound"]["play_sound"]:
-        if "run" not in config["sound"] or not isinstance(config["sound"]["run"], str):
+        sound = templates.first("events", "message", "on_at", "sound", "run")
+        if sound is None:
             logger.warning("音效命令配置无效，已跳过")
             return
-            
-        command = config["sound"]["run"]
-        if has_at_all:
-            play_sound(
-                config["sound"].get("count", 1),
-                config["sound"].get("interval_ms", 1000),
-                command,
-                "@a"
-            )
-        else:
-            for player in at_players:
-                from easybot_mcdr.api.player import check_online
-                if check_online(player):
-                    play_sound(
-                        config["sound"].get("count", 1),
-                        config["sound"].get("interval_ms", 1000),
-                        command,
-                        player
-                    )
\ No newline at end of file
+
+        count = config["sound"].get("count", 1)
+        interval = config["sound"].get("interval_ms", 1000) / 1000
+        for player, sound_command in zip(targets, sound.fan_out(targets)):
+            # 由时间轮按间隔重复执行, 不阻塞当前处理器; 玩家离开时按玩家名取消
+            logger.info(sound_command)
+            scheduler.schedule_command(0, sound_command, interval=interval, count=count,
+                                       tag=None if player == "@a" else player)
@@ -1,28 +1,154 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
 from easybot_mcdr.impl.get_server_info import get_online_mode
+from easybot_mcdr.websocket.codec import JsonCodec
 from easybot_mcdr.websocket.context import ExecContext
 from easybot_mcdr.websocket.ws import EasyBotWsClient
 from mcdreforged.api.all import *
 
-def try_get_skin(name):
-    if get_online_mode(): # 只有在线模式获取到的皮肤才是正确的
+def try_get_skin(name, online_mode=None):
+    if online_mode is None:
+        online_mode = get_online_mode()
+    if online_mode: # 只有在线模式获取到的皮肤才是正确的
         return f"https://mineskin.eu/download/{name}"
     # 默认尼哥
     return "https://textures.minecraft.net/texture/eee522611005acf256dbd152e992c60c0bb7978cb0f3127807700e478ad97664"
 
+
+class PlayerListSnapshot:
+    """
+    在线玩家列表的版本化快照
+    玩家加入/离开/UUID 变化时只重建对应的条目并递增版本号, 完整响应 (及其预编码的 list) 在下次变化前一直复用;
+    最近的变化记录在 history 中, 请求携带 since_version 时只返回之后新增/移除的玩家
+    """
+    HISTORY_SIZE = 512
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 以毫秒时间戳为起点, 插件重载后版本号不会与重载前重复
+        self.version = int(time.time() * 1000)
+        self._entries: Dict[str, dict] = {}  # 玩家名 -> 条目
+        self._history = deque(maxlen=self.HISTORY_SIZE)  # (版本号, 玩家名)
+        self._payload: Optional[dict] = None
+        self._encoded: Optional[tuple] = None  # (编解码器, list 已预编码的完整响应)
+        self._online_mode: Optional[bool] = None
+        self._loaded = False
+        self._registered = False
+
+    @staticmethod
+    def _build_entry(name: str, info, online_mode: bool) -> dict:
+        return {
+            "player_name": name,
+            "player_uuid": info.uuid,
+            "ip": info.ip,
+            "bedrock": False,
+            "skin_url": try_get_skin(name, online_mode)
+        }
+
+    def on_online_change(self, name: Optional[str], info):
+        """api.player 在线表变化回调"""
+        with self._lock:
+            if name is None:
+                self._loaded = False
+                return
+            if not self._loaded:
+                return
+            if info is None:
+                if self._entries.pop(name, None) is None:
+                    return
+            else:
+                entry = self._build_entry(name, info, self._online_mode)
+                if self._entries.get(name) == entry:
+                    return
+                self._entries[name] = entry
+            self._bump(name)
+
+    def _bump(self, name: Optional[str]):
+        self.version += 1
+        self._payload = None
+        self._encoded = None
+        # name 为 None 表示整体重建, 更早的版本只能获取完整列表
+        self._history.append((self.version, name))
+
+    def _ensure_loaded(self):
+        """首次请求、在线表整体替换或在线模式变化时从 api.player 重建所有条目"""
+        online_mode = get_online_mode()
+        with self._lock:
+            if self._loaded and online_mode == self._online_mode:
+                return
+        from easybot_mcdr.api.player import add_online_listener, get_player_list
+        with self._lock:
+            if not self._registered:
+                add_online_listener(self.on_online_change)
+                self._registered = True
+            # 在锁内复制在线表, 期间到达的变化回调会在重建完成后再应用
+            players = get_player_list()
+            self._online_mode = online_mode
+            entries = {name: self._build_entry(name, info, online_mode) for name, info in players.items()}
+            if not self._loaded or entries != self._entries:
+                self._entries = entries
+                self._bump(None)
+            self._loaded = True
+
+    def full_payload(self, codec: Optional[JsonCodec] = None) -> dict:
+        """
+        完整列表; 返回的字典在下次变化前被所有请求共享, 调用方不应修改
+        :param codec: 传入时 list 为该编解码器预编码的片段, 每个版本只编码一次
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._payload is None:
+                self._payload = {"list": list(self._entries.values()), "version": self.version}
+            if codec is None:
+                return self._payload
+            if self._encoded is None or self._encoded[0] is not codec:
+                self._encoded = (codec, dict(self._payload, list=codec.encode_fragment(self._payload["list"])))
+            return self._encoded[1]
+
+    def delta_payload(self, since_version: int, codec: Optional[JsonCodec] = None) -> dict:
+        """since_version 之后的变化; 版本过旧 (已超出记录范围或经过整体重建) 时返回完整列表"""
+        self._ensure_loaded()
+        with self._lock:
+            if since_version > self.version:
+                changed = None
+            elif since_version == self.version:
+                changed = set()
+            elif self._history and self._history[0][0] <= since_version + 1:
+                changed = set()
+                for version, name in self._history:
+                    if version <= since_version:
+                        continue
+                    if name is None:
+                        changed = None
+                        break
+                    changed.add(name)
+            else:
+                changed = None
+            if changed is not None:
+                added = [self._entries[name] for name in changed if name in self._entries]
+                removed = [name for name in changed if name not in self._entries]
+                return {"delta": True, "since_version": since_version, "version": self.version,
+                        "added": added, "removed": removed}
+        return self.full_payload(codec)
+
+    def get_stats(self) -> dict:
+        return {"version": self.version, "players": len(self._entries), "history": len(self._history)}
+
+
+player_list_snapshot = PlayerListSnapshot()
+
+
 @EasyBotWsClient.listen_exec_op("PLAYER_LIST")
 async def on_get_player_list(ctx: ExecContext, data:dict, _):
-    logger = ServerInterface.get_instance().logger
-    from easybot_mcdr.api.player import get_player_list
-    online_list = get_player_list()
-    list = []
-    for player in online_list:
-        list.append({
-            "player_name": player,
-            "player_uuid": online_list[player].uuid,
-            "ip": online_list[player].ip,
-            "bedrock": False,
-            "skin_url": try_get_skin(player)
-        })
-    await ctx.callback({
-        "list": list
-    })
\ No newline at end of file
+    # 携带 since_version 时返回增量 (added 为新增或信息变化的玩家, removed 为离开的玩家名)
+    since_version = data.get("since_version") if isinstance(data, dict) else None
+    codec = ctx.ws.get_codec()
+    if isinstance(since_version, int) and not isinstance(since_version, bool):
+        payload = player_list_snapshot.delta_payload(since_version, codec)
+    else:
+        payload = player_list_snapshot.full_payload(codec)
+    await ctx.callback(payload)
+
@@ -1,5 +1,7 @@
 import re
-from typing import List, Type
+from typing import List, Optional, Type
+
+from easybot_mcdr.metrics import registry
 
 # Dynamically collect available handlers in a preferred order
 _handler_classes: List[Type] = []
@@ -35,6 +37,18 @@ if not _handler_classes:
     raise ImportError('No base handlers available from mcdreforged.handler.impl')
 
 
+# Chat lines with a name prefix, e.g. "[Not Secure] <[Builder]Steve> Hello"
+_PREFIX_PATTERN = re.compile(r'(?:\[Not Secure\] )?<\[(?P<prefix>[^\]]+)\](?P<name>[^>]+)> (?P<message>.*)')
+
+# Re-check the sticky choice against the full handler order after this many lines
+REEVALUATE_EVERY = 10000
+
+_parsed_lines = registry.counter("easybot_stdout_parse_total", "PrefixNameHandler parsed lines by path", "path")
+_sticky_lines = _parsed_lines.labels("sticky")
+_fallback_lines = _parsed_lines.labels("fallback")
+_handler_switches = registry.counter("easybot_stdout_handler_switches_total", "PrefixNameHandler sticky handler changes").labels()
+
+
 class PrefixNameHandler(_handler_classes[0]):
     """
     A server handler that parses chat lines with player name prefixes, e.g.
@@ -43,43 +57,121 @@ class PrefixNameHandler(_handler_classes[0]):
     Composite approach: try multiple base handlers (Forge/Fabric/Spigot/Paper/Vanilla)
     in order to maximize parse success across server types. If none recognize player,
     apply prefix post-processing.
+
+    The base handler that recognizes players on this server is remembered ("sticky") and
+    tried alone first; the full scan only runs when it cannot parse a line, and again
+    on the first possible chat line after every REEVALUATE_EVERY lines (counting all lines,
+    so a server whose log format changed is re-evaluated even if the sticky handler no
+    longer recognizes any player).
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._eb_parsers = None
+        self._eb_sticky = None  # index into self._eb_parsers
+        self._eb_confirmed = False  # whether the sticky handler has recognized a player yet
+        self._eb_lines_until_check = REEVALUATE_EVERY
+        registry.register_collector("prefix_handler", self._collect_metrics)
+
     def get_name(self) -> str:
         return 'easybot_prefix_handler'
 
-    def parse_server_stdout(self, text: str):
-        # Try each underlying handler until one yields a result
-        info = None
-        last_info = None
-        for cls in _handler_classes:
-            parser = getattr(self, f'_eb_{cls.__name__}', None)
-            if parser is None:
+    def _get_parsers(self) -> List:
+        if self._eb_parsers is None:
+            parsers = []
+            for cls in _handler_classes:
                 try:
-                    parser = cls()
+                    parsers.append(cls())
                 except Exception:
                     continue
-                setattr(self, f'_eb_{cls.__name__}', parser)
+            self._eb_parsers = parsers
+        return self._eb_parsers
+
+    def _full_scan(self, text: str):
+        """
+        Try each underlying handler until one yields a player
+        :return: (info, index of the handler that recognized a player, index of the first handler that parsed the line)
+        """
+        info = None
+        first = None
+        for index, parser in enumerate(self._get_parsers()):
             try:
                 last_info = parser.parse_server_stdout(text)
-                if last_info is not None:
-                    info = last_info
-                    # Prefer the first one that recognizes a player name
-                    if getattr(info, 'player', None):
-                        break
             except Exception:
                 continue
+            if last_info is not None:
+                info = last_info
+                if first is None:
+                    first = index
+                # Prefer the first one that recognizes a player name
+                if getattr(info, 'player', None):
+                    return info, index, first
+        return info, None, first
+
+    def _set_sticky(self, index: Optional[int]):
+        if index != self._eb_sticky:
+            self._eb_sticky = index
+            _handler_switches.inc()
+
+    def _parse_base(self, text: str):
+        self._eb_lines_until_check -= 1
+        sticky = self._eb_sticky
+        if sticky is not None:
+            try:
+                info = self._eb_parsers[sticky].parse_server_stdout(text)
+            except Exception:
+                info = None
+            if info is not None:
+                may_be_chat = bool(info.player) or bool(info.content and '<' in info.content)
+                if self._eb_confirmed:
+                    if self._eb_lines_until_check > 0 or not may_be_chat:
+                        _sticky_lines.inc()
+                        return info
+                elif info.player or not may_be_chat:
+                    # Provisional choice: only lines that may be chat need a second opinion
+                    _sticky_lines.inc()
+                    return info
+                # Periodic re-evaluation on a chat line: a handler earlier in the order may win now
+        # Sticky handler missing, unable to parse this line or due for re-evaluation: full scan
+        _fallback_lines.inc()
+        self._eb_lines_until_check = REEVALUATE_EVERY
+        info, index, first = self._full_scan(text)
+        if index is not None:
+            self._set_sticky(index)
+            self._eb_confirmed = True
+        elif not self._eb_confirmed and first is not None:
+            self._set_sticky(first)
+        return info
+
+    def parse_server_stdout(self, text: str):
+        info = self._parse_base(text)
 
         if info is None:
             # As a last resort, call our own base implementation (first class)
             info = super().parse_server_stdout(text)
 
         # Only try to parse when no parser recognized a player
-        if info.player is None:
+        if info.player is None and info.content and '<[' in info.content:
             # Match like: [Not Secure] <[AnyWord]PlayerName> Message or <[AnyWord]PlayerName> Message
             # prefix group is optional capture for readability; only name+message used
-            m = re.fullmatch(r'(?:\[Not Secure\] )?<\[(?P<prefix>[^\]]+)\](?P<name>[^>]+)> (?P<message>.*)', info.content)
-            if m is not None and self._verify_player_name(m['name']):
+            m = _PREFIX_PATTERN.fullmatch(info.content)
+            if m is not None and self.validate_player_name(m['name']):
                 info.player = m['name']
                 info.content = m['message']
         return info
+
+    def get_stats(self) -> dict:
+        sticky = self._eb_sticky
+        return {
+            'handler': type(self._eb_parsers[sticky]).__name__ if sticky is not None else None,
+            'confirmed': self._eb_confirmed,
+            'sticky': _sticky_lines.value,
+            'fallback': _fallback_lines.value,
+            'switches': _handler_switches.value,
+        }
+
+    def _collect_metrics(self):
+        stats = self.get_stats()
+        if stats['handler'] is None:
+            return []
+        return [("easybot_stdout_sticky_handler", {"handler": stats['handler']}, 1)]
@@ -1,9 +1,12 @@
+import asyncio
 import re
 import os
 import random
 import string
 from mcdreforged.api.all import *
 from easybot_mcdr.config import get_config, save_config
+from easybot_mcdr.rcon_pool import rcon_pool
+from easybot_mcdr.server_properties import server_properties
 
 # 用于记录RCON配置是否正在进行中，避免循环触发
 _rcon_config_in_progress = False
@@ -29,39 +32,6 @@ def generate_secure_password(length=16):
     random.shuffle(password)
     return ''.join(password)
 
-def get_server_properties_path(server: PluginServerInterface):
-    """
-    获取服务器properties文件路径
-    :param server: 服务器接口
-    :return: properties文件路径
-    """
-    # 尝试获取服务器工作目录
-    server_dir = server.get_server_directory()
-    if server_dir:
-        return os.path.join(server_dir, 'server.properties')
-    # 如果无法获取，尝试默认路径
-    return os.path.join(os.getcwd(), 'server.properties')
-
-def read_server_properties(properties_path):
-    """
-    读取服务器properties文件
-    :param properties_path: properties文件路径
-    :return: 配置字典
-    """
-    config = {}
-    if not os.path.exists(properties_path):
-        return config
-    
-    with open(properties_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                parts = line.split('=', 1)
-                if len(parts) == 2:
-                    key, value = parts
-                    config[key.strip()] = value.strip()
-    return config
-
 def write_server_properties(properties_path, config):
     """
     写入服务器properties文件
@@ -98,6 +68,8 @@ def write_server_properties(properties_path, config):
     # 写入文件
     with open(properties_path, 'w', encoding='utf-8') as f:
         f.writelines(new_lines)
+    # mtime 精度不足时同一秒内的修改可能无法察觉, 主动丢弃缓存
+    server_properties.invalidate()
 
 def update_plugin_rcon_config(server: PluginServerInterface, host='127.0.0.1', port=25575, password=''):
     """
@@ -117,6 +89,8 @@ def update_plugin_rcon_config(server: PluginServerInterface, host='127.0.0.1', p
     config['rcon']['enabled'] = True
     
     save_config(server)
+    # 凭据已变化, 让RCON池按新配置重建连接
+    rcon_pool.reset()
     server.logger.info(f"已更新插件RCON配置: {host}:{port}")
 
 async def check_and_configure_rcon(server: PluginServerInterface):
@@ -142,16 +116,17 @@ async def check_and_configure_rcon(server: PluginServerInterface):
         server.logger.info("RCON未连接，开始自动配置流程")
         
         # 获取服务器properties文件路径
-        properties_path = get_server_properties_path(server)
-        if not os.path.exists(properties_path):
+        properties = server_properties.get()
+        properties_path = properties.path
+        if not properties.exists:
             server.logger.error(f"找不到服务器配置文件: {properties_path}")
             return False
         
         # 读取服务器配置
-        server_config = read_server_properties(properties_path)
-        rcon_enabled = server_config.get('enable-rcon', 'false').lower() == 'true'
-        rcon_password = server_config.get('rcon.password', '')
-        rcon_port = int(server_config.get('rcon.port', 25575))
+        server_config = dict(properties.raw)
+        rcon_enabled = properties.enable_rcon
+        rcon_password = properties.rcon_password
+        rcon_port = properties.rcon_port
         
         server.logger.info(f"读取服务器RCON配置: enabled={rcon_enabled}, password_set={len(rcon_password) > 0}, port={rcon_port}")
         
@@ -162,7 +137,8 @@ async def check_and_configure_rcon(server: PluginServerInterface):
             
             # 热重载插件配置
             server.logger.info("热重载插件以应用新配置")
-            server.connect_rcon()
+            # 连接 RCON 会阻塞, 放到线程池中执行, 不占用调用方的事件循环
+            await asyncio.get_running_loop().run_in_executor(None, server.connect_rcon)
             
             # 检查连接是否成功
             if server.is_rcon_running():
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from mcdreforged.api.all import *
+
+from easybot_mcdr.config import get_config
+from easybot_mcdr.websocket.ws import EasyBotWsClient
+
+
+class PresenceReporter:
+    """
+    批量上报在线玩家 (REPORT_PLAYERS)
+    完整上报按 chunk_size 分块, 每块一个数据包; 重新鉴权后先尝试差量同步:
+    携带上次完整/差量上报的版本号只发送新增与移除的玩家, 主程序确认 (accepted) 即完成, 否则回退为完整上报
+    REPORT_PLAYERS 需要主程序支持, 旧版主程序会忽略它且不回复差量请求; 因此默认 mode 为 single,
+    按旧方式逐个发送 REPORT_PLAYER, 只有确认主程序支持时才应配置为 bulk
+    服务器启动流程进行期间 (hold) 鉴权后的上报被推迟, 由启动流程在同步在线玩家后通过 release() 补报一次
+    """
+
+    def __init__(self):
+        self._reported: Optional[Dict[str, dict]] = None  # 主程序已知的在线玩家 (玩家名 -> 条目)
+        self._version = 0
+        self._connection = None  # 上次上报所用的连接
+        self._lock = asyncio.Lock()  # 同一时间只进行一次同步, 避免并发完整上报
+        self._held = False
+        self._deferred = False  # hold 期间是否有被推迟的上报
+
+    @staticmethod
+    def _get_report_config() -> dict:
+        return get_config().get("presence_report", {})
+
+    @staticmethod
+    def _collect() -> Dict[str, dict]:
+        """从 api.player 维护的在线表构建上报条目 (MCDR 的 ServerInterface 不提供在线玩家列表)"""
+        from easybot_mcdr.api.player import get_player_list, is_bot_player
+        players = {}
+        for player, info in get_player_list().items():
+            if is_bot_player(player):
+                continue
+            players[player] = {
+                "player_name": player,
+                "player_uuid": info.uuid,
+                "player_ip": info.ip,
+            }
+        return players
+
+    def _next_version(self) -> int:
+        # 毫秒时间戳, 插件重载后也保持递增
+        self._version = max(self._version + 1, int(time.time() * 1000))
+        return self._version
+
+    async def report_full(self, wsc: EasyBotWsClient):
+        """上报完整的在线玩家列表"""
+        report_config = self._get_report_config()
+        players = self._collect()
+        if report_config.get("mode", "single") != "bulk":
+            for player in players:
+                try:
+                    await wsc.report_player(player)
+                except Exception as e:
+                    ServerInterface.get_instance().logger.error(f"上报玩家 {player} 信息失败: {str(e)}")
+            return
+
+        entries = list(players.values())
+        chunk_size = max(1, int(report_config.get("chunk_size", 200)))
+        chunks = max(1, (len(entries) + chunk_size - 1) // chunk_size)
+        version = self._next_version()
+        for index in range(chunks):
+            await wsc._send_packet("REPORT_PLAYERS", {
+                "mode": "full",
+                "version": version,
+                "chunk": index,
+                "chunks": chunks,
+                "players": entries[index * chunk_size:(index + 1) * chunk_size],
+            })
+        self._reported = players
+        self._connection = wsc._ws
+        ServerInterface.get_instance().logger.debug(f"[EasyBot] 已批量上报 {len(entries)} 名在线玩家 ({chunks} 个数据包)")
+
+    def hold(self):
+        """服务器启动流程开始, 推迟鉴权后的上报"""
+        self._held = True
+
+    async def release(self, wsc: EasyBotWsClient) -> bool:
+        """结束 hold, 期间有被推迟的上报时补报一次; 连接未鉴权时返回 False (下次鉴权时自动上报)"""
+        self._held = False
+        if not self._deferred:
+            return True
+        self._deferred = False
+        if not wsc._authenticated:
+            return False
+        await self.resync(wsc)
+        return True
+
+    async def on_authenticated(self, wsc: EasyBotWsClient):
+        if self._held:
+            self._deferred = True
+            return
+        await self.resync(wsc)
+
+    async def resync(self, wsc: EasyBotWsClient):
+        """重新鉴权后的同步: 有上次上报的记录时先尝试差量, 失败再完整上报"""
+        async with self._lock:
+            await self._resync(wsc)
+
+    async def _resync(self, wsc: EasyBotWsClient):
+        report_config = self._get_report_config()
+        if self._reported is None or report_config.get("mode", "single") != "bulk" or not report_config.get("diff", True):
+            await self.report_full(wsc)
+            return
+
+        players = self._collect()
+        added: List[dict] = [entry for name, entry in players.items() if self._reported.get(name) != entry]
+        removed = [name for name in self._reported if name not in players]
+        if not added and not removed and self._connection is wsc._ws:
+            # 同一连接上没有变化, 主程序的记录已是最新
+            return
+        base_version = self._version
+        version = self._next_version()
+        try:
+            response = await wsc.send_and_wait("REPORT_PLAYERS", {
+                "mode": "diff",
+                "base_version": base_version,
+                "version": version,
+                "added": added,
+                "removed": removed,
+            }, float(report_config.get("diff_timeout", 5)))
+            accepted = bool(response.get("accepted"))
+        except Exception as e:
+            ServerInterface.get_instance().logger.debug(f"[EasyBot] 在线玩家差量同步失败: {e}")
+            accepted = False
+        if accepted:
+            self._reported = players
+            self._connection = wsc._ws
+        else:
+            # 主程序不认识该版本 (如已重启), 重新完整上报
+            await self.report_full(wsc)
+
+
+presence_reporter = PresenceReporter()
+
+
+@EasyBotWsClient.listen_authenticated
+async def on_authenticated(wsc: EasyBotWsClient):
+    await presence_reporter.on_authenticated(wsc)
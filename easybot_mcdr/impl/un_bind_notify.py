@@ -1,4 +1,6 @@
 from easybot_mcdr.config import get_config
+from easybot_mcdr.datapack import command_datapack
+from easybot_mcdr.template import get_templates
 from easybot_mcdr.utils import is_white_list_enable
 from easybot_mcdr.websocket.context import ExecContext
 from easybot_mcdr.websocket.ws import EasyBotWsClient
@@ -10,24 +12,28 @@ async def exec_un_bind_notify(ctx: ExecContext, data: dict, _):
     logger = ServerInterface.get_instance().logger
     player_name = data["player_name"]
     kick_message = data["kick_message"]
+    # 绑定状态已变化, 丢弃该玩家的绑定信息缓存
+    ctx.ws.invalidate_request_cache("GET_SOCIAL_ACCOUNT", {"player_name": player_name})
     logger.info(f"收到广播,玩家{player_name}解绑 (如果在本服将被踢出)")
 
-    if get_config()["events"]["un_bind"]["exec_command"]:
-        commands = get_config()["events"]["un_bind"]["comamnds"]
+    event_config = get_config()["events"]["un_bind"]
+    if event_config["exec_command"] and command_datapack.is_active("un_bind"):
+        logger.info("即将通过数据包函数执行解绑预设指令")
+        ServerInterface.get_instance().execute(command_datapack.call("un_bind", {"player": player_name}))
+    elif event_config["exec_command"]:
+        commands = get_templates().get("events", "un_bind", "comamnds")
         logger.info(f"即将执行解绑预设指令 ({len(commands)}个)")
         for command in commands:
-            ServerInterface.get_instance().execute(
-                command.replace("#player", player_name)
-            )
+            ServerInterface.get_instance().execute(command.render({"player": player_name}))
 
-    if not get_config()["events"]["un_bind"]["kick"]:
+    if not event_config["kick"]:
         return
     
-    if get_config()["events"]["un_bind"]["remove_white_list"] and is_white_list_enable():
+    if event_config["remove_white_list"] and is_white_list_enable():
         try:
             ServerInterface.get_instance().execute("whitelist remove " + player_name)
         except Exception as e:
             logger.error(f"移除白名单失败: {e}")
 
     from easybot_mcdr.main import push_kick
-    push_kick(player_name, "您已从聊群或管理平台解除账户绑定")
+    await push_kick(player_name, "您已从聊群或管理平台解除账户绑定")
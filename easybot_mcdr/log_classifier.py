@@ -0,0 +1,54 @@
+import re
+from typing import NamedTuple, Optional
+
+# 事件类型
+UUID = "uuid"
+JOIN = "join"
+LEAVE = "leave"
+
+_UUID_PATTERN = re.compile(r"UUID of player ([\w.]+) is ([0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12})")
+_JOIN_PATTERN = re.compile(r"^(?:\[[^\]]+\])?(?P<name>[\w.]+) joined the game$")
+_LEFT_PATTERN = re.compile(r"(?:\[[^\]]+\])?(?P<name>[\w.]+) left the game")
+_LOST_PATTERN = re.compile(r"(?:\[[^\]]+\])?(?P<name>[\w.]+) lost connection:\s*")
+
+
+class LogEvent(NamedTuple):
+    kind: str  # UUID / JOIN / LEAVE
+    player: str
+    uuid: Optional[str] = None
+
+
+def _classify(raw: str) -> Optional[LogEvent]:
+    # 先用子串判断筛掉绝大多数普通输出, 只有命中时才执行对应的正则
+    if "UUID of player " in raw:
+        if match := _UUID_PATTERN.search(raw):
+            return LogEvent(UUID, match.group(1), match.group(2).lower())
+        return None
+    if raw.endswith(" joined the game"):
+        if match := _JOIN_PATTERN.search(raw):
+            return LogEvent(JOIN, match.group("name"))
+        return None
+    if " left the game" in raw:
+        if match := _LEFT_PATTERN.search(raw):
+            return LogEvent(LEAVE, match.group("name"))
+        return None
+    if " lost connection:" in raw:
+        if match := _LOST_PATTERN.search(raw):
+            return LogEvent(LEAVE, match.group("name"))
+    return None
+
+
+# 同一行会被 main.on_info 与 player.on_stdout 各分类一次, 缓存最近一行的结果
+# (两个监听器在不同线程执行, 以单个元组整体替换保证读取到的行与结果一致)
+_last = (None, None)
+
+
+def classify(raw: str) -> Optional[LogEvent]:
+    """解析服务端输出行, 不是玩家相关事件时返回 None"""
+    global _last
+    last_raw, last_event = _last
+    if raw is last_raw or raw == last_raw:
+        return last_event
+    event = _classify(raw)
+    _last = (raw, event)
+    return event
@@ -1,17 +1,24 @@
 from mcdreforged.api.all import *
-import websockets
-from easybot_mcdr.api.player import get_data_map, init_player_api
+from easybot_mcdr.api.player import get_data_map, get_player_list, init_player_api, open_player_db, close_player_db, get_memory_stats as get_player_memory_stats
 from easybot_mcdr.config import get_config, load_config, save_config
 from easybot_mcdr.utils import is_white_list_enable
 from easybot_mcdr.websocket.ws import EasyBotWsClient
 from easybot_mcdr.impl.get_server_info import get_online_mode
-import easybot_mcdr.impl.cross_server_chat
 from easybot_mcdr.impl.prefix_handler import PrefixNameHandler
 from easybot_mcdr.impl.rcon_auto_config import check_and_configure_rcon
+from easybot_mcdr.metrics import registry, TextfileExporter
+from easybot_mcdr.runtime import runtime
+from easybot_mcdr.rcon_pool import rcon_pool
+from easybot_mcdr.scheduler import scheduler
+from easybot_mcdr.template import get_templates
+from easybot_mcdr.datapack import command_datapack
+from easybot_mcdr.log_classifier import classify, UUID, JOIN, LEAVE
+from easybot_mcdr.startup import StartupPipeline
 import re
 import json
 import os
 import asyncio
+import threading
 import time
 import traceback
 
@@ -19,12 +26,18 @@ import traceback
 wsc: EasyBotWsClient = None
 player_data_map = {}
 rcon_initialized = False
+last_startup = None  # 最近一次服务器启动流程 (StartupPipeline)
+rcon_ready = threading.Event()  # 服务端 RCON 已启动 (输出 "RCON running on" 或服务器启动完成)
 exit_reported_at = {}
 debounce_time = 5 
+metrics_exporter: TextfileExporter = None
+last_stats_sample = (time.time(), 0)  # (时间, 服务端输出行数) 用于计算最近速率
+
+stdout_lines = registry.counter("easybot_stdout_lines_total", "on_info 处理的服务端输出行数").labels()
 
 from easybot_mcdr.meta import get_plugin_version
 
-help_msg = '''--------§a EasyBot §r(版本: §e{0}§r)--------
+HELP_MSG = '''--------§a EasyBot §r(版本: §e{0}§r)--------
 §b!!ez help §f- §c显示帮助菜单
 §b!!ez reload §f- §c重载配置文件
 
@@ -45,7 +58,11 @@ help_msg = '''--------§a EasyBot §r(版本: §e{0}§r)--------
 
 §c插件信息
 §b!!ez §f- §c显示插件详情
----------------------------------------------'''.format(get_plugin_version())
+§b!!ez health §f- §c显示与EasyBot主程序的连接状况
+§b!!ez stats §f- §c显示插件运行统计
+§b!!ez debug toggle §f- §c开启/关闭数据包调试抓取
+§b!!ez debug dump §f- §c导出最近抓取的数据包到文件
+---------------------------------------------'''
 
 
 def is_bot_player(player: str) -> bool:
@@ -70,20 +87,29 @@ async def on_load(server: PluginServerInterface, prev_module):
         # 注册服务器处理器
         server.register_server_handler(PrefixNameHandler())
 
+        # 生成事件命令数据包 (如已开启)
+        command_datapack.sync(server)
+
         # 启动UUID检查线程
         start_uuid_check_thread(server)
         
         # 加载玩家数据
         load_player_data(server)
         
+        # 启动插件运行时线程, 所有WebSocket I/O都在该线程的事件循环上执行
+        runtime.start()
+
         # 初始化WebSocket客户端
-        wsc = await initialize_websocket_client(server)
+        wsc = await runtime.wrap(initialize_websocket_client(server))
         
         # 注册事件监听器
         register_event_listeners(server)
         
         # 注册命令
         register_commands(server)
+
+        # 启动指标导出
+        start_metrics_exporter(server)
         
         server.logger.info("EasyBot插件加载完成")
     except Exception as e:
@@ -92,150 +118,156 @@ async def on_load(server: PluginServerInterface, prev_module):
         raise
 
 
-def sync_online_players_with_rcon(server: PluginServerInterface, max_retries=5, retry_delay=2):
+def sync_online_players_with_rcon(server: PluginServerInterface, timeout: float = 10):
     """
-    使用RCON同步在线玩家列表，带重试机制
+    使用RCON同步在线玩家列表; 先等待服务端 RCON 就绪 (rcon_ready), 最多等待 timeout 秒
     """
-    for attempt in range(max_retries):
-        try:
-            if not server.is_rcon_running():
-                server.logger.warning(f"RCON未运行 (尝试 {attempt + 1}/{max_retries})")
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    server.logger.error("RCON连接失败，无法同步玩家列表")
-                    return False
-
-            server.logger.info(f"正在通过RCON同步玩家列表 (尝试 {attempt + 1}/{max_retries})")
-            result = server.rcon_query('list')
-            
+    if not rcon_ready.wait(timeout):
+        server.logger.error(f"RCON玩家列表同步失败: {timeout:g}秒内服务端RCON未就绪")
+        return False
+    try:
+        if not rcon_pool.is_available():
+            error = "RCON未运行"
+        else:
+            server.logger.info("正在通过RCON同步玩家列表")
+            result = rcon_pool.query_sync('list')
             # 检查 RCON 查询结果是否有效
             if result is None:
-                server.logger.warning(f"RCON查询返回空结果 (尝试 {attempt + 1}/{max_retries})")
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    server.logger.error("RCON查询持续返回空结果，请检查RCON连接状态")
-                    return False
-            
-            # 增强正则表达式兼容性
-            match = re.search(
-                r'There are (\d+) of a max (\d+) players online[^\d]*?(?:[:]?\s*(.*))?$',
-                result,
-                re.IGNORECASE
-            )
-            
-            actual_online = []  # 初始化默认值
-            if match:
-                online_count = int(match.group(1))
-                max_players = int(match.group(2))
-                player_list_str = match.group(3) or ''  # 处理可能的 None
-                actual_online = [p.strip() for p in player_list_str.split(',') if p.strip()]
-                
-                server.logger.info(f"RCON查询成功: {online_count}/{max_players} 玩家在线")
-                if actual_online:
-                    server.logger.info(f"在线玩家: {', '.join(actual_online)}")
+                error = "RCON查询返回空结果"
+            elif apply_rcon_player_list(server, result):
+                server.logger.info("RCON玩家列表同步完成")
+                return True
             else:
-                server.logger.warning(f"无法解析RCON列表输出，原始输出: {result}")
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(retry_delay)
-                    continue
-                else:
-                    return False
-            
-            # 更新在线玩家列表
-            player_data_map = get_data_map()
-            if "online_players" in player_data_map:
-                online_players = player_data_map["online_players"]
-                removed_players = []
-                for player in list(online_players.keys()):
-                    if player not in actual_online:
-                        online_players.pop(player)
-                        removed_players.append(player)
-                
-                if removed_players:
-                    server.logger.info(f"从在线玩家列表移除了: {', '.join(removed_players)}")
-                else:
-                    server.logger.info("在线玩家列表已同步，无需移除玩家")
-            
-            server.logger.info("RCON玩家列表同步完成")
-            return True
-            
-        except Exception as e:
-            server.logger.warning(f"RCON同步尝试 {attempt + 1}/{max_retries} 失败: {e}")
-            if attempt < max_retries - 1:
-                import time
-                time.sleep(retry_delay)
-            else:
-                server.logger.error("RCON玩家列表同步最终失败")
-                return False
-    
+                error = f"无法解析RCON列表输出，原始输出: {result}"
+    except Exception as e:
+        error = str(e)
+    server.logger.error(f"RCON玩家列表同步失败: {error}")
     return False
 
 
+def on_server_process_start(server: PluginServerInterface):
+    """服务端进程启动, 等待新的 RCON 就绪信号"""
+    rcon_ready.clear()
+
+
+def on_server_ready(server: PluginServerInterface):
+    """服务端启动完成 (Done), 此时 RCON 必然已启动或未启用"""
+    rcon_ready.set()
+
+
+def apply_rcon_player_list(server: PluginServerInterface, result: str) -> bool:
+    """根据 list 命令的输出移除已不在线的玩家, 无法解析时返回 False"""
+    # 增强正则表达式兼容性
+    match = re.search(
+        r'There are (\d+) of a max (\d+) players online[^\d]*?(?:[:]?\s*(.*))?$',
+        result,
+        re.IGNORECASE
+    )
+    if not match:
+        return False
+
+    online_count = int(match.group(1))
+    max_players = int(match.group(2))
+    player_list_str = match.group(3) or ''  # 处理可能的 None
+    actual_online = [p.strip() for p in player_list_str.split(',') if p.strip()]
+
+    server.logger.info(f"RCON查询成功: {online_count}/{max_players} 玩家在线")
+    if actual_online:
+        server.logger.info(f"在线玩家: {', '.join(actual_online)}")
+
+    # 更新在线玩家列表
+    player_data_map = get_data_map()
+    if "online_players" in player_data_map:
+        online_players = player_data_map["online_players"]
+        removed_players = []
+        for player in list(online_players.keys()):
+            if player not in actual_online:
+                online_players.pop(player)
+                removed_players.append(player)
+
+        if removed_players:
+            server.logger.info(f"从在线玩家列表移除了: {', '.join(removed_players)}")
+        else:
+            server.logger.info("在线玩家列表已同步，无需移除玩家")
+    return True
+
+
 from easybot_mcdr.impl.rcon_auto_config import check_and_configure_rcon
 
 @new_thread("EasyBot Startup")
 def on_server_started(server: PluginServerInterface):
-    """服务器启动时执行的函数"""
-    global wsc, rcon_initialized
+    """服务器启动时执行的函数: 按依赖关系并发执行各启动阶段, 完成后输出各阶段耗时"""
+    global last_startup
     server.logger.info("检测到服务器启动事件，开始处理...")
     
+    from easybot_mcdr.impl.report_players import presence_reporter
+    # 鉴权监听器的上报推迟到 report_players 阶段, 每次启动只上报一次
+    presence_reporter.hold()
     try:
-        # 检查并配置RCON
-        server.logger.info("开始RCON自动配置检查...")
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            # 执行RCON配置
-            rcon_success = loop.run_until_complete(check_and_configure_rcon(server))
-            
-            # 如果RCON配置成功，设置标志
-            if rcon_success:
-                rcon_initialized = True
-                server.logger.info("RCON初始化标志已设置")
-            
-            # 执行WebSocket连接和上报
-            if wsc is not None:
-                loop.run_until_complete(setup_websocket_and_report(server))
-            else:
-                server.logger.error("WebSocket客户端未初始化")
-        finally:
-            loop.close()
-        
-        # 进行RCON同步（如果可用）
-        sync_online_players_if_available(server)
-        
+        pipeline = build_startup_pipeline(server)
+        runtime.run(pipeline.run())
+        pipeline.log_summary(server.logger)
+        last_startup = pipeline
     except Exception as e:
         server.logger.error(f"启动过程中发生未预期错误: {type(e).__name__}: {str(e)}")
         server.logger.debug("\n{traceback.format_exc()}")
+    finally:
+        # report_players 阶段被跳过时也要解除推迟, 否则之后的鉴权不会再上报
+        if wsc is not None and runtime.is_running():
+            runtime.submit(presence_reporter.release(wsc))
 
-async def setup_websocket_and_report(server: PluginServerInterface):
-    """设置WebSocket连接并上报服务器信息"""
-    global wsc
-    
-    # 确保WebSocket连接已建立
-    if not await ensure_websocket_connection(server):
-        return False
-    
-    # 上报服务器信息
-    try:
+def build_startup_pipeline(server: PluginServerInterface) -> StartupPipeline:
+    """
+    服务器启动流程, 每行是一条依赖链, 不同的链并发执行:
+      datapack
+      rcon_config -> rcon_sync
+      websocket   -> server_info, report_players
+    report_players 还要等 rcon_sync 清理掉已离线的玩家后再上报, rcon_sync 失败或跳过时照常上报
+    """
+    startup_config = get_config().get("startup", {})
+
+    def sync_datapack():
+        # 世界可能在本次启动时才创建, 确认事件命令数据包已就位
+        command_datapack.sync(server)
+
+    async def configure_rcon():
+        global rcon_initialized
+        server.logger.info("开始RCON自动配置检查...")
+        rcon_success = await check_and_configure_rcon(server)
+        # 如果RCON配置成功，设置标志
+        if rcon_success:
+            rcon_initialized = True
+            server.logger.info("RCON初始化标志已设置")
+        return rcon_success
+
+    def sync_players():
+        return sync_online_players_with_rcon(server, float(startup_config.get("rcon_ready_timeout", 10)))
+
+    async def connect_websocket():
+        if wsc is None:
+            raise RuntimeError("WebSocket客户端未初始化")
+        if not await ensure_websocket_connection(server):
+            return False
+        # 等待鉴权完成 (op 3) 而不是固定等待; 超时后鉴权成功时仍会自动重新上报在线玩家
+        if not await wsc.wait_authenticated(float(startup_config.get("ws_ready_timeout", 15))):
+            server.logger.warning("等待EasyBot鉴权超时")
+            return False
+
+    async def report_info():
         await report_server_info(server)
-        
-        # 上报当前在线玩家
-        await report_online_players(server)
-        
-        return True
-    except Exception as e:
-        server.logger.error(f"上报信息时出错: {str(e)}")
-        server.logger.debug("\n{traceback.format_exc()}")
-        return False
+
+    async def report_players():
+        # 鉴权监听器已在本次启动中推迟上报, 这里只补报一次, 不重复发送
+        from easybot_mcdr.impl.report_players import presence_reporter
+        return await presence_reporter.release(wsc)
+
+    return (StartupPipeline("服务器启动流程")
+            .stage("datapack", sync_datapack)
+            .stage("rcon_config", configure_rcon)
+            .stage("rcon_sync", sync_players, after=("rcon_config",))
+            .stage("websocket", connect_websocket)
+            .stage("server_info", report_info, after=("websocket",))
+            .stage("report_players", report_players, after=("websocket",), wait_for=("rcon_sync",)))
 
 async def ensure_websocket_connection(server: PluginServerInterface):
     """确保WebSocket连接已建立"""
@@ -248,7 +280,7 @@ async def ensure_websocket_connection(server: PluginServerInterface):
         server.logger.info("检查WebSocket连接状态...")
         
         # 检查是否已连接（通过检查_ws属性和状态）
-        if hasattr(wsc, '_ws') and wsc._ws is not None and hasattr(wsc._ws, 'state') and wsc._ws.state is websockets.State.OPEN:
+        if await wsc.is_connected():
             server.logger.info("WebSocket已连接")
             return True
         
@@ -275,7 +307,7 @@ async def report_server_info(server: PluginServerInterface):
     server_info = {
         'name': server.get_server_information().name,
         'version': server.get_server_information().version,
-        'player_count': len(server.get_online_players()),
+        'player_count': len(get_player_list()),
         'max_players': server.get_server_information().max_players,
         'motd': server.get_server_information().description,
         'port': server.get_server_information().port
@@ -284,35 +316,9 @@ async def report_server_info(server: PluginServerInterface):
     await wsc._send_packet("REPORT_SERVER_INFO", server_info)
     server.logger.info("服务器信息上报成功")
 
-async def report_online_players(server: PluginServerInterface):
-    """上报当前在线玩家"""
-    global wsc
-    
-    for player in server.get_online_players():
-        try:
-            if not is_bot_player(player):
-                await wsc.report_player(player)
-                server.logger.debug(f"玩家 {player} 信息上报成功")
-        except Exception as e:
-            server.logger.error(f"上报玩家 {player} 信息失败: {str(e)}")
-            server.logger.debug("\n{traceback.format_exc()}")
-
-def sync_online_players_if_available(server: PluginServerInterface):
-    """如果RCON可用，同步在线玩家列表"""
-    import time
-    
-    # 等待一下确保服务器完全启动
-    time.sleep(2)
-    
-    # 只有当RCON可用时才进行同步
-    if server.is_rcon_running():
-        server.logger.info("开始同步在线玩家列表...")
-        sync_online_players_with_rcon(server)
-    else:
-        server.logger.warning("RCON未连接，跳过玩家列表同步")
-
 async def show_help(source: CommandSource):
-    for line in help_msg.splitlines():
+    # 版本号在显示时才获取, 避免导入本模块时访问 MCDR 插件元数据
+    for line in HELP_MSG.format(get_plugin_version()).splitlines():
         source.reply(line)
 
 async def show_plugin_info(source: CommandSource):
@@ -333,34 +339,152 @@ async def show_plugin_info(source: CommandSource):
     for line in plugin_info:
         source.reply(line)
 
+async def show_health(source: CommandSource):
+    """显示与主程序的连接健康状况"""
+    if wsc is None:
+        source.reply("§cWebSocket客户端未初始化")
+        return
+
+    def fmt(value, unit=""):
+        return "-" if value is None else f"{value}{unit}"
+
+    health = wsc.get_health()
+    lines = [
+        '--------§a EasyBot 连接状况 §r--------',
+        f'§b连接状态: §f{"已鉴权" if health["authenticated"] else ("已连接" if health["connected"] else "未连接")}',
+        f'§b延迟(EWMA): §f{fmt(health["rtt_ewma_ms"], "ms")}',
+        f'§b延迟(p50/p99): §f{fmt(health["rtt_p50_ms"], "ms")} / {fmt(health["rtt_p99_ms"], "ms")} §7({health["rtt_samples"]}个样本)',
+        f'§b最近收发: §f{fmt(health["last_recv_age_s"], "s")}前 / {fmt(health["last_send_age_s"], "s")}前',
+        f'§b心跳: §f已发送{health["heartbeats_sent"]}次, 因其他流量跳过{health["heartbeats_skipped"]}次',
+        f'§b卡死检测: §f{health["stalls"]}次',
+        '---------------------------------------------'
+    ]
+    for line in lines:
+        source.reply(line)
+
+def startup_summary(pipeline) -> str:
+    summary = pipeline.get_summary() if pipeline is not None else None
+    if summary is None:
+        return "本次加载后尚未执行"
+    stages = ', '.join(f'{name} {stage["elapsed"]:.2f}s' + ('' if stage["status"] == 'ok' else f'({stage["status"]})')
+                       for name, stage in summary["stages"].items())
+    return f'总耗时{summary["elapsed"]:.2f}s: {stages}'
+
+async def show_stats(source: CommandSource):
+    """显示插件热路径的运行统计"""
+    global last_stats_sample
+    if not source.has_permission(3):
+        source.reply("§c你没有权限使用这个命令!")
+        return
+
+    def ms(value):
+        return "-" if value is None else ("∞" if value == float("inf") else f"{value * 1000:.1f}ms")
+
+    def histogram_lines(name: str):
+        family = registry.get_family(name)
+        if family is None or not family.children:
+            return ["  §7(无数据)"]
+        return [
+            f"  §7{label} §f{h.count}次 平均{ms(h.mean())} p99≤{ms(h.quantile(0.99))}"
+            for label, h in sorted(list(family.children.items()), key=lambda item: -item[1].count)
+        ]
+
+    def counter_value(name: str, label: str = ""):
+        family = registry.get_family(name)
+        # 只读取已有子指标, 不通过 labels() 创建空序列
+        child = family.children.get(label) if family is not None else None
+        return child.value if child is not None else 0
+
+    now = time.time()
+    uptime = max(now - registry.started_at, 1e-6)
+    last_time, last_lines = last_stats_sample
+    recent_rate = (stdout_lines.value - last_lines) / max(now - last_time, 1e-6)
+    last_stats_sample = (now, stdout_lines.value)
+
+    gauges = {}
+    for name, labels, value in registry.collect_gauges():
+        gauges.setdefault(name, []).append((labels, value))
+
+    def gauge(name: str):
+        return sum(value for _, value in gauges.get(name, []))
+
+    parse_sticky = counter_value("easybot_stdout_parse_total", "sticky")
+    parse_fallback = counter_value("easybot_stdout_parse_total", "fallback")
+
+    lines = [
+        '--------§a EasyBot 运行统计 §r--------',
+        f'§b运行时间: §f{int(uptime)}s',
+        f'§b服务端输出: §f共{stdout_lines.value}行, 平均{stdout_lines.value / uptime:.1f}行/s, 最近{recent_rate:.1f}行/s',
+        f'§b发送队列: §f{gauge("easybot_send_queue_depth")} §b顺序队列: §f{gauge("easybot_ordered_queue_depth")} §b处理中任务: §f{gauge("easybot_dispatch_tasks")}',
+        f'§b待响应请求: §f{gauge("easybot_pending_requests")} §b离线积压: §f{gauge("easybot_outbox_pending")}',
+        f'§b玩家缓存: §f' + ', '.join(f'{name} {stats["entries"]}条/{stats["bytes"] / 1024:.0f}KiB' for name, stats in get_player_memory_stats().items()),
+        f'§b日志解析: §f粘性处理器命中{parse_sticky}行, 回退全量解析{parse_fallback}行 (命中率{parse_sticky / max(parse_sticky + parse_fallback, 1):.1%})',
+        f'§b启动流程: §f{startup_summary(last_startup)}',
+        f'§b连接: §f建立{counter_value("easybot_ws_connects_total")}次, 重连{counter_value("easybot_ws_reconnects_total")}次, 失败{counter_value("easybot_ws_connect_failures_total")}次',
+        '§bexec_op 处理:',
+        *histogram_lines("easybot_exec_op_seconds"),
+        '§b请求往返(send_and_wait):',
+        *histogram_lines("easybot_request_seconds"),
+        '§b出站数据包:',
+        *histogram_lines("easybot_send_seconds"),
+        '---------------------------------------------'
+    ]
+    for line in lines:
+        source.reply(line)
+
+async def toggle_debug_capture(source: CommandSource):
+    """临时开启/关闭数据包抓取 (不写入配置文件)"""
+    from easybot_mcdr.websocket.debug_capture import capture
+    if not source.has_permission(3):
+        source.reply("§c你没有权限使用这个命令!")
+        return
+    capture.enabled = not capture.enabled
+    state = "开启" if capture.enabled else "关闭"
+    source.reply(f"§a数据包调试抓取已{state} §7(缓冲区上限{capture.capacity}条, 每{capture.sample_every}个记录1个)")
+
+async def dump_debug_capture(source: CommandSource):
+    """将抓取到的数据包导出到插件数据目录"""
+    from easybot_mcdr.websocket.debug_capture import capture
+    if not source.has_permission(3):
+        source.reply("§c你没有权限使用这个命令!")
+        return
+    folder = os.path.join(server_interface.get_data_folder(), "debug")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, time.strftime("packets-%Y%m%d-%H%M%S.log"))
+    count = capture.dump(path)
+    source.reply(f"§a已导出 {count} 个数据包到 §f{path}")
+
+def start_metrics_exporter(server: PluginServerInterface):
+    """按配置启动 Prometheus textfile 指标导出"""
+    global metrics_exporter
+    stop_metrics_exporter()
+    textfile = get_config().get("metrics", {}).get("textfile", {})
+    if not textfile.get("enabled", False):
+        return
+    path = textfile.get("path") or os.path.join(server.get_data_folder(), "easybot.prom")
+    metrics_exporter = TextfileExporter(registry, path, textfile.get("interval", 15), logger=server.logger)
+    metrics_exporter.start()
+    server.logger.info(f"指标导出已启动: {path}")
+
+def stop_metrics_exporter():
+    global metrics_exporter
+    if metrics_exporter is not None:
+        metrics_exporter.stop()
+        metrics_exporter = None
+
 async def on_unload(server: PluginServerInterface):
     global player_data_map, wsc, server_interface
     
     try:
-        # 保存玩家数据
-        player_data_map = get_data_map()
-        
-        # 安全处理所有数据字段
-        def safe_convert(data):
-            if isinstance(data, list):
-                return data
-            elif isinstance(data, dict):
-                return {k: v.__dict__ if hasattr(v, '__dict__') else v for k, v in data.items()}
-            return {}
-            
-        data_to_save = {
-            "online_players": safe_convert(player_data_map.get("online_players", [])),
-            "uuid_map": safe_convert(player_data_map.get("uuid_map", {})),
-            "cache": safe_convert(player_data_map.get("cache", []))
-        }
-        
-        server.logger.debug(f"准备保存的数据: {data_to_save}")
-        
-        with open("easybot_cache.json", "w") as f:
-            json.dump(data_to_save, f, indent=2)
-        
         # 关闭连接和清理资源
-        await close()
+        if runtime.is_running():
+            await runtime.wrap(close())
+        scheduler.clear()
+        runtime.stop()
+        rcon_pool.close()
+        stop_metrics_exporter()
+        # 玩家数据在变化时已逐条写入数据库, 这里只需关闭
+        close_player_db()
         
         # 清理全局变量
         player_data_map = {}
@@ -376,6 +500,8 @@ async def close():
     global wsc
     if wsc is not None:
         try:
+            # 在限定时间内尽量发出离线积压的消息, 其余保留在磁盘上
+            await wsc.drain_outbox(get_config().get("outbox", {}).get("drain_timeout_seconds", 3))
             await wsc.stop()
             # 确保连接完全关闭
             if hasattr(wsc, '_ws') and wsc._ws is not None:
@@ -401,59 +527,13 @@ def start_uuid_check_thread(server: PluginServerInterface):
     server.logger.info("UUID同步检查线程已启动")
 
 def load_player_data(server: PluginServerInterface):
-    """加载玩家数据"""
-    from easybot_mcdr.api.player import PlayerInfo
-    
-    if os.path.exists("easybot_cache.json"):
-        server.logger.info("检测到缓存文件，加载玩家数据...")
-        try:
-            with open("easybot_cache.json", "r") as f:
-                saved_data = json.load(f)
-            
-            # 处理online_players数据
-            online_players = {}
-            if isinstance(saved_data["online_players"], list):
-                server.logger.warning("检测到旧版列表格式的online_players，正在转换...")
-                for player_info in saved_data["online_players"]:
-                    if isinstance(player_info, dict):
-                        name = player_info.get("name")
-                        if name:
-                            online_players[name] = PlayerInfo(**player_info)
-            elif isinstance(saved_data["online_players"], dict):
-                online_players = {k: PlayerInfo(**v) for k, v in saved_data["online_players"].items()}
-            else:
-                server.logger.error(f"未知的online_players格式: {type(saved_data['online_players'])}")
-                
-            # 处理cache数据
-            cache = {}
-            if isinstance(saved_data["cache"], list):
-                server.logger.warning("检测到旧版列表格式的cache，正在转换...")
-                for player_info in saved_data["cache"]:
-                    if isinstance(player_info, dict):
-                        name = player_info.get("name")
-                        if name:
-                            cache[name] = PlayerInfo(**player_info)
-            elif isinstance(saved_data["cache"], dict):
-                cache = {k: PlayerInfo(**v) for k, v in saved_data["cache"].items()}
-            else:
-                server.logger.error(f"未知的cache格式: {type(saved_data['cache'])}")
-
-            # 初始化玩家API
-            init_player_api(server, {
-                "online_players": online_players,
-                "uuid_map": saved_data["uuid_map"],
-                "cache": cache
-            })
-            
-            # 删除旧缓存文件
-            os.remove("easybot_cache.json")
-        except Exception as e:
-            server.logger.error(f"加载玩家数据时出错: {str(e)}")
-            server.logger.debug("\n{traceback.format_exc()}")
-            init_player_api(server, None)
-    else:
-        server.logger.info("未找到缓存文件，初始化空玩家数据")
-        init_player_api(server, None)
+    """加载玩家数据 (打开玩家数据库, 首次运行时自动导入旧版 easybot_cache.json)"""
+    try:
+        open_player_db(server)
+    except Exception as e:
+        server.logger.error(f"打开玩家数据库失败, 本次运行的玩家数据将只保存在内存中: {str(e)}")
+        server.logger.debug(f"\n{traceback.format_exc()}")
+    init_player_api(server, None)
     
     server.logger.info("玩家数据加载完成")
 
@@ -481,7 +561,7 @@ async def initialize_websocket_client(server: PluginServerInterface):
         return None
     
     server.logger.info(f"WebSocket配置URL: {ws_url}")
-    wsc = EasyBotWsClient(ws_url)
+    wsc = EasyBotWsClient(ws_url, outbox_dir=os.path.join(server.get_data_folder(), "outbox"))
     
     # 直接启动连接，依赖ws.py中的指数退避重连机制
     try:
@@ -504,6 +584,12 @@ def register_event_listeners(server: PluginServerInterface):
     
     # 注册信息事件处理
     server.register_event_listener('mcdr.general_info', on_info, priority=1)
+
+    # RCON 就绪信号, 供启动流程等待
+    server.register_event_listener('mcdr.server_start', on_server_process_start)
+    server.register_event_listener('mcdr.server_startup', on_server_ready)
+    if server.is_server_startup():
+        rcon_ready.set()
     
     # 注册玩家相关事件
     server.register_event_listener('player_death', on_player_death)
@@ -524,6 +610,10 @@ def register_commands(server: PluginServerInterface):
     builder.command("!!ez help", show_help)
     builder.command("!!ez", show_plugin_info)
     builder.command("!!ez reload", reload)
+    builder.command("!!ez health", show_health)
+    builder.command("!!ez stats", show_stats)
+    builder.command("!!ez debug toggle", toggle_debug_capture)
+    builder.command("!!ez debug dump", dump_debug_capture)
     builder.command("!!ez bind", bind)
     builder.command("!!bind", bind)
     builder.command("!!say <message>", say)
@@ -548,12 +638,10 @@ async def bind(source: CommandSource):
         source.reply("§c这个命令不能在控制台使用!")
         return
 
-    bind_data = await wsc.get_social_account(source.player)
+    bind_data = await runtime.wrap(wsc.get_social_account(source.player))
     if bind_data["uuid"] is None or bind_data["uuid"] == "":
-        code = await wsc.start_bind(source.player)
-        message: str = get_config()["message"]["start_bind"]
-        message = message.replace("#code", code["code"])
-        message = message.replace("#time", code["time"])
+        code = await runtime.wrap(wsc.start_bind(source.player))
+        message = get_templates().first("message", "start_bind").render({"code": code["code"], "time": code["time"]})
         source.reply(message)
     else:
         source.reply(
@@ -570,9 +658,12 @@ async def reload(source: CommandSource):
     try:
         # 加载配置
         load_config(server_interface)
+        rcon_pool.reset()
+        command_datapack.sync(server_interface)
         
         # 重新初始化WebSocket客户端
-        wsc = await initialize_websocket_client(server_interface)
+        wsc = await runtime.wrap(initialize_websocket_client(server_interface))
+        start_metrics_exporter(server_interface)
         
         source.reply("§a插件重载成功!")
     except Exception as e:
@@ -584,24 +675,27 @@ async def say(source: CommandSource, context: CommandContext):
     name = "CONSOLE"
     if source.is_player:
         name = source.player
-    await wsc.push_message(name, context["message"], True)
+    await runtime.wrap(wsc.push_message(name, context["message"], True))
     source.reply("§a消息已发送: §f" + context["message"])
 
 kick_map = []
 
-def push_kick(player: str, reason: str):
+async def push_kick(player: str, reason: str):
     if reason is None or reason.strip() == "":
         reason = "你已被踢出服务器"
     server = ServerInterface.get_instance()
-    if not server.is_rcon_running():
+    if not rcon_pool.is_available():
         server.logger.error("你的服务器RCON当前并未运行,踢出玩家的原因无法显示多行。")
         server.logger.error(f"即将踢出玩家 {player} 并且只显示踢出原因的第一行!")
         first_line = reason.split("\n")[0]
         server.execute(f"kick {player} {first_line}")
         return
     global kick_map
-    server.rcon_query(f"kick {player} {reason}")
     kick_map.append(player)
+    try:
+        await rcon_pool.query(f"kick {player} {reason}")
+    except Exception as e:
+        server.logger.error(f"通过RCON踢出玩家 {player} 失败: {e}")
 
 async def toggle_bot_filter(source: CommandSource):
     if not source.has_permission(3):
@@ -672,24 +766,31 @@ async def on_player_joined(server: PluginServerInterface, player: str, info: Inf
             server.logger.info(f"检测到假人 {player} (匹配前缀: {bot_filter['prefixes']}), UUID={uuid}, IP={ip}")
             return
 
-        player_info = await wsc.report_player(player)
+        # 等待 api.player 完成该玩家的 UUID 解析 (正版模式下可能需要查询 Mojang), 再上报与检查绑定
+        from easybot_mcdr.api.player import wait_player_joined
+        join_timeout = float(config.get("mojang", {}).get("join_wait_timeout", 15))
+        if await wait_player_joined(player, join_timeout) is None:
+            server.logger.warning(f"等待玩家 {player} 的 UUID 解析超时")
+        player_info = await runtime.wrap(wsc.report_player(player))
         if player_info is None:
             server.logger.warning(f"玩家 {player} 的信息未准备好，可能是数据同步延迟")
             return
         server.logger.info(f"玩家 {player} 已加入并缓存: UUID={player_info['player_uuid']}, IP={player_info['ip']}")
-        res = await wsc.login(player)
+        res = await runtime.wrap(wsc.login(player))
         if res["kick"]:
             server.logger.info(f"检测到玩家 {player} 需要被踢出，延迟5秒执行...")
-            await asyncio.sleep(5) 
-            push_kick(player, res["kick_message"])
+            scheduler.schedule(5, push_kick, player, res["kick_message"], tag=player)
             return
-        await wsc.push_enter(player)
+        await runtime.wrap(wsc.push_enter(player))
     except Exception as e:
         server.logger.error(f"处理玩家 {player} 加入时出错: {e}")
         server.logger.debug("\n{traceback.format_exc()}")
 
 # 统一的玩家退出上报函数
 async def _report_player_exit(server: PluginServerInterface, name: str):
+    # 玩家已离开, 取消其未执行的定时命令
+    scheduler.cancel_tag(name)
+
     # 踢出列表过滤
     if name in kick_map:
         server.logger.debug(f"玩家 {name} 是被踢出的，退出事件上报已跳过")
@@ -710,22 +811,26 @@ async def _report_player_exit(server: PluginServerInterface, name: str):
     exit_reported_at[name] = now
 
     try:
-        await wsc.push_exit(name)
+        await runtime.wrap(wsc.push_exit(name))
         server.logger.debug(f"已上报玩家退出: {name}")
     except Exception as e:
         server.logger.error(f"上报玩家 {name} 退出失败: {e}")
         server.logger.debug("\n{traceback.format_exc()}")
 
 async def on_info(server, info: Info):
+    stdout_lines.inc()
     raw = info.raw_content
+    if not rcon_ready.is_set() and info.is_from_server and "RCON running on " in raw:
+        rcon_ready.set()
     
+    event = classify(raw)
+    if event is None:
+        return
+    name = event.player
+
     # 正版UUID处理
-    if match := re.search(
-        r"UUID of player ([\w.]+) is ([0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12})",
-        raw,
-    ):
-        name = match.group(1)
-        uuid = match.group(2).lower()
+    if event.kind == UUID:
+        uuid = event.uuid
         
         if not is_bot_player(name):
             from easybot_mcdr.api.player import update_player_uuid
@@ -734,11 +839,7 @@ async def on_info(server, info: Info):
         return
     
     # 玩家加入消息处理（用于离线模式UUID同步验证，兼容含前缀名称）
-    m_join_pref = re.search(r"^\[[^\]]+\](?P<name>[\w.]+) joined the game$", raw)
-    m_join_plain = re.search(r"^(?P<name>[\w.]+) joined the game$", raw)
-    if m_join_pref or m_join_plain:
-        name = (m_join_pref or m_join_plain).group('name')
-        
+    if event.kind == JOIN:
         if is_bot_player(name):
             server.logger.info(f"检测到假人 {name}，跳过UUID处理")
             return
@@ -769,7 +870,7 @@ async def on_info(server, info: Info):
         # 白名单处理
         if is_white_list_enable():
             try:
-                bind_info = await wsc.get_social_account(name)
+                bind_info = await runtime.wrap(wsc.get_social_account(name))
                 if bind_info and bind_info.get("uuid"):
                     server.execute(f"whitelist add {name}")
             except Exception as e:
@@ -777,22 +878,12 @@ async def on_info(server, info: Info):
                 server.logger.debug("\n{traceback.format_exc()}")
         return
 
-    # 玩家退出消息处理（兼容含前缀名称与额外前后缀文本）
-    m_quit = re.search(r"(?:\[[^\]]+\])?(?P<name>[\w.]+) left the game", raw)
-    if m_quit:
-        name = m_quit.group('name')
+    # 玩家退出消息处理（兼容含前缀名称与额外前后缀文本, 以及 "lost connection:" 形式）
+    if event.kind == LEAVE:
         server.logger.debug(f"检测到退出行，解析玩家: {name} | 原始: {raw}")
         await _report_player_exit(server, name)
         return
 
-    # 兼容 "lost connection:" 形式（有些服务端不打印 left the game）
-    m_lost = re.search(r"(?:\[[^\]]+\])?(?P<name>[\w.]+) lost connection:\s*", raw)
-    if m_lost:
-        name = m_lost.group('name')
-        server.logger.debug(f"检测到断开行，解析玩家: {name} | 原始: {raw}")
-        await _report_player_exit(server, name)
-        return
-
 # 新增：定期UUID同步检查函数
 @new_thread("UUID_Sync_Check")
 def periodic_uuid_check():
@@ -843,6 +934,7 @@ async def on_player_left(server: PluginServerInterface, player: str):
     config = get_config()
     bot_filter = config.get("bot_filter", {"enabled": True, "prefixes": ["Bot_", "BOT_", "bot_"]})
     server.logger.debug(f"处理玩家退出事件: {player}, 假人过滤状态: enabled={bot_filter['enabled']}")
+    scheduler.cancel_tag(player)
     
     if player in kick_map:
         server.logger.debug(f"玩家 {player} 是被踢出的，跳过处理")
@@ -862,7 +954,7 @@ async def on_player_left(server: PluginServerInterface, player: str):
     exit_reported_at[player] = now
 
     server.logger.debug(f"正常玩家 {player} 退出事件处理")
-    await wsc.push_exit(player)
+    await runtime.wrap(wsc.push_exit(player))
 
 async def on_user_info(server: PluginServerInterface, info: Info):
     if info.player is None:
@@ -872,7 +964,7 @@ async def on_user_info(server: PluginServerInterface, info: Info):
         and get_config()["message_sync"]["ignore_mcdr_command"]
     ):
         return
-    await wsc.push_message(info.player, info.content, False)
+    await runtime.wrap(wsc.push_message(info.player, info.content, False))
 
 async def cross_server_say(source: CommandSource, context: CommandContext):
     if not source.is_player:
@@ -880,5 +972,5 @@ async def cross_server_say(source: CommandSource, context: CommandContext):
         return
     player = source.player
     message = context["message"]
-    await wsc.push_cross_server_message(player, message)
+    await runtime.wrap(wsc.push_cross_server_message(player, message))
     source.reply("§a你的消息已发送到其他服务器.")
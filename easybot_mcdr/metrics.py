@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 默认延迟分桶(秒)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (指标名, 标签, 值)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Counter:
+    """单调递增计数器"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Histogram:
+    """固定分桶的直方图, observe 只做一次二分查找和两次加法"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """根据分桶估算分位数 (返回所在桶的上界)"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+class MetricFamily:
+    """同名指标按标签值区分的一组子指标"""
+
+    def __init__(self, name: str, help_text: str, kind: str, label_name: Optional[str], factory: Callable):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label_name = label_name
+        self._factory = factory
+        self.children: Dict[str, object] = {}
+
+    def labels(self, value: str = ""):
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = self._factory()
+        return child
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表
+    计数器与直方图在热路径上直接更新; 队列深度等状态值由 collector 在读取时采集, 热路径零开销
+    """
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[Sample]]] = {}
+        self.started_at = time.time()
+
+    def counter(self, name: str, help_text: str, label_name: Optional[str] = None) -> MetricFamily:
+        return self._family(name, help_text, "counter", label_name, Counter)
+
+    def histogram(self, name: str, help_text: str, label_name: Optional[str] = None,
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> MetricFamily:
+        return self._family(name, help_text, "histogram", label_name, lambda: Histogram(buckets))
+
+    def register_collector(self, key: str, collector: Callable[[], Iterable[Sample]]):
+        """注册状态采集函数, 相同 key 会覆盖 (用于重载后替换旧对象)"""
+        self._collectors[key] = collector
+
+    def unregister_collector(self, key: str):
+        self._collectors.pop(key, None)
+
+    def get_family(self, name: str) -> Optional[MetricFamily]:
+        return self._families.get(name)
+
+    def collect_gauges(self) -> List[Sample]:
+        samples = []
+        for collector in list(self._collectors.values()):
+            try:
+                samples.extend(collector())
+            except Exception:
+                continue
+        return samples
+
+    def render_prometheus(self) -> str:
+        """输出 Prometheus 文本格式"""
+        lines = []
+        # 运行时线程可能随时通过 labels() 新增子指标, 先取快照再遍历
+        for family in list(self._families.values()):
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for label_value, child in list(family.children.items()):
+                labels = {family.label_name: label_value} if family.label_name else {}
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_format_labels(labels)} {child.value}")
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(child.buckets, child.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{family.name}_bucket{_format_labels(dict(labels, le=repr(bound)))} {cumulative}")
+                lines.append(f"{family.name}_bucket{_format_labels(dict(labels, le='+Inf'))} {child.count}")
+                lines.append(f"{family.name}_sum{_format_labels(labels)} {child.sum}")
+                lines.append(f"{family.name}_count{_format_labels(labels)} {child.count}")
+        typed = set()
+        for name, labels, value in self.collect_gauges():
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _family(self, name, help_text, kind, label_name, factory) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(name, help_text, kind, label_name, factory)
+        return family
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class TextfileExporter:
+    """定期将指标以 Prometheus textfile 格式写入文件 (供 node_exporter textfile collector 读取)"""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float, logger=None):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.logger = logger
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="EasyBot-Metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def write(self):
+        # 先写临时文件再替换, 避免采集端读到写了一半的文件
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.render_prometheus())
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        failing = False
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                # 连续失败只记录一次, 线程继续运行, 恢复后下次失败再记录
+                if not failing and self.logger is not None:
+                    self.logger.warning(f"写入指标文件失败: {type(e).__name__}: {e}")
+                failing = True
+                continue
+            failing = False
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,185 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Optional
+
+from mcdreforged.api.all import ServerInterface
+from mcdreforged.api.rcon import RconConnection
+
+from easybot_mcdr.config import get_config
+from easybot_mcdr.metrics import registry
+from easybot_mcdr.runtime import runtime
+
+_queue_seconds = registry.histogram("easybot_rcon_queue_seconds", "RCON 命令排队耗时(秒)", "backend")
+_exec_seconds = registry.histogram("easybot_rcon_exec_seconds", "RCON 命令执行耗时(秒)", "backend")
+_failures = registry.counter("easybot_rcon_failures_total", "RCON 命令失败次数", "reason")
+
+
+class RconPool:
+    """
+    RCON 命令执行池
+    少量工作线程各自持有一个 RCON 连接 (使用插件配置 rcon 中的地址/端口/密码, 未配置时使用 MCDR 配置中的 rcon),
+    两者都没有密码时回退到 MCDR 自身的 rcon_query; 调用方通过 await query() 获取结果, 不会阻塞事件循环
+    """
+
+    def __init__(self):
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._generation = 0
+
+    # --- 配置 ---
+    @staticmethod
+    def _get_pool_config() -> dict:
+        return get_config().get("rcon_pool", {})
+
+    @staticmethod
+    def _get_credentials() -> Optional[tuple]:
+        rcon_config = get_config().get("rcon", {})
+        password = rcon_config.get("password", "")
+        if rcon_config.get("enabled", True) and password:
+            return rcon_config.get("host", "127.0.0.1"), int(rcon_config.get("port", 25575)), password
+        # 插件配置只在 RCON 自动配置时写入; MCDR 已启用 RCON 时直接使用它的地址和密码另建连接
+        try:
+            mcdr_rcon = ServerInterface.get_instance().get_mcdr_config().get("rcon") or {}
+        except Exception:
+            return None
+        password = mcdr_rcon.get("password", "")
+        if not mcdr_rcon.get("enable", False) or not password:
+            return None
+        return mcdr_rcon.get("address", "127.0.0.1"), int(mcdr_rcon.get("port", 25575)), password
+
+    def is_available(self) -> bool:
+        """插件配置了 RCON 凭据, 或 MCDR 自身的 RCON 正在运行"""
+        return self._get_credentials() is not None or ServerInterface.get_instance().is_rcon_running()
+
+    # --- 生命周期 ---
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                size = max(1, int(self._get_pool_config().get("size", 2)))
+                self._executor = concurrent.futures.ThreadPoolExecutor(size, thread_name_prefix="EasyBot-RCON")
+            return self._executor
+
+    def reset(self):
+        """配置变化后调用: 关闭现有连接, 下次查询时按新配置重建"""
+        with self._lock:
+            self._generation += 1
+            executor, self._executor = self._executor, None
+            connections, self._connections = self._connections, []
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for connection in connections:
+            try:
+                connection.disconnect()
+            except Exception:
+                pass
+
+    close = reset
+
+    # --- 查询 ---
+    async def query(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        在工作线程中执行 RCON 命令
+        :param timeout: 从提交到返回的超时时间(秒), 默认取 rcon_pool.timeout
+        :raises RuntimeError: RCON 不可用或排队命令过多
+        :raises asyncio.TimeoutError: 超时
+        """
+        pool_config = self._get_pool_config()
+        if timeout is None:
+            timeout = pool_config.get("timeout", 10)
+        with self._lock:
+            if self._pending >= max(1, int(pool_config.get("max_pending", 64))):
+                _failures.labels("busy").inc()
+                raise RuntimeError("RCON排队命令过多")
+            self._pending += 1
+        try:
+            future = self._get_executor().submit(self._execute, command, time.perf_counter())
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                # 仍在排队的命令直接取消, 已在执行的只能等待连接超时
+                future.cancel()
+                _failures.labels("timeout").inc()
+                raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def query_sync(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        供同步代码 (如 @new_thread 线程) 使用的阻塞版本, 不能在插件运行时线程中调用
+        经运行时线程执行 query(), 与异步调用共用排队上限、超时取消与失败统计
+        """
+        return runtime.run(self.query(command, timeout))
+
+    def _execute(self, command: str, submitted_at: float) -> Optional[str]:
+        credentials = self._get_credentials()
+        backend = "pool" if credentials is not None else "mcdr"
+        _queue_seconds.labels(backend).observe(time.perf_counter() - submitted_at)
+        start = time.perf_counter()
+        try:
+            if credentials is None:
+                server = ServerInterface.get_instance()
+                if not server.is_rcon_running():
+                    raise RuntimeError("RCON未启用")
+                return server.rcon_query(command)
+            return self._send_command(credentials, command)
+        except Exception:
+            _failures.labels("error").inc()
+            raise
+        finally:
+            _exec_seconds.labels(backend).observe(time.perf_counter() - start)
+
+    def _send_command(self, credentials: tuple, command: str) -> Optional[str]:
+        """使用当前工作线程自己的连接执行命令, 连接异常时重连一次"""
+        for attempt in range(2):
+            connection = self._get_connection(credentials)
+            try:
+                result = connection.send_command(command)
+                if result is not None:
+                    return result
+            except Exception:
+                if attempt:
+                    raise
+            self._drop_connection(connection)
+        raise RuntimeError("RCON命令执行失败")
+
+    def _get_connection(self, credentials: tuple) -> RconConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and (getattr(self._local, "generation", None) != self._generation
+                                       or getattr(self._local, "credentials", None) != credentials):
+            self._drop_connection(connection)
+            connection = None
+        if connection is None:
+            host, port, password = credentials
+            connection = RconConnection(host, port, password, logger=ServerInterface.get_instance().logger)
+            if not connection.connect():
+                raise RuntimeError("RCON认证失败")
+            self._local.connection = connection
+            self._local.generation = self._generation
+            self._local.credentials = credentials
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop_connection(self, connection: RconConnection):
+        connection.disconnect()
+        self._local.connection = None
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+
+    def collect_metrics(self):
+        size = self._executor._max_workers if self._executor is not None else 0
+        return [
+            ("easybot_rcon_pending", {}, self._pending),
+            ("easybot_rcon_pool_size", {}, size),
+        ]
+
+
+rcon_pool = RconPool()
+registry.register_collector("rcon", rcon_pool.collect_metrics)
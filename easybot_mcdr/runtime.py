@@ -0,0 +1,93 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class PluginRuntime:
+    """
+    插件专用的 asyncio 运行时线程
+    所有插件 I/O (WebSocket 连接、exec_op 处理等) 都在这一个长期存在的事件循环上执行,
+    MCDR 的同步回调、@new_thread 线程以及 MCDR 自身的异步事件循环都通过线程安全的 submit/run/wrap 提交任务
+    """
+
+    def __init__(self, name: str = "EasyBot-Runtime"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            raise RuntimeError("插件运行时尚未启动")
+        return self._loop
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_runtime_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def start(self):
+        if self.is_running():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout: float = 5):
+        """取消剩余任务并停止事件循环"""
+        if not self.is_running():
+            return
+        try:
+            self.run(self._cancel_all_tasks(), timeout)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """从任意线程提交协程, 返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """从其他线程提交协程并阻塞等待结果 (不能在运行时线程内调用)"""
+        if self.in_runtime_thread():
+            coro.close()
+            raise RuntimeError("不能在插件运行时线程内阻塞等待")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback, *args):
+        """从任意线程在运行时线程上执行同步回调"""
+        return self.loop.call_soon_threadsafe(callback, *args)
+
+    async def wrap(self, coro: Coroutine) -> Any:
+        """在其他事件循环 (如 MCDR 的异步监听器) 中等待运行时线程上执行的协程"""
+        if self.in_runtime_thread():
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self._loop = None
+
+    @staticmethod
+    async def _cancel_all_tasks():
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+runtime = PluginRuntime()
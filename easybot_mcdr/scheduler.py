@@ -0,0 +1,173 @@
+import asyncio
+import math
+from typing import Callable, Dict, List, Optional, Set
+
+from mcdreforged.api.all import ServerInterface
+
+from easybot_mcdr.runtime import runtime
+
+
+class Timer:
+    __slots__ = ("callback", "args", "interval", "remaining", "tag", "rounds", "cancelled")
+
+    def __init__(self, callback: Callable, args: tuple, interval: float, count: int, tag: Optional[str]):
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.remaining = count  # 剩余执行次数
+        self.tag = tag
+        self.rounds = 0  # 还需转过的整圈数
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    运行在插件运行时线程上的哈希时间轮
+    用于延迟/重复执行服务器命令 (如@提醒音效、延迟踢出), 不阻塞任何处理器;
+    定时器可带 tag (通常为玩家名), 玩家离开时按 tag 批量取消. 没有定时器时不产生任何唤醒
+    """
+
+    def __init__(self, tick: float = 0.05, slots: int = 512):
+        self.tick = tick
+        self._slots: List[List[Timer]] = [[] for _ in range(slots)]
+        self._tags: Dict[str, Set[Timer]] = {}
+        self._cursor = 0
+        self._count = 0
+        self._started_at = 0.0
+        self._ticks = 0  # 已处理的刻度数
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def schedule(self, delay: float, callback: Callable, *args, interval: float = 0, count: int = 1,
+                 tag: Optional[str] = None) -> Timer:
+        """
+        在 delay 秒后执行 callback(*args), 之后每隔 interval 秒再执行, 共执行 count 次
+        callback 可以返回协程, 会作为任务在运行时事件循环上执行; 可从任意线程调用
+        """
+        timer = Timer(callback, args, max(interval, self.tick), max(1, count), tag)
+        self._call(self._insert, timer, delay)
+        return timer
+
+    def schedule_command(self, delay: float, command: str, interval: float = 0, count: int = 1,
+                         tag: Optional[str] = None) -> Timer:
+        """延迟/重复执行服务器命令"""
+        return self.schedule(delay, _execute_command, command, interval=interval, count=count, tag=tag)
+
+    def cancel_tag(self, tag: str):
+        """取消某个 tag 下的所有定时器, 可从任意线程调用"""
+        self._call(self._cancel_tag, tag)
+
+    def clear(self):
+        """取消全部定时器 (插件卸载时调用)"""
+        self._call(self._reset)
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def _call(callback: Callable, *args):
+        if runtime.in_runtime_thread():
+            callback(*args)
+        elif runtime.is_running():
+            runtime.call_soon(callback, *args)
+
+    # --- 以下方法只在运行时线程上执行 ---
+    def _insert(self, timer: Timer, delay: float):
+        if timer.cancelled:
+            return
+        loop = runtime.loop
+        if self._handle is None:
+            # 时间轮空闲后重新对齐起点
+            self._started_at = loop.time()
+            self._ticks = 0
+        self._place(timer, math.ceil((loop.time() + delay - self._started_at) / self.tick) - self._ticks)
+        if self._handle is None:
+            self._handle = loop.call_at(self._started_at + self.tick, self._advance)
+
+    def _place(self, timer: Timer, target: int):
+        """将定时器放到 target 个刻度之后的槽位"""
+        target = max(1, target)
+        timer.rounds = (target - 1) // len(self._slots)
+        self._slots[(self._cursor + target) % len(self._slots)].append(timer)
+        self._count += 1
+        if timer.tag is not None:
+            self._tags.setdefault(timer.tag, set()).add(timer)
+
+    def _advance(self):
+        loop = runtime.loop
+        due_ticks = int((loop.time() - self._started_at) / self.tick)
+        while self._ticks < due_ticks:
+            self._ticks += 1
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            self._fire_slot(self._cursor)
+        if self._count:
+            self._handle = loop.call_at(self._started_at + (self._ticks + 1) * self.tick, self._advance)
+        else:
+            self._handle = None
+
+    def _fire_slot(self, index: int):
+        slot = self._slots[index]
+        if not slot:
+            return
+        # 先摘下整个槽位, 回调中重新插入的定时器会进入新的列表
+        self._slots[index] = []
+        for timer in slot:
+            if timer.cancelled:
+                self._discard(timer)
+                continue
+            if timer.rounds > 0:
+                timer.rounds -= 1
+                self._slots[index].append(timer)
+                continue
+            self._discard(timer)
+            self._run(timer)
+            timer.remaining -= 1
+            if timer.remaining > 0 and not timer.cancelled:
+                # 按刻度而不是当前时间计算下次触发, 回调的执行耗时不会累积成漂移
+                self._place(timer, round(timer.interval / self.tick))
+
+    def _discard(self, timer: Timer):
+        self._count -= 1
+        if timer.tag is not None:
+            timers = self._tags.get(timer.tag)
+            if timers is not None:
+                timers.discard(timer)
+                if not timers:
+                    del self._tags[timer.tag]
+
+    @staticmethod
+    def _run(timer: Timer):
+        try:
+            result = timer.callback(*timer.args)
+            if asyncio.iscoroutine(result):
+                runtime.loop.create_task(result)
+        except Exception as e:
+            try:
+                ServerInterface.get_instance().logger.error(f"定时任务执行失败: {e}")
+            except Exception:
+                pass
+
+    def _cancel_tag(self, tag: str):
+        for timer in self._tags.pop(tag, ()):
+            timer.cancel()
+
+    def _reset(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._slots = [[] for _ in self._slots]
+        for timers in self._tags.values():
+            for timer in timers:
+                timer.cancel()
+        self._tags.clear()
+        self._cursor = 0
+        self._count = 0
+
+
+def _execute_command(command: str):
+    ServerInterface.get_instance().execute(command)
+
+
+scheduler = TimerWheel()
@@ -0,0 +1,117 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from mcdreforged.api.all import ServerInterface
+
+
+def get_server_properties_path(server: Optional[ServerInterface] = None) -> str:
+    """
+    获取服务器properties文件路径
+    :param server: 服务器接口, 缺省使用当前实例
+    :return: properties文件路径
+    """
+    server = server or ServerInterface.get_instance()
+    # 尝试获取服务器工作目录
+    server_dir = server.get_server_directory() if server is not None else None
+    if server_dir:
+        return os.path.join(server_dir, 'server.properties')
+    # 如果无法获取，尝试默认路径
+    return os.path.join(os.getcwd(), 'server.properties')
+
+
+def parse_server_properties(content: str) -> Dict[str, str]:
+    config = {}
+    for line in content.splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            parts = line.split('=', 1)
+            if len(parts) == 2:
+                key, value = parts
+                config[key.strip()] = value.strip()
+    return config
+
+
+def _as_bool(value: Optional[str], default: bool) -> bool:
+    return default if value is None else value.lower() == "true"
+
+
+def _as_int(value: Optional[str], default: int) -> int:
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+class ServerProperties:
+    """server.properties 的只读快照, 常用项已解析为对应类型"""
+    __slots__ = ("path", "exists", "raw", "online_mode", "white_list", "level_name",
+                 "enable_rcon", "rcon_port", "rcon_password")
+
+    def __init__(self, path: str, raw: Dict[str, str], exists: bool = True):
+        self.path = path
+        self.exists = exists
+        self.raw = raw
+        # 未配置 online-mode 时按离线模式处理
+        self.online_mode = _as_bool(raw.get("online-mode"), False)
+        self.white_list = _as_bool(raw.get("white-list"), False)
+        self.level_name = raw.get("level-name") or "world"
+        self.enable_rcon = _as_bool(raw.get("enable-rcon"), False)
+        self.rcon_port = _as_int(raw.get("rcon.port"), 25575)
+        self.rcon_password = raw.get("rcon.password", "")
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.raw.get(key, default)
+
+
+class ServerPropertiesCache:
+    """
+    server.properties 读取服务
+    解析一次后缓存快照, 每次读取只 stat 文件, 修改时间或大小变化时才重新解析;
+    插件自身写入文件后调用 invalidate()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._path: Optional[str] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._snapshot: Optional[ServerProperties] = None
+        self.reloads = 0
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            self._path = get_server_properties_path()
+        return self._path
+
+    def get(self) -> ServerProperties:
+        path = self.path
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        snapshot = self._snapshot
+        if snapshot is not None and signature == self._signature:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and signature == self._signature:
+                return self._snapshot
+            if signature is None:
+                snapshot = ServerProperties(path, {}, exists=False)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshot = ServerProperties(path, parse_server_properties(f.read()))
+            self._snapshot, self._signature = snapshot, signature
+            self.reloads += 1
+            return snapshot
+
+    def invalidate(self):
+        """丢弃缓存的快照与路径, 下次读取时重新解析"""
+        with self._lock:
+            self._path = None
+            self._signature = None
+            self._snapshot = None
+
+
+server_properties = ServerPropertiesCache()
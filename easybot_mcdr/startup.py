@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from mcdreforged.api.all import ServerInterface
+
+from easybot_mcdr.metrics import registry
+
+_stage_seconds = registry.histogram("easybot_startup_stage_seconds", "服务器启动流程各阶段耗时(秒)", "stage")
+_ready_seconds = registry.histogram("easybot_startup_ready_seconds", "服务器启动流程总耗时(秒)").labels()
+
+# 阶段状态
+OK = "ok"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class StageResult:
+    __slots__ = ("name", "status", "started", "elapsed", "error")
+
+    def __init__(self, name: str, status: str, started: float = 0.0, elapsed: float = 0.0, error: str = ""):
+        self.name = name
+        self.status = status
+        self.started = started  # 相对流程开始的时间(秒)
+        self.elapsed = elapsed
+        self.error = error
+
+
+class StartupPipeline:
+    """
+    按依赖关系执行的启动流程
+    没有依赖关系的阶段并发执行, 阶段在其依赖全部完成后立即开始; 依赖失败 (抛出异常或返回 False) 的阶段被跳过.
+    wait_for 中的阶段只约束先后顺序, 它们失败或被跳过时不影响本阶段执行.
+    阶段函数可以是协程函数, 也可以是同步函数 (在线程池中执行, 不阻塞事件循环)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._stages: Dict[str, tuple] = {}  # 阶段名 -> (函数, 依赖, 仅排序的依赖)
+        self.results: List[StageResult] = []
+        self.elapsed = 0.0
+
+    def stage(self, name: str, func: Callable, after: Iterable[str] = (), wait_for: Iterable[str] = ()):
+        after, wait_for = tuple(after), tuple(wait_for)
+        for dependency in after + wait_for:
+            if dependency not in self._stages:
+                raise ValueError(f"阶段 {name} 依赖的阶段 {dependency} 不存在")
+        self._stages[name] = (func, after, wait_for)
+        return self
+
+    async def run(self) -> List[StageResult]:
+        loop = asyncio.get_running_loop()
+        begin = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str, func: Callable, after: tuple, wait_for: tuple) -> StageResult:
+            for dependency in wait_for:
+                await tasks[dependency]
+            dependencies = [await tasks[dependency] for dependency in after]
+            blocked = [result.name for result in dependencies if result.status != OK]
+            if blocked:
+                return StageResult(name, SKIPPED, error=f"依赖未完成: {', '.join(blocked)}")
+            started = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(func):
+                    value = await func()
+                else:
+                    value = await loop.run_in_executor(None, func)
+                status, error = (FAILED, "返回 False") if value is False else (OK, "")
+            except Exception as e:
+                status, error = FAILED, f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - started
+            _stage_seconds.labels(name).observe(elapsed)
+            return StageResult(name, status, started - begin, elapsed, error)
+
+        # 注册顺序保证依赖的任务先创建
+        for name, (func, after, wait_for) in self._stages.items():
+            tasks[name] = asyncio.create_task(run_stage(name, func, after, wait_for))
+        self.results = list(await asyncio.gather(*tasks.values()))
+        self.elapsed = time.perf_counter() - begin
+        _ready_seconds.observe(self.elapsed)
+        return self.results
+
+    def log_summary(self, logger=None):
+        logger = logger or ServerInterface.get_instance().logger
+        failed = [result for result in self.results if result.status != OK]
+        logger.info(f"{self.name}完成, 总耗时 {self.elapsed:.2f}s" + (f", {len(failed)} 个阶段未完成" if failed else ""))
+        for result in self.results:
+            if result.status == SKIPPED:
+                logger.info(f"  {result.name:<14} 跳过 ({result.error})")
+                continue
+            line = f"  {result.name:<14} {result.elapsed:6.2f}s  (开始于 +{result.started:.2f}s)"
+            if result.status == FAILED:
+                line += f"  失败: {result.error}"
+            logger.info(line)
+
+    def get_summary(self) -> Optional[dict]:
+        if not self.results:
+            return None
+        return {
+            "elapsed": self.elapsed,
+            "stages": {result.name: {"status": result.status, "elapsed": result.elapsed} for result in self.results},
+        }
@@ -0,0 +1,138 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from easybot_mcdr.config import get_config
+
+# 配置中可用的占位符
+PLACEHOLDER_PATTERN = re.compile(r"#(player|name|account|code|time)")
+
+# 配置路径 -> 该处允许使用的占位符
+TEMPLATE_FIELDS: Dict[Tuple[str, ...], frozenset] = {
+    ("message", "start_bind"): frozenset({"code", "time"}),
+    ("message", "bind_success"): frozenset({"player", "name", "account"}),
+    ("events", "bind_success", "comamnds"): frozenset({"player", "name", "account"}),
+    ("events", "un_bind", "comamnds"): frozenset({"player"}),
+    ("events", "message", "on_at", "comamnds"): frozenset({"player"}),
+    ("events", "message", "on_at", "sound", "run"): frozenset({"player"}),
+}
+
+
+class CommandTemplate:
+    """
+    预编译的命令模板
+    #player/#name 等占位符在编译时拆分为字面量片段, 缺省值 ("#name" 原样输出) 也在编译时生成;
+    只含一种占位符时渲染是一次 str.join, 否则复制片段列表填入各占位符后 join.
+    fan_out 按 #player 切分的片段在编译时 (或按其余占位符的取值) 缓存, 每个玩家只需一次 join.
+    据 tools/bench_template.py, 单次渲染约为 str.replace 链的 1.5x, 多玩家展开约 1.15x
+    (展开时每个玩家仍需一次 join, 与 str.replace 同为一次 C 调用, 提升有限)
+    """
+    __slots__ = ("source", "fields", "_pieces", "_slots", "_single", "_fan_out_cache")
+
+    def __init__(self, source: str):
+        self.source = source
+        # 字面量与占位符交替: [literal, field, literal, field, ..., literal]
+        pieces = PLACEHOLDER_PATTERN.split(source)
+        self.fields = frozenset(pieces[1::2])
+        self._pieces = pieces
+        # (片段下标, 占位符, 缺省值)
+        self._slots = tuple((index, pieces[index], "#" + pieces[index]) for index in range(1, len(pieces), 2))
+        # 只含一种占位符时 (最常见的只有 #player), 渲染就是一次 str.join
+        self._single = (pieces[1], "#" + pieces[1], pieces[::2]) if len(self.fields) == 1 else None
+        # (其余占位符的取值, 按 #player 切分的片段)
+        self._fan_out_cache: Optional[tuple] = None
+
+    def render(self, values: Dict[str, str]) -> str:
+        single = self._single
+        if single is not None:
+            field, default, literals = single
+            return values.get(field, default).join(literals)
+        if not self._slots:
+            return self.source
+        out = self._pieces[:]
+        for index, field, default in self._slots:
+            out[index] = values.get(field, default)
+        return "".join(out)
+
+    def fan_out(self, players: Iterable[str], values: Optional[Dict[str, str]] = None) -> List[str]:
+        """对每个玩家渲染一次 (#player 替换为玩家名), 返回与 players 顺序一致的命令"""
+        if "player" not in self.fields:
+            command = self.render(values or {})
+            return [command for _ in players]
+        single = self._single
+        segments = single[2] if single is not None else self._player_segments(values or {})
+        return [player.join(segments) for player in players]
+
+    def _player_segments(self, values: Dict[str, str]) -> List[str]:
+        """代入 #player 以外的占位符后按 #player 切分; 其余占位符取值不变时复用上次的结果"""
+        key = tuple(values.get(field, default) for _, field, default in self._slots if field != "player")
+        cached = self._fan_out_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        pieces = self._pieces
+        segments = [pieces[0]]
+        for index, field, default in self._slots:
+            if field == "player":
+                segments.append(pieces[index + 1])
+            else:
+                segments[-1] += values.get(field, default) + pieces[index + 1]
+        self._fan_out_cache = (key, segments)
+        return segments
+
+
+class TemplateSet:
+    """一份配置中所有命令模板的编译结果"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.warnings: List[str] = []
+        self._templates: Dict[Tuple[str, ...], List[CommandTemplate]] = {}
+        for path, allowed in TEMPLATE_FIELDS.items():
+            self._templates[path] = self._compile(path, allowed)
+
+    def _compile(self, path: Tuple[str, ...], allowed: frozenset) -> List[CommandTemplate]:
+        node = self.config
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return []
+            node = node[key]
+        sources = node if isinstance(node, list) else [node]
+        templates = []
+        for source in sources:
+            if not isinstance(source, str):
+                self.warnings.append(f"{'.'.join(path)} 中存在非字符串命令, 已跳过: {source!r}")
+                continue
+            template = CommandTemplate(source)
+            unsupported = template.fields - allowed
+            if unsupported:
+                placeholders = ", ".join("#" + field for field in sorted(unsupported))
+                self.warnings.append(f"{'.'.join(path)} 中的占位符 {placeholders} 在此处不可用, 将原样输出")
+            templates.append(template)
+        return templates
+
+    def get(self, *path: str) -> List[CommandTemplate]:
+        return self._templates.get(path, [])
+
+    def first(self, *path: str) -> Optional[CommandTemplate]:
+        templates = self._templates.get(path)
+        return templates[0] if templates else None
+
+
+_compiled: Optional[TemplateSet] = None
+
+
+def compile_templates(logger=None) -> TemplateSet:
+    """编译当前配置中的模板 (加载配置时调用), 并输出占位符校验警告"""
+    global _compiled
+    _compiled = TemplateSet(get_config())
+    if logger is not None:
+        for warning in _compiled.warnings:
+            logger.warning(f"命令模板: {warning}")
+    return _compiled
+
+
+def get_templates() -> TemplateSet:
+    """获取当前配置对应的模板; 配置对象被替换 (重载) 后自动重新编译"""
+    compiled = _compiled
+    if compiled is None or compiled.config is not get_config():
+        compiled = compile_templates()
+    return compiled
@@ -0,0 +1,130 @@
+import json
+import time
+from collections import defaultdict
+
+# 可选的高性能 JSON 实现, 未安装时回退到标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class CodecStats:
+    """单个 exec_op 的编解码统计"""
+    __slots__ = ("encoded", "decoded", "bytes_out", "bytes_in", "encode_ns", "decode_ns")
+
+    def __init__(self):
+        self.encoded = 0
+        self.decoded = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.encode_ns = 0
+        self.decode_ns = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "encoded": self.encoded,
+            "decoded": self.decoded,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "encode_ms": self.encode_ns / 1e6,
+            "decode_ms": self.decode_ns / 1e6,
+        }
+
+
+class Fragment:
+    """
+    由 JsonCodec.encode_fragment 预先编码的 JSON 值
+    作为数据包的顶层字段时由同一个编解码器原样拼接进消息, 不再重复编码 (用于缓存的大响应)
+    """
+    __slots__ = ("text", "codec")
+
+    def __init__(self, text: str, codec: "JsonCodec"):
+        self.text = text
+        self.codec = codec
+
+
+class JsonCodec:
+    """
+    WebSocket 线路编解码器
+    backend 为 auto 时依次尝试 orjson / ujson, 都未安装则使用标准库 json
+    """
+
+    def __init__(self, backend: str = "auto"):
+        if backend in ("auto", "orjson") and orjson is not None:
+            self.name = "orjson"
+            self._dumps = lambda obj: orjson.dumps(obj).decode("utf-8")
+            self._loads = orjson.loads
+        elif backend in ("auto", "ujson") and ujson is not None:
+            self.name = "ujson"
+            self._dumps = ujson.dumps
+            self._loads = ujson.loads
+        else:
+            self.name = "json"
+            self._dumps = json.dumps
+            self._loads = json.loads
+        self.stats = defaultdict(CodecStats)
+
+    def encode(self, packet: dict) -> str:
+        start = time.perf_counter_ns()
+        message = self._encode_packet(packet)
+        elapsed = time.perf_counter_ns() - start
+        stats = self.stats[self._stats_key(packet)]
+        stats.encoded += 1
+        stats.encode_ns += elapsed
+        stats.bytes_out += _wire_size(message)
+        return message
+
+    def encode_fragment(self, value) -> Fragment:
+        """预先编码一个值, 之后可作为数据包顶层字段的值多次发送"""
+        return Fragment(self._dumps(value), self)
+
+    def _encode_packet(self, packet) -> str:
+        if not isinstance(packet, dict) or not any(isinstance(value, Fragment) for value in packet.values()):
+            return self._dumps(packet)
+        plain = {}
+        fragments = []
+        for key, value in packet.items():
+            if isinstance(value, Fragment):
+                if value.codec is not self:
+                    raise ValueError(f"字段 {key} 的预编码片段不是由当前编解码器生成的")
+                fragments.append(f"{self._dumps(str(key))}:{value.text}")
+            else:
+                plain[key] = value
+        # 字典总是编码为 {...}, 去掉结尾的 } 后追加片段字段
+        head = self._dumps(plain)
+        return head[:-1] + ("," if plain else "") + ",".join(fragments) + "}"
+
+    def decode(self, message) -> dict:
+        start = time.perf_counter_ns()
+        packet = self._loads(message)
+        elapsed = time.perf_counter_ns() - start
+        stats = self.stats[self._stats_key(packet)]
+        stats.decoded += 1
+        stats.decode_ns += elapsed
+        stats.bytes_in += _wire_size(message)
+        return packet
+
+    def count_raw(self, message: str):
+        """统计调用方已自行序列化的消息"""
+        self.stats["raw"].bytes_out += _wire_size(message)
+
+    def get_stats(self) -> dict:
+        return {key: stats.to_dict() for key, stats in self.stats.items()}
+
+    @staticmethod
+    def _stats_key(packet) -> str:
+        if not isinstance(packet, dict):
+            return "unknown"
+        return packet.get("exec_op") or f"op{packet.get('op')}"
+
+
+def _wire_size(message) -> int:
+    """消息在线路上的字节数 (压缩前)"""
+    if isinstance(message, (bytes, bytearray)) or message.isascii():
+        return len(message)
+    return len(message.encode("utf-8"))
@@ -1,6 +1,3 @@
-import json
-
-
 class ExecContext:
     def __init__(self, callback_id: str, exec_op: str, wsc):
         self.callback_id = callback_id
@@ -14,4 +11,4 @@ class ExecContext:
             "exec_op": self.exec_op
         }
         packet.update(data)
-        return self.ws.send(json.dumps(packet))
\ No newline at end of file
+        return self.ws.send(packet)
@@ -0,0 +1,60 @@
+import time
+from collections import deque
+
+
+class PacketCapture:
+    """
+    调试用数据包环形缓冲区
+    关闭时调用方只需检查 enabled, 不做任何格式化; 开启后按采样率与 exec_op 过滤记录原始消息,
+    通过命令导出到文件, 不再逐条刷入控制台
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_every = 1  # 每 N 个数据包记录一个
+        self.exec_ops = frozenset()  # 为空时不过滤
+        self._buffer = deque(maxlen=500)
+        self._seen = 0
+
+    def configure(self, config: dict):
+        capture_config = config.get("debug_capture", {})
+        self.enabled = bool(config.get("debug", False))
+        sample_rate = float(capture_config.get("sample_rate", 1.0))
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 1
+        self.exec_ops = frozenset(capture_config.get("exec_ops", []))
+        size = max(1, int(capture_config.get("size", 500)))
+        if size != self._buffer.maxlen:
+            self._buffer = deque(self._buffer, maxlen=size)
+
+    def record(self, direction: str, exec_op: str, message):
+        """记录一个数据包 (调用方应先检查 enabled)"""
+        if self.exec_ops and exec_op not in self.exec_ops:
+            return
+        self._seen += 1
+        if self._seen % self.sample_every:
+            return
+        self._buffer.append((time.time(), direction, exec_op, message))
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.maxlen
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def clear(self):
+        self._buffer.clear()
+
+    def dump(self, path: str) -> int:
+        """将缓冲区内容写入文件, 返回写入的数据包数"""
+        records = list(self._buffer)
+        with open(path, "w", encoding="utf-8") as f:
+            for timestamp, direction, exec_op, message in records:
+                if isinstance(message, (bytes, bytearray)):
+                    message = message.decode("utf-8", "replace")
+                moment = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+                f.write(f"{moment}.{int(timestamp * 1000) % 1000:03d} {'>>' if direction == 'out' else '<<'} [{exec_op}] {message}\n")
+        return len(records)
+
+
+capture = PacketCapture()
@@ -0,0 +1,43 @@
+from collections import deque
+from typing import Optional
+
+
+class ConnectionHealth:
+    """WebSocket 连接健康状况: 往返延迟(RTT)统计与卡死检测计数"""
+
+    def __init__(self, window: int = 256, alpha: float = 0.2):
+        self.alpha = alpha
+        self.samples = deque(maxlen=window)  # 最近的RTT样本(秒)
+        self.ewma: Optional[float] = None
+        self.stalls = 0  # 检测到连接卡死的次数
+        self.heartbeats_sent = 0
+        self.heartbeats_skipped = 0  # 因已有其他流量而跳过的心跳
+
+    def record_rtt(self, rtt: float):
+        self.samples.append(rtt)
+        self.ewma = rtt if self.ewma is None else self.alpha * rtt + (1 - self.alpha) * self.ewma
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def reset(self):
+        """新连接建立时清空RTT样本, 避免沿用上一条连接的数据"""
+        self.samples.clear()
+        self.ewma = None
+
+    def to_dict(self) -> dict:
+        def ms(value):
+            return None if value is None else round(value * 1000, 2)
+        return {
+            "rtt_ewma_ms": ms(self.ewma),
+            "rtt_p50_ms": ms(self.percentile(50)),
+            "rtt_p99_ms": ms(self.percentile(99)),
+            "rtt_samples": len(self.samples),
+            "stalls": self.stalls,
+            "heartbeats_sent": self.heartbeats_sent,
+            "heartbeats_skipped": self.heartbeats_skipped,
+        }
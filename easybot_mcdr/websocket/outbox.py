@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class Outbox:
+    """
+    断线期间的出站数据包落盘队列
+
+    数据包以 JSON 行的形式追加写入分段文件 (outbox-00000001.log ...),
+    写入先进入内存缓冲, 由后台线程按批次/间隔统一 write + fsync,
+    避免断线期间的刷屏消息变成大量细碎的磁盘写入。
+    分段文件只追加不改写, 重放进度 (分段号, 字节偏移) 记录在 outbox.cursor 中并原子替换,
+    分段被完全消费后才删除。
+    """
+
+    SEGMENT_PREFIX = "outbox-"
+    SEGMENT_SUFFIX = ".log"
+    CURSOR_FILE = "outbox.cursor"
+
+    def __init__(self, folder: str, segment_bytes: int = 1024 * 1024, max_bytes: int = 16 * 1024 * 1024,
+                 max_age: float = 3600, fsync_interval: float = 1.0, fsync_batch: int = 64):
+        self.folder = folder
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self._lock = threading.Lock()  # 保护内存缓冲
+        self._io_lock = threading.Lock()  # 保护分段文件
+        self._buffer: List[str] = []
+        self._pending_count = 0  # 已落盘但未重放的记录数
+        self._file = None
+        self._file_seq = 0
+        self._file_size = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        os.makedirs(folder, exist_ok=True)
+        self._cursor = self._load_cursor()  # (分段号, 字节偏移): 下一条待重放记录的位置
+        for seq in self._list_segments():
+            if seq >= self._cursor[0]:
+                offset = self._cursor[1] if seq == self._cursor[0] else 0
+                self._pending_count += self._count_lines(self._segment_path(seq), offset)
+
+    @classmethod
+    def from_config(cls, folder: str, config: dict) -> "Outbox":
+        return cls(
+            folder,
+            segment_bytes=int(config.get("segment_bytes", 1024 * 1024)),
+            max_bytes=int(config.get("max_bytes", 16 * 1024 * 1024)),
+            max_age=float(config.get("max_age_seconds", 3600)),
+            fsync_interval=config.get("fsync_interval_ms", 1000) / 1000,
+            fsync_batch=int(config.get("fsync_batch", 64)),
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._pending_count + len(self._buffer)
+
+    def append(self, packet: dict):
+        """追加一个数据包 (仅写入内存缓冲, 由后台线程落盘)"""
+        line = json.dumps({"t": time.time(), "p": packet}, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer.append(line)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="EasyBot-Outbox", daemon=True)
+                self._flusher.start()
+            if len(self._buffer) >= self.fsync_batch:
+                self._wakeup.set()
+
+    def flush(self):
+        """将内存缓冲写入当前分段文件并 fsync"""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._pending_count += len(lines)
+        if not lines:
+            return
+        with self._io_lock:
+            for line in lines:
+                data = line.encode("utf-8")
+                if self._file is None or self._file_size + len(data) > self.segment_bytes:
+                    self._rotate()
+                self._file.write(data)
+                self._file_size += len(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._enforce_limits()
+
+    def peek_batch(self, limit: int) -> List[Tuple[dict, Tuple[int, int, int]]]:
+        """
+        按写入顺序读取从游标开始的最多 limit 个待重放数据包, 不移动游标
+        每项为 (数据包, 读到该包之后的位置), 发送成功后把位置交给 ack() 提交;
+        超过 max_age 的记录直接跳过, 若整批都是过期记录则在此处直接提交
+        """
+        self.flush()
+        now = time.time()
+        entries = []
+        with self._io_lock:
+            seq, offset = self._cursor
+            consumed = 0
+            position = None
+            for segment in self._list_segments():
+                if len(entries) >= limit:
+                    break
+                if segment < seq:
+                    continue
+                start = offset if segment == seq else 0
+                with open(self._segment_path(segment), "rb") as f:
+                    f.seek(start)
+                    while len(entries) < limit:
+                        line = f.readline()
+                        if not line:
+                            break
+                        consumed += 1
+                        position = (segment, f.tell(), consumed)
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # 崩溃时写了一半的行
+                        if now - record.get("t", now) <= self.max_age:
+                            entries.append((record["p"], position))
+            if not entries:
+                if position is not None:
+                    self._commit(position)  # 只剩过期记录
+                with self._lock:
+                    self._pending_count = 0  # 磁盘上已无待重放记录
+        return entries
+
+    def ack(self, position: Tuple[int, int, int]):
+        """提交 peek_batch 返回的位置: 持久化读游标并删除已完全消费的分段"""
+        with self._io_lock:
+            self._commit(position)
+
+    def _commit(self, position: Tuple[int, int, int]):
+        seq, offset, consumed = position
+        for segment in self._list_segments():
+            if segment > seq:
+                break
+            path = self._segment_path(segment)
+            if segment < seq:
+                os.remove(path)
+            elif segment != self._active_seq() and offset >= os.path.getsize(path):
+                # 不会再追加的分段已读完, 游标移到下一分段开头
+                os.remove(path)
+                seq, offset = seq + 1, 0
+        self._save_cursor(seq, offset)
+        with self._lock:
+            self._pending_count = max(0, self._pending_count - consumed)
+
+    def close(self):
+        """停止后台线程并把缓冲数据全部落盘"""
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+        with self._io_lock:
+            self._close_file()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass
+            with self._lock:
+                if self._closed:
+                    return
+
+    def _rotate(self):
+        self._close_file()
+        segments = self._list_segments()
+        # 分段全部删除后也不能回绕到游标之前的编号
+        self._file_seq = max(segments[-1] if segments else 0, self._cursor[0]) + 1
+        self._file = open(self._segment_path(self._file_seq), "ab")
+        self._file_size = 0
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _active_seq(self) -> Optional[int]:
+        """正在追加写入的分段号, 其余分段都不会再变化"""
+        return self._file_seq if self._file is not None else None
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.folder, self.CURSOR_FILE), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return int(data["seq"]), int(data["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0, 0
+
+    def _save_cursor(self, seq: int, offset: int):
+        """写临时文件后 os.replace, 崩溃时游标要么是旧值要么是新值"""
+        path = os.path.join(self.folder, self.CURSOR_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "offset": offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._cursor = (seq, offset)
+
+    def _enforce_limits(self):
+        """超出总大小或整段过期时删除最早的分段"""
+        segments = self._list_segments()
+        sizes = {seq: os.path.getsize(self._segment_path(seq)) for seq in segments}
+        total = sum(sizes.values())
+        now = time.time()
+        for seq in segments[:-1]:  # 保留正在写入的分段
+            path = self._segment_path(seq)
+            if total <= self.max_bytes and now - os.path.getmtime(path) <= self.max_age:
+                break
+            if seq < self._cursor[0]:
+                dropped = 0
+            else:
+                dropped = self._count_lines(path, self._cursor[1] if seq == self._cursor[0] else 0)
+            os.remove(path)
+            total -= sizes[seq]
+            if seq >= self._cursor[0]:
+                self._save_cursor(seq + 1, 0)
+            with self._lock:
+                self._pending_count -= dropped
+
+    def _list_segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.folder):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                try:
+                    segments.append(int(name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(segments)
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.folder, f"{self.SEGMENT_PREFIX}{seq:08d}{self.SEGMENT_SUFFIX}")
+
+    @staticmethod
+    def _count_lines(path: str, offset: int = 0) -> int:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return sum(1 for _ in f)
@@ -1,15 +1,51 @@
 import asyncio
-from collections import defaultdict
-import json
+import concurrent.futures
+import importlib
+from collections import defaultdict, deque
 import time
 from types import SimpleNamespace
-import websockets
 from typing import Optional, Dict, Any, Callable, List
-from websockets.exceptions import ConnectionClosed, ConnectionClosedError
 from mcdreforged.api.all import *
 from easybot_mcdr.config import get_config
 from easybot_mcdr.meta import get_plugin_version
+from easybot_mcdr.metrics import registry
+from easybot_mcdr.websocket.codec import JsonCodec
 from easybot_mcdr.websocket.context import ExecContext
+from easybot_mcdr.websocket.debug_capture import capture
+from easybot_mcdr.websocket.health import ConnectionHealth
+from easybot_mcdr.websocket.outbox import Outbox
+
+_exec_op_seconds = registry.histogram("easybot_exec_op_seconds", "exec_op 处理耗时(秒)", "exec_op")
+_exec_op_errors = registry.counter("easybot_exec_op_errors_total", "exec_op 处理出错次数", "exec_op")
+_request_seconds = registry.histogram("easybot_request_seconds", "send_and_wait 往返耗时(秒)", "exec_op")
+_request_failures = registry.counter("easybot_request_failures_total", "send_and_wait 超时或失败次数", "exec_op")
+_send_seconds = registry.histogram("easybot_send_seconds", "出站数据包编码与写入耗时(秒)", "type")
+_send_batch_size = registry.histogram("easybot_send_batch_size", "发送协程单批数据包数", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)).labels()
+_packets_dropped = registry.counter("easybot_packets_dropped_total", "发送队列溢出丢弃的数据包数", "policy")
+_ws_connects = registry.counter("easybot_ws_connects_total", "WebSocket 连接建立次数").labels()
+_ws_reconnects = registry.counter("easybot_ws_reconnects_total", "WebSocket 重连次数").labels()
+_ws_connect_failures = registry.counter("easybot_ws_connect_failures_total", "WebSocket 连接失败次数").labels()
+
+# 旧版本升级而来的配置文件没有 dispatch/outbox 段, 默认值放在代码中 (与 data/config.json 一致), 配置可覆盖
+DEFAULT_ORDERED_EXEC_OPS = ("SEND_TO_CHAT", "CROSS_SERVER_SAY", "BIND_SUCCESS_NOTIFY", "UN_BIND_NOTIFY")
+DEFAULT_EXEC_OP_CONCURRENCY = {"RUN_COMMAND": 2, "PLAYER_LIST": 2}
+DEFAULT_OUTBOX_EXEC_OPS = ("SYNC_MESSAGE", "SYNC_DEATH_MESSAGE", "SYNC_ENTER_EXIT_MESSAGE", "CROSS_SERVER_SAY")
+
+# websockets 导入耗时较长且 MCDR 本身不加载它, 在首次建立连接前才导入 (_import_websockets)
+websockets = None
+ConnectionClosed = ConnectionClosedError = ()  # 导入前不匹配任何异常
+
+def _import_websockets():
+    global websockets, ConnectionClosed, ConnectionClosedError
+    if websockets is None:
+        from websockets.exceptions import ConnectionClosed, ConnectionClosedError
+        import websockets as module
+        websockets = module
+    return websockets
+
+def _is_open(websocket) -> bool:
+    # 存在连接对象时 websockets 必然已经导入
+    return websocket is not None and websocket.state is websockets.State.OPEN
 
 class SessionInfo:
     def __init__(self, version: str, system: str, dotnet: str, session_id:str, token: str, interval: int):
@@ -57,6 +93,8 @@ class SessionInfo:
 
 class EasyBotWsClient:
     _listeners = defaultdict(list)
+    _auth_listeners = []
+    _lazy_exec_ops: Dict[str, str] = {}  # exec_op -> 首次收到时才导入的处理器模块
 
     @classmethod
     def listen_exec_op(cls, exec_op: str):
@@ -66,7 +104,38 @@ class EasyBotWsClient:
             return func
         return decorator
 
-    def __init__(self, url, mcdr_server=None):
+    @classmethod
+    def lazy_exec_op(cls, exec_op: str, module: str):
+        """登记 exec_op 的处理器模块, 首次收到该 exec_op 时再导入 (模块中用 listen_exec_op 注册处理器)"""
+        cls._lazy_exec_ops[exec_op] = module
+
+    @classmethod
+    def _import_lazy_exec_op(cls, exec_op: str):
+        """导入处理器模块; 导入成功后才移除登记, 失败时下次收到该 exec_op 会重试"""
+        module = cls._lazy_exec_ops.get(exec_op)
+        if module is not None:
+            importlib.import_module(module)
+            cls._lazy_exec_ops.pop(exec_op, None)
+
+    @classmethod
+    def _preload_exec_ops(cls):
+        """在线程池中预先导入所有尚未加载的处理器模块 (鉴权成功后执行)"""
+        for exec_op in list(cls._lazy_exec_ops):
+            try:
+                cls._import_lazy_exec_op(exec_op)
+            except Exception as e:
+                try:
+                    ServerInterface.get_instance().logger.warning(f"[EasyBot] 加载 exec_op={exec_op} 的处理器失败: {e}")
+                except:
+                    pass
+
+    @classmethod
+    def listen_authenticated(cls, func):
+        """装饰器: 注册每次鉴权成功(op 3, 包括重连后)时执行的协程函数 func(wsc)"""
+        cls._auth_listeners.append(func)
+        return func
+
+    def __init__(self, url, mcdr_server=None, outbox_dir: Optional[str] = None):
             # 确保url是字符串格式
             self.ws_url = str(url) if url is not None else ""
             self.mcdr_server = mcdr_server
@@ -84,10 +153,37 @@ class EasyBotWsClient:
             self._connection_task = None
             self._pending_requests = {}
             self._request_counter = 0
-            
+            self._inflight_requests = {}  # 请求键 -> 正在进行的共享请求
+            self._response_cache = {}  # 请求键 -> (过期时间, 结果)
+            self._loop = None
+            self._send_queue = None
+            self._writer_task = None
+            self._last_overflow_log_time = 0  # 上次队列溢出日志时间
+            self._dispatch_tasks = set()  # 正在执行的 exec_op 处理任务
+            self._exec_op_semaphores = {}  # exec_op -> 并发限制
+            self._ordered_queues = {}  # exec_op -> 顺序执行队列
+            self._ordered_workers = {}  # exec_op -> 顺序执行协程
+            self._ordered_snapshot = ()  # (exec_op, 队列) 的只读副本, 在事件循环中更新, 供指标线程读取
+            self._authenticated = False  # 当前连接是否已完成鉴权(op 3)
+            self._authenticated_event = asyncio.Event()
+            self._replay_task = None
+            self._replay_inflight = {}  # id(重放中的数据包) -> outbox 位置, 发送协程写出后移除
+            self._replay_sent = None  # 本批已写出的最远 outbox 位置
+            self._replay_sent_count = 0
+            self._replay_done = None  # 本批全部写出 (True) 或因断线未能写出 (False) 时完成
+            self._health = ConnectionHealth()
+            self._last_send_time = 0.0  # 最近一次出站流量(monotonic)
+            self._last_recv_time = 0.0  # 最近一次入站流量(monotonic)
+            self._codec = JsonCodec(self._get_codec_config().get("json", "auto"))
+            capture.configure(get_config())
+            self._outbox = None  # 断线期间的出站数据包落盘队列
+            outbox_config = self._get_outbox_config()
+            if outbox_dir and outbox_config.get("enabled", True):
+                self._outbox = Outbox.from_config(outbox_dir, outbox_config)
+
     async def is_connected(self):
             """检查WebSocket是否已连接"""
-            return hasattr(self, '_ws') and self._ws is not None and hasattr(self._ws, 'state') and self._ws.state is websockets.State.OPEN
+            return _is_open(self._ws)
     async def send_and_wait(self, exec_op: str, data: dict, timeout: float = 10.0) -> dict:
             """
             发送请求并等待响应
@@ -113,27 +209,101 @@ class EasyBotWsClient:
                 }
                 packet.update(data)  # 合并自定义数据
                 
-                # 发送请求
-                await self.send(json.dumps(packet))
+                # 放入发送队列
+                await self._enqueue_async(packet)
                 
                 # 等待结果或超时
-                return await asyncio.wait_for(future, timeout)
+                start = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(future, timeout)
+                except Exception:
+                    _request_failures.labels(exec_op).inc()
+                    raise
+                _request_seconds.labels(exec_op).observe(time.perf_counter() - start)
+                return result
             finally:
                 # 清理 pending 请求
                 self._pending_requests.pop(callback_id, None)
+
+    @staticmethod
+    def _request_key(exec_op: str, data: dict) -> tuple:
+        return (exec_op, tuple(sorted(data.items())))
+
+    def _get_request_cache_config(self) -> dict:
+        return get_config().get("request_cache", {})
+
+    async def send_and_wait_coalesced(self, exec_op: str, data: dict, timeout: float = 10.0) -> dict:
+        """
+        合并相同请求的 send_and_wait
+        相同 exec_op 与参数的并发调用共享同一次往返; 若 request_cache.ttl 中
+        为该 exec_op 配置了缓存时间, 成功结果会在有效期内直接复用
+        返回的字典由所有调用方共享, 调用方不应修改
+        """
+        key = self._request_key(exec_op, data)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                return cached[1]
+            del self._response_cache[key]
+
+        future = self._inflight_requests.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.send_and_wait(exec_op, data, timeout))
+            self._inflight_requests[key] = future
+            future.add_done_callback(lambda f: self._on_coalesced_request_done(key, f))
+        # shield: 某个调用方被取消时不影响其他共享该请求的调用方
+        return await asyncio.shield(future)
+
+    def _on_coalesced_request_done(self, key: tuple, future: asyncio.Future):
+        failed = future.cancelled() or future.exception() is not None
+        # 请求期间若缓存已被失效, 结果可能已过时, 不写入缓存
+        if self._inflight_requests.get(key) is not future:
+            return
+        del self._inflight_requests[key]
+        if failed:
+            return
+
+        config = self._get_request_cache_config()
+        ttl = config.get("ttl", {}).get(key[0], 0)
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        if len(self._response_cache) >= config.get("max_entries", 1024):
+            self._response_cache = {k: v for k, v in self._response_cache.items() if v[0] > now}
+            if len(self._response_cache) >= config.get("max_entries", 1024):
+                return
+        self._response_cache[key] = (now + ttl, future.result())
+
+    def invalidate_request_cache(self, exec_op: str, data: Optional[dict] = None):
+        """
+        使缓存失效
+        :param exec_op: 操作类型
+        :param data: 请求参数, 为 None 时清除该 exec_op 的全部缓存
+        """
+        if data is not None:
+            keys = [self._request_key(exec_op, data)]
+        else:
+            keys = [k for k in list(self._response_cache) + list(self._inflight_requests) if k[0] == exec_op]
+        for key in keys:
+            self._response_cache.pop(key, None)
+            self._inflight_requests.pop(key, None)
+
     async def start(self):
             async with self._conn_lock:
                 if self._active:
                     return
                 self._active = True
                 self._manual_stop = False
+                self._loop = asyncio.get_running_loop()
+                registry.register_collector("ws", self._collect_metrics)
+                self._send_queue = asyncio.Queue(maxsize=max(1, int(self._get_send_queue_config().get("max_size", 1000))))
                 self._connection_task = asyncio.create_task(self._connection_manager())
 
     async def stop(self):
             self._active = False
             self._manual_stop = True
         
-            if self._ws and self._ws.state is websockets.State.OPEN:
+            if _is_open(self._ws):
                 await self._ws.close(reason="MCDR插件端主动关闭连接")
             self._ws = None
         
@@ -152,6 +322,11 @@ class EasyBotWsClient:
                 except asyncio.CancelledError:
                     pass
                 self._connection_task = None
+
+            await self._stop_dispatch()
+
+            if self._outbox is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self._outbox.close)
         
             logger = ServerInterface.get_instance().logger
             logger.info("WebSocket 客户端已停止")
@@ -164,19 +339,110 @@ class EasyBotWsClient:
                 except asyncio.CancelledError:
                     pass
 
+            config = self._get_health_config()
+            # 给的是到期时间，需要在到期之前发送心跳; 间隔过短时取一半
+            heartbeat_period = interval_seconds - 10 if interval_seconds > 20 else max(1, interval_seconds / 2)
+            probe_interval = min(heartbeat_period, config.get("probe_interval", 15))
+            stall_timeout = config.get("stall_timeout", 10)
+            skip_on_traffic = config.get("skip_heartbeat_on_traffic", True)
+
             async def heartbeat_loop():
+                last_keepalive = time.monotonic()
                 try:
                     while True:
-                        await asyncio.sleep(interval_seconds - 10)  # 减少十秒 因为给的是到期时间，需要在到期之前发送心跳
-                        if not (self._active and self._ws and self._ws.state is websockets.State.OPEN):
+                        await asyncio.sleep(probe_interval)
+                        websocket = self._ws
+                        if not (self._active and _is_open(websocket)):
+                            break
+                        if not await self._probe_rtt(websocket, stall_timeout):
                             break
-                        await self.send(json.dumps({"op": 2}))
-                except (ConnectionClosed, asyncio.CancelledError):
+
+                        now = time.monotonic()
+                        if now - last_keepalive < heartbeat_period - probe_interval:
+                            continue
+                        if skip_on_traffic and now - self._last_send_time < heartbeat_period - probe_interval:
+                            # 近期已有其他出站流量, 主程序已确认本端存活
+                            self._health.heartbeats_skipped += 1
+                            last_keepalive = self._last_send_time
+                            continue
+                        await self.send({"op": 2})
+                        self._health.heartbeats_sent += 1
+                        last_keepalive = now
+                except (ConnectionClosed, ConnectionError, asyncio.CancelledError):
                     pass
 
             self._heartbeat_task = asyncio.create_task(heartbeat_loop())
+    def _get_health_config(self) -> dict:
+        return get_config().get("health", {})
+
+    async def _probe_rtt(self, websocket, timeout: float) -> bool:
+        """
+        发送 WebSocket ping 并记录往返延迟
+        超时未收到 pong 视为连接卡死, 直接中断连接以触发重连 (比TCP超时更快)
+        """
+        start = time.perf_counter()
+        try:
+            pong_waiter = await websocket.ping()
+            await asyncio.wait_for(pong_waiter, timeout)
+        except asyncio.TimeoutError:
+            self._health.stalls += 1
+            try:
+                server = ServerInterface.get_instance()
+                server.logger.warning(f"[EasyBot] {timeout}秒内未收到pong, 连接可能已卡死, 正在重新连接")
+            except:
+                pass
+            websocket.transport.abort()
+            return False
+        except ConnectionClosed:
+            return False
+        self._health.record_rtt(time.perf_counter() - start)
+        return True
+
+    def _collect_metrics(self):
+        """采集队列深度等状态值 (仅在读取指标时调用)"""
+        samples = [
+            ("easybot_send_queue_depth", {}, self._send_queue.qsize() if self._send_queue is not None else 0),
+            ("easybot_dispatch_tasks", {}, len(self._dispatch_tasks)),
+            ("easybot_pending_requests", {}, len(self._pending_requests)),
+            ("easybot_inflight_coalesced_requests", {}, len(self._inflight_requests)),
+            ("easybot_outbox_pending", {}, len(self._outbox) if self._outbox is not None else 0),
+            ("easybot_ws_authenticated", {}, 1 if self._authenticated else 0),
+        ]
+        for exec_op, queue in self._ordered_snapshot:
+            samples.append(("easybot_ordered_queue_depth", {"exec_op": exec_op}, queue.qsize()))
+        if self._health.ewma is not None:
+            samples.append(("easybot_ws_rtt_ewma_seconds", {}, self._health.ewma))
+            samples.append(("easybot_ws_rtt_seconds", {"quantile": "0.5"}, self._health.percentile(50)))
+            samples.append(("easybot_ws_rtt_seconds", {"quantile": "0.99"}, self._health.percentile(99)))
+        for key, stats in list(self._codec.stats.items()):
+            samples.append(("easybot_ws_bytes_out", {"type": key}, stats.bytes_out))
+            samples.append(("easybot_ws_bytes_in", {"type": key}, stats.bytes_in))
+        return samples
+
+    async def wait_authenticated(self, timeout: float) -> bool:
+        """等待当前连接完成鉴权(op 3), 超时返回 False"""
+        try:
+            await asyncio.wait_for(self._authenticated_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def get_health(self) -> dict:
+        """连接健康状况, 用于监控主程序延迟"""
+        now = time.monotonic()
+        health = {
+            "connected": _is_open(self._ws),
+            "authenticated": self._authenticated,
+            "last_send_age_s": round(now - self._last_send_time, 1) if self._last_send_time else None,
+            "last_recv_age_s": round(now - self._last_recv_time, 1) if self._last_recv_time else None,
+        }
+        health.update(self._health.to_dict())
+        return health
+
     async def _connection_manager(self):
         """连接生命周期管理器 - 使用指数退避算法"""
+        # 首次连接前在线程池中导入 websockets, 不阻塞事件循环
+        await asyncio.get_running_loop().run_in_executor(None, _import_websockets)
         while self._active:
             try:
                 # 检查是否超过最大重连次数
@@ -203,10 +469,18 @@ class EasyBotWsClient:
                         pass
                     await asyncio.sleep(delay)
                 
-                async with websockets.connect(self.ws_url) as websocket:
+                compression = self._get_codec_config().get("compression", "deflate")
+                # 由心跳循环负责 ping 与卡死检测, 关闭库自带的 keepalive
+                async with websockets.connect(self.ws_url, compression=compression, ping_interval=None) as websocket:
                     self._ws = websocket
+                    self._health.reset()
+                    if _ws_connects.value > 0:
+                        _ws_reconnects.inc()
+                    _ws_connects.inc()
+                    self._log_negotiated_codec(websocket)
                     self._reconnect_attempts = 0  # 重置重连计数器
                     self._last_error_log_time = 0  # 重置日志时间
+                    self._writer_task = asyncio.create_task(self._writer_loop(websocket))
                     try:
                         await self.on_open()
                         await self._message_pump()
@@ -219,9 +493,14 @@ class EasyBotWsClient:
                             self._last_error_log_time = time.time()
                         except:
                             pass
+                    finally:
+                        self._authenticated = False
+                        self._authenticated_event.clear()
+                        await self._stop_writer()
                     
             except (ConnectionRefusedError, ConnectionClosedError):
                 self._reconnect_attempts += 1
+                _ws_connect_failures.inc()
                 # 连接错误，每次都记录日志
                 try:
                     server = ServerInterface.get_instance()
@@ -242,39 +521,277 @@ class EasyBotWsClient:
         await self._cleanup_connection()
 
     async def _message_pump(self):
-        """消息泵循环"""
+        """消息泵循环 (事件驱动, 仅在收到消息或连接关闭时唤醒)"""
+        websocket = self._ws
         try:
-            while self._active and self._ws.state is websockets.State.OPEN:
-                try:
-                    message = await asyncio.wait_for(
-                        self._ws.recv(), 
-                        timeout=1.0  # 添加超时以定期检查连接状态
-                    )
-                    await self.on_message(message)
-                except asyncio.TimeoutError:
-                    continue  # 正常轮询检查
+            async for message in websocket:
+                self._last_recv_time = time.monotonic()
+                await self.on_message(message)
         except ConnectionClosed as e:
             await self.on_close(e.code, e.reason)
+            return
+        # 正常关闭时迭代直接结束
+        await self.on_close(websocket.close_code, websocket.close_reason)
 
     async def _cleanup_connection(self):
         """清理连接资源"""
-        if self._ws and self._ws.state is websockets.State.OPEN:
+        if _is_open(self._ws):
             await self._ws.close(reason="MCDR端清理连接资源主动关闭")
         self._ws = None
 
     async def send(self, message):
-        """安全消息发送方法"""
-        if not (self._active and self._ws and self._ws.state is websockets.State.OPEN):
+        """安全消息发送方法 (放入发送队列后立即返回, 不等待socket写入)"""
+        await self._enqueue_async(message)
+
+    def _get_send_queue_config(self) -> dict:
+        return get_config().get("send_queue", {})
+
+    def _enqueue(self, packet) -> Optional[concurrent.futures.Future]:
+        """
+        将数据包放入发送队列, 由发送协程统一序列化并写入socket
+        :param packet: 数据包字典或已序列化的字符串
+        :return: 来自其他线程/事件循环的调用返回入队结果的 future (按 reject 策略拒绝时以 ConnectionError 失败)
+        """
+        if not (self._active and _is_open(self._ws)):
             raise ConnectionError("当前WebSocket客户端不在线,插件可能还未连接到EasyBot服务!")
-        
-        if get_config()["debug"]:
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._put_packet(packet)
+            return None
+        # 来自其他线程/事件循环的调用, 转交给客户端所在的事件循环按同样的溢出策略入队
+        return asyncio.run_coroutine_threadsafe(self._put_packet_async(packet), self._loop)
+
+    async def _put_packet_async(self, packet):
+        self._put_packet(packet)
+
+    async def _enqueue_async(self, packet):
+        """_enqueue 的协程版本: 跨事件循环调用时等待入队结果, 被拒绝的数据包同样抛出 ConnectionError"""
+        future = self._enqueue(packet)
+        if future is not None:
+            await asyncio.wrap_future(future)
+
+    def _put_packet(self, packet):
+        """按照溢出策略将数据包放入队列"""
+        queue = self._send_queue
+        try:
+            queue.put_nowait(packet)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        policy = self._get_send_queue_config().get("overflow", "drop_oldest")
+        if policy == "drop_oldest":
+            dropped = queue.get_nowait()
+            queue.put_nowait(packet)
+        elif policy == "reject":
+            raise ConnectionError("发送队列已满, 数据包被拒绝")
+        else:
+            dropped = packet
+        self._on_packet_dropped(dropped, policy)
+
+    def _on_packet_dropped(self, packet, policy: str):
+        """数据包被丢弃时让等待中的请求立即失败, 并限频记录日志"""
+        _packets_dropped.labels(policy).inc()
+        self._fail_pending(packet, "发送队列已满, 请求被丢弃")
+        self._settle_replayed(packet, True)
+
+        now = time.time()
+        if now - self._last_overflow_log_time >= 10:
+            self._last_overflow_log_time = now
+            try:
+                server = ServerInterface.get_instance()
+                server.logger.warning(f"[EasyBot] 发送队列已满(上限{self._send_queue.maxsize}), 按策略 {policy} 丢弃数据包")
+            except:
+                pass
+
+    def _fail_pending(self, packet, reason):
+        """让数据包对应的 send_and_wait 请求立即失败 (reason 为原因文本或异常实例)"""
+        if isinstance(packet, dict):
+            future = self._pending_requests.get(packet.get("callback_id"))
+            if future is not None and not future.done():
+                future.set_exception(reason if isinstance(reason, BaseException) else ConnectionError(reason))
+
+    def _on_encode_error(self, packet: dict, packet_type: str, error: Exception):
+        """数据包序列化失败: 等待中的请求以该异常失败, 回调(op 5)等无人等待的数据包只记录日志"""
+        self._fail_pending(packet, error)
+        self._settle_replayed(packet, True)  # 无法发送的重放数据包同样跳过, 不阻塞后续重放
+        try:
+            server = ServerInterface.get_instance()
+            server.logger.error(f"[EasyBot] 数据包 {packet_type} 序列化失败, 已丢弃: {type(error).__name__}: {error}")
+        except:
+            pass
+
+    def _spool_or_fail(self, packet, reason: str):
+        """连接断开时未发出的数据包: 可落盘的写入 outbox, 其余让等待方失败"""
+        if self._settle_replayed(packet, False):
+            return  # 重放中的数据包尚未提交, 仍在 outbox 头部
+        if self._is_spoolable(packet):
+            self._outbox.append(packet)
+        else:
+            self._fail_pending(packet, reason)
+
+    def _get_outbox_config(self) -> dict:
+        return get_config().get("outbox", {})
+
+    def _is_spoolable(self, packet) -> bool:
+        return (
+            self._outbox is not None
+            and isinstance(packet, dict)
+            and packet.get("op") == 4
+            and packet.get("exec_op") in self._get_outbox_config().get("exec_ops", DEFAULT_OUTBOX_EXEC_OPS)
+        )
+
+    def _settle_replayed(self, packet, sent: bool) -> bool:
+        """
+        重放的数据包离开发送队列: sent 为 True 表示已写出 (或按溢出策略丢弃), 推进可提交的位置;
+        False 表示因断线未能写出, 本批结束. 返回该数据包是否为重放中的数据包
+        """
+        position = self._replay_inflight.pop(id(packet), None)
+        if position is None:
+            return False
+        if sent:
+            self._replay_sent = position if self._replay_sent is None else max(self._replay_sent, position)
+            self._replay_sent_count += 1
+        done = self._replay_done
+        if done is not None and not done.done() and (not sent or not self._replay_inflight):
+            done.set_result(sent)
+        return True
+
+    async def _replay_batch(self, entries) -> int:
+        """
+        将一批 outbox 记录放入发送队列, 等待发送协程写出后只提交已写出的部分;
+        断线时未写出的记录仍留在 outbox 头部, 下次重放时按原顺序发送. 返回已写出的数量
+        """
+        loop = asyncio.get_running_loop()
+        self._replay_inflight = {id(packet): position for packet, position in entries}
+        self._replay_sent = None
+        self._replay_sent_count = 0
+        self._replay_done = done = loop.create_future()
+        for packet, _ in entries:
+            try:
+                self._enqueue(packet)
+            except ConnectionError:
+                self._settle_replayed(packet, False)
+                break
+        # 断线时发送协程的 finally / _stop_writer 会经 _spool_or_fail 结束本批
+        # 未写出的记录保留在 _replay_inflight 中, 之后清空发送队列时不会被追加到 outbox 末尾
+        if not done.done():
+            await done
+        if self._replay_sent is not None:
+            await loop.run_in_executor(None, self._outbox.ack, self._replay_sent)
+        return self._replay_sent_count
+
+    async def _replay_outbox(self):
+        """鉴权成功后按写入顺序限速重放离线期间积压的数据包"""
+        rate = max(1, int(self._get_outbox_config().get("replay_rate", 20)))
+        loop = asyncio.get_running_loop()
+        replayed = 0
+        try:
+            while self._authenticated:
+                entries = await loop.run_in_executor(None, self._outbox.peek_batch, rate)
+                if not entries:
+                    # 读取期间 _send_packet 仍在写入 outbox, 确认为空后再结束重放;
+                    # 检查与清除 _replay_task 之间没有 await, 不会再有新数据包落入 outbox
+                    if len(self._outbox) == 0:
+                        self._replay_task = None
+                        break
+                    continue
+                # 本批未全部写出 (断线或队列拒绝) 时不退出: 等待期间可能已重新鉴权, 而新连接的 op 3
+                # 看到本任务仍在运行不会另起重放; 断线未恢复时由循环条件结束
+                replayed += await self._replay_batch(entries)
+                await asyncio.sleep(1)  # 每秒最多重放 replay_rate 个
+        except OSError as e:
             try:
                 server = ServerInterface.get_instance()
-                server.logger.info(f"[EasyBot] 发送: {message}")
+                server.logger.warning(f"[EasyBot] 读写离线消息队列失败, 停止重放: {type(e).__name__}: {e}")
             except:
                 pass
+        finally:
+            self._replay_task = None
+            if replayed:
+                try:
+                    server = ServerInterface.get_instance()
+                    server.logger.info(f"[EasyBot] 已重放离线期间的 {replayed} 条消息")
+                except:
+                    pass
+
+    async def drain_outbox(self, timeout: float):
+        """
+        在限定时间内等待 outbox 重放和发送队列清空 (用于插件卸载)
+        未能发出的数据包会保留在磁盘上, 下次连接时继续重放
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            replaying = self._replay_task is not None and not self._replay_task.done()
+            if not replaying and (self._send_queue is None or self._send_queue.empty()):
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def _writer_loop(self, websocket):
+        """发送协程: 批量取出队列中的数据包并依次写入socket"""
+        queue = self._send_queue
+        config = self._get_send_queue_config()
+        max_batch = max(1, int(config.get("max_batch", 64)))
+        flush_interval = max(0.0, config.get("flush_interval_ms", 0) / 1000)
+        batch = deque()
+        try:
+            while True:
+                batch.append(await queue.get())
+                if flush_interval > 0 and queue.empty():
+                    await asyncio.sleep(flush_interval)  # 稍作等待以合并更多数据包
+                while len(batch) < max_batch and not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                _send_batch_size.observe(len(batch))
+                while batch:
+                    packet = batch[0]
+                    start = time.perf_counter()
+                    if isinstance(packet, str):
+                        packet_type = "raw"
+                        message = packet
+                        self._codec.count_raw(message)
+                    else:
+                        packet_type = packet.get("exec_op") or f"op{packet.get('op')}"
+                        try:
+                            message = self._codec.encode(packet)
+                        except Exception as e:
+                            # 单个数据包无法序列化时只让其请求失败, 不影响发送协程与后续数据包
+                            batch.popleft()
+                            self._on_encode_error(packet, packet_type, e)
+                            continue
+                    if capture.enabled:
+                        capture.record("out", packet_type, message)
+                    await websocket.send(message)
+                    _send_seconds.labels(packet_type).observe(time.perf_counter() - start)
+                    batch.popleft()
+                    if self._replay_inflight:
+                        self._settle_replayed(packet, True)
+                self._last_send_time = time.monotonic()
+        except ConnectionClosed:
+            pass
+        finally:
+            for packet in batch:
+                self._spool_or_fail(packet, "连接已断开, 请求未能发出")
+
+    async def _stop_writer(self):
+        """停止发送协程并清空连接断开前未发出的数据包"""
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        self._writer_task = None
 
-        await self._ws.send(message)
+        # 未发出的数据包不能带到下一个连接 (新连接必须先完成鉴权)
+        while self._send_queue is not None and not self._send_queue.empty():
+            self._spool_or_fail(self._send_queue.get_nowait(), "连接已断开, 请求未能发出")
 
     # 需要实现的生命周期回调
     async def on_open(self):
@@ -287,43 +804,53 @@ class EasyBotWsClient:
     async def on_message(self, message):
         try:
             server = ServerInterface.get_instance()
-            if get_config()["debug"]:
-                server.logger.info(f"[EasyBot] 收到: {message}")
-            data = json.loads(message)
+            data = self._codec.decode(message)
             op = data["op"]
+            if capture.enabled:
+                capture.record("in", data.get("exec_op") or f"op{op}", message)
             if op == 0:
                 self._session_info = SessionInfo.from_dict(data)
                 info: SessionInfo = self._session_info
                 server.logger.info(f"[EasyBot] 目标核心版本: {info.get_version()}-{info.get_system()} [{info.get_dotnet()}] 心跳{info.get_interval()}s 会话ID: {info.get_session_id()}")
                 server.logger.info(f"[EasyBot] 准备发送鉴权")
-                await self.send(json.dumps({
+                await self.send({
                     "op": 1,
                     "token": get_config()["token"],
                     "plugin_version": get_plugin_version(),
                     "server_description": f"MCDR_{ServerInterface.get_instance().get_server_information().version}",
-                }))
+                })
             elif op == 3:
-              self._session_info.set_server_name(
-                  data["server_name"]
-              )
-              server.logger.info(f"[EasyBot] 身份验证成功,已经成功连接到EasyBot。 [{data['server_name']}]")
+                self._session_info.set_server_name(
+                    data["server_name"]
+                )
+                server.logger.info(f"[EasyBot] 身份验证成功,已经成功连接到EasyBot。 [{data['server_name']}]")
+                self._authenticated = True
+                self._authenticated_event.set()
                 # 启动心跳
-              if self._session_info is not None:
+                if self._session_info is not None:
                     interval = self._session_info.get_interval()
                     await self._start_heartbeat(interval)
+                # 重放离线期间积压的消息
+                if self._outbox is not None and len(self._outbox) > 0 and self._replay_task is None:
+                    self._replay_task = asyncio.create_task(self._replay_outbox())
+                for listener in self._auth_listeners:
+                    task = asyncio.create_task(self._run_auth_listener(listener))
+                    self._dispatch_tasks.add(task)
+                    task.add_done_callback(self._dispatch_tasks.discard)
+                if self._lazy_exec_ops:
+                    asyncio.get_running_loop().run_in_executor(None, self._preload_exec_ops)
             elif op == 4:
                 exec_op = data.get("exec_op")
+                if exec_op in self._lazy_exec_ops:
+                    # 预加载尚未完成时在线程池中导入, 不阻塞事件循环
+                    await asyncio.get_running_loop().run_in_executor(None, self._import_lazy_exec_op, exec_op)
                 if exec_op in self._listeners:
-                    ctx = ExecContext(data["callback_id"], data["exec_op"], self)
-                    for handler in self._listeners[exec_op]:
-                        try:
-                            # 自动处理同步/异步函数
-                            if asyncio.iscoroutinefunction(handler):
-                                await handler(ctx, data, self._session_info)
-                            else:
-                                handler(ctx, data, self._session_info)
-                        except Exception as e:
-                            server.logger.error(f"[EasyBot] 处理 exec_op={exec_op} 时出错: {str(e)}")
+                    self._dispatch_exec_op(exec_op, data)
+            elif op == 5:
+                # send_and_wait 请求的回调结果
+                future = self._pending_requests.get(data.get("callback_id"))
+                if future is not None and not future.done():
+                    future.set_result(data)
                             
         except Exception as e:
             try:
@@ -332,6 +859,108 @@ class EasyBotWsClient:
             except:
                 pass
 
+    async def _run_auth_listener(self, listener):
+        try:
+            await listener(self)
+        except Exception as e:
+            try:
+                server = ServerInterface.get_instance()
+                server.logger.error(f"[EasyBot] 鉴权后处理出错: {str(e)}")
+            except:
+                pass
+
+    def _get_codec_config(self) -> dict:
+        return get_config().get("codec", {})
+
+    def _log_negotiated_codec(self, websocket):
+        """记录本次连接使用的JSON实现与协商到的压缩扩展"""
+        try:
+            extensions = websocket.response.headers.get("Sec-WebSocket-Extensions") or "无"
+            server = ServerInterface.get_instance()
+            server.logger.info(f"[EasyBot] 线路编码: {self._codec.name}, 压缩扩展: {extensions}")
+        except:
+            pass
+
+    def get_codec(self) -> JsonCodec:
+        """本客户端使用的编解码器 (用于预先编码可复用的响应片段)"""
+        return self._codec
+
+    def get_codec_stats(self) -> dict:
+        """各 exec_op 的线路字节数与编解码耗时"""
+        return self._codec.get_stats()
+
+    def _get_dispatch_config(self) -> dict:
+        return get_config().get("dispatch", {})
+
+    def _dispatch_exec_op(self, exec_op: str, data: dict):
+        """
+        将 exec_op 交给独立任务处理, 避免慢操作阻塞消息泵
+        配置在 dispatch.ordered 中的 exec_op 按到达顺序逐个执行
+        """
+        ctx = ExecContext(data["callback_id"], data["exec_op"], self)
+        if exec_op in self._get_dispatch_config().get("ordered", DEFAULT_ORDERED_EXEC_OPS):
+            queue = self._ordered_queues.get(exec_op)
+            if queue is None:
+                queue = asyncio.Queue()
+                self._ordered_queues[exec_op] = queue
+                self._ordered_workers[exec_op] = asyncio.create_task(self._ordered_worker(exec_op, queue))
+                self._ordered_snapshot = tuple(self._ordered_queues.items())
+            queue.put_nowait((ctx, data))
+            return
+
+        task = asyncio.create_task(self._run_exec_op_limited(exec_op, ctx, data))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    def _get_exec_op_semaphore(self, exec_op: str) -> asyncio.Semaphore:
+        semaphore = self._exec_op_semaphores.get(exec_op)
+        if semaphore is None:
+            config = self._get_dispatch_config()
+            limit = config.get("concurrency", DEFAULT_EXEC_OP_CONCURRENCY).get(exec_op, config.get("default_concurrency", 8))
+            semaphore = asyncio.Semaphore(max(1, int(limit)))
+            self._exec_op_semaphores[exec_op] = semaphore
+        return semaphore
+
+    async def _run_exec_op_limited(self, exec_op: str, ctx: ExecContext, data: dict):
+        async with self._get_exec_op_semaphore(exec_op):
+            await self._run_exec_op(exec_op, ctx, data)
+
+    async def _ordered_worker(self, exec_op: str, queue: asyncio.Queue):
+        """顺序执行协程: 同一 exec_op 的消息按到达顺序处理"""
+        while True:
+            ctx, data = await queue.get()
+            await self._run_exec_op(exec_op, ctx, data)
+
+    async def _run_exec_op(self, exec_op: str, ctx: ExecContext, data: dict):
+        for handler in self._listeners[exec_op]:
+            start = time.perf_counter()
+            try:
+                # 自动处理同步/异步函数
+                if asyncio.iscoroutinefunction(handler):
+                    await handler(ctx, data, self._session_info)
+                else:
+                    handler(ctx, data, self._session_info)
+                _exec_op_seconds.labels(exec_op).observe(time.perf_counter() - start)
+            except Exception as e:
+                _exec_op_errors.labels(exec_op).inc()
+                try:
+                    server = ServerInterface.get_instance()
+                    server.logger.error(f"[EasyBot] 处理 exec_op={exec_op} 时出错: {str(e)}")
+                except:
+                    pass
+
+    async def _stop_dispatch(self):
+        """取消所有正在执行或排队中的 exec_op 处理任务"""
+        tasks = list(self._dispatch_tasks) + list(self._ordered_workers.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatch_tasks.clear()
+        self._ordered_workers.clear()
+        self._ordered_queues.clear()
+        self._ordered_snapshot = ()
+
     async def on_close(self, code, reason):
         try:
             server = ServerInterface.get_instance()
@@ -355,7 +984,11 @@ class EasyBotWsClient:
                 "callback_id": "0"
             }
             packet.update(data)
-            await self.send(json.dumps(packet))
+            if self._is_spoolable(packet) and (self._replay_task is not None or not self._authenticated):
+                # 离线或仍在重放积压消息时写入 outbox, 保证顺序
+                self._outbox.append(packet)
+                return
+            await self._enqueue_async(packet)
 
     async def login(self, player_name: str):
         from easybot_mcdr.api.player import build_player_info
@@ -418,6 +1051,9 @@ class EasyBotWsClient:
     async def push_exit(self, player_name: str):
         from easybot_mcdr.api.player import build_player_info
         info = build_player_info(player_name)
+        if info is None:
+            # 没有该玩家的缓存信息 (如插件加载前已在线), 无法上报
+            return
         info['player_name_raw'] = player_name
         await self._send_packet("SYNC_ENTER_EXIT_MESSAGE", {
             "player": info,
@@ -425,7 +1061,7 @@ class EasyBotWsClient:
        })
         
     async def get_social_account(self, player_name: str):
-        resp = await self.send_and_wait("GET_SOCIAL_ACCOUNT", {
+        resp = await self.send_and_wait_coalesced("GET_SOCIAL_ACCOUNT", {
             "player_name": player_name
         })
         return resp
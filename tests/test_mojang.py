@@ -0,0 +1,78 @@
+"""
+Mojang UUID 批量查询测试
+
+mojang.api_base 指向 tools/mock_mojang.py 启动的本地替身 (随机端口), 不访问真实的 Mojang API
+"""
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+import easybot_mcdr.config
+from easybot_mcdr.api.mojang import BATCH_SIZE, MojangLookupError, MojangResolver, format_uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+from mock_mojang import MockMojang  # noqa: E402
+
+
+class MojangResolverTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.mock = MockMojang(port=0).start()
+        self.addCleanup(self.mock.stop)
+
+        config = {"mojang": {"api_base": self.mock.base_url, "timeout": 5, "batch_window": 0.05,
+                             "requests_per_minute": 600}}
+        config_patcher = mock.patch.object(easybot_mcdr.config, "config", config)
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        self.resolver = MojangResolver()
+
+    async def test_lookups_are_batched(self):
+        names = [f"Player{index}" for index in range(25)]
+        uuids = await asyncio.gather(*(self.resolver.resolve(name) for name in names))
+
+        self.assertEqual(sorted(len(request) for request in self.mock.requests), [5, BATCH_SIZE, BATCH_SIZE])
+        self.assertEqual(uuids, [format_uuid(MockMojang.profile_id(name)) for name in names])
+
+        # 再次查询全部命中缓存
+        await asyncio.gather(*(self.resolver.resolve(name) for name in names))
+        self.assertEqual(len(self.mock.requests), 3)
+
+    async def test_cache_is_case_insensitive_and_negative(self):
+        steve = await self.resolver.resolve("Steve")
+        self.assertIsNone(await self.resolver.resolve("GhostPlayer"))
+
+        self.assertEqual(await self.resolver.resolve("STEVE"), steve)
+        self.assertIsNone(await self.resolver.resolve("ghostplayer"))
+        self.assertEqual(sum(len(request) for request in self.mock.requests), 2)
+
+    async def test_concurrent_lookups_share_one_request(self):
+        first, second = await asyncio.gather(self.resolver.resolve("Alex"), self.resolver.resolve("alex"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock.requests, [["Alex"]])
+
+    async def test_retry_after_blocks_requests(self):
+        self.mock.limit = 1
+        await self.resolver.resolve("Steve")
+        with self.assertRaises(MojangLookupError):
+            await self.resolver.resolve("Alex")
+        self.assertEqual(self.mock.rejected, 1)
+
+        # Retry-After 期间不再发送请求
+        with self.assertRaises(MojangLookupError):
+            await self.resolver.resolve("Notch")
+        self.assertEqual(self.mock.rejected, 1)
+        self.assertEqual(len(self.mock.requests), 1)
+
+        # 替身返回 Retry-After: 1, 过期后恢复查询
+        self.mock.limit = 0
+        await asyncio.sleep(1.1)
+        self.assertEqual(await self.resolver.resolve("Notch"), format_uuid(MockMojang.profile_id("Notch")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+REPORT_PLAYERS 批量上报测试
+
+ServerInterface 替身由 create_autospec 根据 MCDR 的 PluginServerInterface 生成,
+只提供真实存在的 API, 调用不存在的方法 (如 get_online_players) 会直接抛出 AttributeError
+"""
+import json
+import os
+import unittest
+from unittest import mock
+
+from mcdreforged.api.all import PluginServerInterface, ServerInterface
+
+import easybot_mcdr.config
+from easybot_mcdr.api import player
+from easybot_mcdr.impl.report_players import PresenceReporter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeClient:
+    """记录发出的数据包, 差量请求按 accepted 回复"""
+
+    def __init__(self, accepted=True):
+        self._ws = object()
+        self._authenticated = True
+        self.accepted = accepted
+        self.packets = []
+
+    async def _send_packet(self, exec_op, data):
+        self.packets.append((exec_op, data))
+
+    async def send_and_wait(self, exec_op, data, timeout=10.0):
+        self.packets.append((exec_op, data))
+        return {"accepted": self.accepted}
+
+    async def report_player(self, name):
+        self.packets.append(("REPORT_PLAYER", {"player_name": name}))
+
+
+class ReportPlayersTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = mock.create_autospec(PluginServerInterface, instance=True)
+        self.server.logger = mock.Mock()
+        patcher = mock.patch.object(ServerInterface, "get_instance", return_value=self.server)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with open(os.path.join(ROOT, "data", "config.json"), "r", encoding="utf-8-sig") as f:
+            config = json.load(f)
+        config["presence_report"].update({"mode": "bulk", "chunk_size": 2, "diff": True})
+        config_patcher = mock.patch.object(easybot_mcdr.config, "config", config)
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
+
+        self.online = {
+            name: player.PlayerInfo("127.0.0.1", name, f"uuid-{name}")
+            for name in ("Steve", "Alex", "Notch", "Bot_Miner")
+        }
+        list_patcher = mock.patch.object(player, "get_player_list", side_effect=lambda: dict(self.online))
+        list_patcher.start()
+        self.addCleanup(list_patcher.stop)
+
+    async def test_full_report_uses_plugin_online_table(self):
+        client = FakeClient()
+        await PresenceReporter().report_full(client)
+
+        self.assertEqual([exec_op for exec_op, _ in client.packets], ["REPORT_PLAYERS"] * 2)
+        reported = [entry for _, data in client.packets for entry in data["players"]]
+        self.assertEqual(sorted(entry["player_name"] for entry in reported), ["Alex", "Notch", "Steve"])
+        self.assertEqual({entry["player_uuid"] for entry in reported if entry["player_name"] == "Steve"}, {"uuid-Steve"})
+
+    async def test_resync_sends_only_changes(self):
+        client = FakeClient()
+        reporter = PresenceReporter()
+        await reporter.report_full(client)
+        client.packets.clear()
+
+        del self.online["Alex"]
+        self.online["Jeb"] = player.PlayerInfo("127.0.0.1", "Jeb", "uuid-Jeb")
+        await reporter.resync(client)
+
+        self.assertEqual(len(client.packets), 1)
+        data = client.packets[0][1]
+        self.assertEqual(data["mode"], "diff")
+        self.assertEqual([entry["player_name"] for entry in data["added"]], ["Jeb"])
+        self.assertEqual(data["removed"], ["Alex"])
+
+    async def test_rejected_diff_falls_back_to_full_report(self):
+        client = FakeClient(accepted=False)
+        reporter = PresenceReporter()
+        await reporter.report_full(client)
+        client.packets.clear()
+
+        self.online.pop("Notch")
+        await reporter.resync(client)
+
+        modes = [data["mode"] for _, data in client.packets]
+        self.assertEqual(modes, ["diff", "full"])
+
+    async def test_default_mode_reports_players_individually(self):
+        easybot_mcdr.config.config["presence_report"].pop("mode")
+        client = FakeClient()
+        reporter = PresenceReporter()
+        await reporter.report_full(client)
+        await reporter.resync(client)
+
+        self.assertEqual({exec_op for exec_op, _ in client.packets}, {"REPORT_PLAYER"})
+        self.assertEqual(len(client.packets), 6)
+
+    async def test_startup_hold_reports_once(self):
+        easybot_mcdr.config.config["presence_report"].pop("mode")
+        client = FakeClient()
+        reporter = PresenceReporter()
+        reporter.hold()
+        await reporter.on_authenticated(client)
+        self.assertEqual(client.packets, [])
+
+        self.assertTrue(await reporter.release(client))
+        self.assertEqual(len(client.packets), 3)
+        self.assertTrue(await reporter.release(client))
+        self.assertEqual(len(client.packets), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+插件加载(导入)耗时基准
+
+每轮启动一个新的 Python 进程, 先导入 MCDReforged (实际运行时 MCDR 早已加载), 再计时导入 easybot_mcdr.main;
+同时检查 requests、websockets 等只应在首次使用时加载的依赖没有在导入期间被加载.
+给出 --budget-ms 时, 导入耗时中位数超出预算或出现上述依赖即以非零状态退出, 供 CI 使用
+
+示例:
+  python tools/bench_import.py --rounds 5 --budget-ms 300
+  python tools/bench_import.py --importtime 15     # 额外输出 -X importtime 中累计耗时最高的模块
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS)
+
+# 只应在首次使用时才导入的依赖 (MCDR 本身也不导入它们, 出现在 sys.modules 中即说明插件在导入时加载了)
+LAZY_MODULES = ("requests", "websockets")
+
+# 在子进程中执行: 安装 ServerInterface 替身后计时导入插件主模块
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {tools!r})
+import standin_server
+standin_server.install()
+import mcdreforged.api.all
+start = time.perf_counter()
+import easybot_mcdr.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def run_once(importtime: bool = False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD.format(tools=TOOLS, lazy=LAZY_MODULES)]
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"导入 easybot_mcdr.main 失败 (退出码 {result.returncode})")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def top_imports(stderr: str, limit: int):
+    """解析 -X importtime 输出, 返回累计耗时最高的插件相关模块"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # 表头
+        rows.append((cumulative_us, self_us, parts[2].rstrip()))
+    # 只保留导入 easybot_mcdr.main 期间的记录, 排除解释器启动与 MCDR 本身
+    names = [row[2].strip() for row in rows]
+    end = names.index("easybot_mcdr.main") + 1 if "easybot_mcdr.main" in names else len(rows)
+    begin = max((index + 1 for index in range(end) if names[index] == "mcdreforged.api.all"), default=0)
+    return sorted(rows[begin:end], reverse=True)[:limit]
+
+
+def main(args):
+    # 第一轮仅用于生成 __pycache__, 不计入结果
+    run_once()
+    samples = []
+    loaded = set()
+    for _ in range(args.rounds):
+        result, _ = run_once()
+        samples.append(result["elapsed"])
+        loaded.update(result["loaded"])
+
+    median = statistics.median(samples) * 1000
+    print(f"== import easybot_mcdr.main, {args.rounds} rounds")
+    print(f"   median={median:.1f}ms min={min(samples) * 1000:.1f}ms max={max(samples) * 1000:.1f}ms")
+    print(f"   lazy modules loaded at import: {', '.join(sorted(loaded)) or 'none'}")
+
+    if args.importtime:
+        _, stderr = run_once(importtime=True)
+        print(f"== top {args.importtime} by cumulative import time (-X importtime)")
+        for cumulative_us, self_us, name in top_imports(stderr, args.importtime):
+            print(f"   {cumulative_us / 1000:8.1f}ms cumulative {self_us / 1000:8.1f}ms self  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: 导入期间加载了应延迟导入的模块: {', '.join(sorted(loaded))}")
+        failed = True
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"FAIL: 导入耗时中位数 {median:.1f}ms 超出预算 {args.budget_ms:.0f}ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="插件加载(导入)耗时基准")
+    parser.add_argument("--rounds", type=int, default=5, help="计时轮数 (取中位数)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="导入耗时预算, 超出时以非零状态退出")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="输出 -X importtime 中累计耗时最高的 N 个模块")
+    main(parser.parse_args())
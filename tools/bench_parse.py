@@ -0,0 +1,182 @@
+"""
+服务端输出解析流水线基准
+
+将日志逐行送入与 MCDR 相同的处理顺序:
+  1. PrefixNameHandler.parse_server_stdout (服务端处理器)
+  2. main.on_info (mcdr.general_info 异步监听器)
+  3. api.player.on_stdout (mcdr.general_info 同步监听器)
+统计 lines/s、各阶段耗时, 并在单独一轮中用 tracemalloc 统计各阶段的内存分配
+插件运行时线程照常启动; WebSocket 客户端创建但不连接, 退出上报等在客户端内直接丢弃
+
+示例:
+  python tools/bench_parse.py                      # 使用内置的合成日志
+  python tools/bench_parse.py --log logs/latest.log --rounds 3
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import standin_server  # noqa: E402  (同时把仓库根目录加入 sys.path)
+
+NAMES = ["Steve", "Alex", "Notch", "jeb_", "Dinnerbone", "Grumm", "Bot_Miner", "xX_Pro_Xx"]
+GENERIC = [
+    "Preparing spawn area: {n}%",
+    "Saving the game (this may take a moment!)",
+    "Saved the game",
+    "Can't keep up! Is the server overloaded? Running {n}ms or {n} ticks behind",
+    "[Rcon: Saved the game]",
+    "Thread RCON Client /127.0.0.1 started",
+    "Thread RCON Client /127.0.0.1 shutting down",
+]
+DEATHS = [
+    "{name} was slain by Zombie",
+    "{name} fell from a high place",
+    "{name} drowned",
+    "{name} was blown up by Creeper",
+]
+
+
+def synthetic_corpus(size: int, seed: int = 1):
+    """生成 vanilla 格式的合成日志: 普通输出/聊天/加入/退出/UUID/死亡消息"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(size):
+        name = rng.choice(NAMES)
+        roll = rng.random()
+        if roll < 0.55:
+            content = rng.choice(GENERIC).format(n=rng.randint(1, 100))
+        elif roll < 0.75:
+            content = f"<{name}> message {i}"
+        elif roll < 0.80:
+            content = f"<[VIP]{name}> prefixed message {i}"
+        elif roll < 0.85:
+            content = rng.choice(DEATHS).format(name=name)
+        elif roll < 0.89:
+            content = f"{name} joined the game"
+        elif roll < 0.93:
+            content = f"{name} left the game"
+        elif roll < 0.95:
+            content = f"{name} lost connection: Disconnected"
+        else:
+            content = f"UUID of player {name} is 069a79f4-44e9-4726-a5be-{rng.randrange(16 ** 12):012x}"
+            lines.append(f"[{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}] [User Authenticator #1/INFO]: {content}")
+            continue
+        lines.append(f"[{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}] [Server thread/INFO]: {content}")
+    return lines
+
+
+def load_log(path: str):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [line.rstrip("\r\n") for line in f if line.strip()]
+
+
+class Pipeline:
+    STAGES = ("handler", "on_info", "on_stdout")
+
+    def __init__(self, server):
+        from easybot_mcdr.impl.prefix_handler import PrefixNameHandler
+        from easybot_mcdr.runtime import runtime
+        from easybot_mcdr.websocket.ws import EasyBotWsClient
+        import easybot_mcdr.main as main
+        import easybot_mcdr.api.player as player
+        runtime.start()
+        main.wsc = EasyBotWsClient("ws://127.0.0.1:1/bench")
+        self.server = server
+        self.handler = PrefixNameHandler()
+        self.on_info = main.on_info
+        self.on_stdout = player.on_stdout
+
+    async def run(self, lines, begin, end):
+        """
+        每个阶段调用前执行 begin(), 调用后将 end(begin 的返回值) 累加到该阶段
+        :return: (各阶段累计值, 处理器无法解析的行数)
+        """
+        totals = dict.fromkeys(self.STAGES, 0)
+        unparsed = 0
+        handler, on_info, on_stdout, server = self.handler, self.on_info, self.on_stdout, self.server
+        for line in lines:
+            mark = begin()
+            try:
+                info = handler.parse_server_stdout(line)
+            except Exception:
+                # MCDR 对无法识别的行不会分发 general_info
+                totals["handler"] += end(mark)
+                unparsed += 1
+                continue
+            totals["handler"] += end(mark)
+            mark = begin()
+            await on_info(server, info)
+            totals["on_info"] += end(mark)
+            mark = begin()
+            on_stdout(server, info)
+            totals["on_stdout"] += end(mark)
+        return totals, unparsed
+
+
+def _elapsed(start):
+    return time.perf_counter() - start
+
+
+def _trace_begin():
+    tracemalloc.reset_peak()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _trace_end(start):
+    # 调用期间的内存高水位 (包括已释放的临时对象)
+    return tracemalloc.get_traced_memory()[1] - start
+
+
+async def main(args):
+    server = standin_server.install()
+    lines = load_log(args.log) if args.log else synthetic_corpus(args.lines)
+    pipeline = Pipeline(server)
+
+    # 预热: 让粘性处理器、模板等完成初始化
+    await pipeline.run(lines[:1000], time.perf_counter, _elapsed)
+
+    best = None
+    cpu_total = 0.0
+    for _ in range(args.rounds):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        totals, unparsed = await pipeline.run(lines, time.perf_counter, _elapsed)
+        elapsed = time.perf_counter() - wall_start
+        cpu_total += time.process_time() - cpu_start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, totals, unparsed)
+
+    elapsed, totals, unparsed = best
+    print(f"== {len(lines)} lines ({'log: ' + args.log if args.log else 'synthetic corpus'}), best of {args.rounds}")
+    print(f"   throughput: {len(lines) / elapsed:.0f} lines/s ({elapsed / len(lines) * 1e6:.2f}us/line wall, "
+          f"{cpu_total / args.rounds / len(lines) * 1e6:.2f}us/line cpu)")
+    print(f"   unparsed by handler: {unparsed}")
+    for stage in Pipeline.STAGES:
+        print(f"   {stage:<10} {totals[stage] * 1000:8.1f}ms  {totals[stage] / len(lines) * 1e6:6.2f}us/line")
+
+    # 单独一轮统计内存分配 (tracemalloc 会显著拖慢执行, 不计入上面的耗时)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    allocated, _ = await pipeline.run(lines, _trace_begin, _trace_end)
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    print("== allocations (per-call high-water mark summed over all lines)")
+    for stage in Pipeline.STAGES:
+        print(f"   {stage:<10} {allocated[stage] / 1024:8.1f}KiB  {allocated[stage] / len(lines):6.1f}B/line")
+    print(f"   retained after replay: {retained / 1024:.1f}KiB")
+
+    print(f"== PrefixNameHandler: {pipeline.handler.get_stats()}")
+    from easybot_mcdr.runtime import runtime
+    runtime.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="服务端输出解析流水线基准")
+    parser.add_argument("--log", help="要回放的日志文件 (如 logs/latest.log), 缺省使用合成日志")
+    parser.add_argument("--lines", type=int, default=50000, help="合成日志行数")
+    parser.add_argument("--rounds", type=int, default=3, help="计时轮数 (取最快一轮)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""
+EasyBotWsClient 吞吐/延迟压测
+
+在本进程内启动 MockBridge (tools/mock_bridge.py) 并用真实的 EasyBotWsClient 与 impl 处理器连接, 分两个阶段:
+  1. 出站请求: 多个并发协程循环调用 send_and_wait, 统计 msgs/s 与往返延迟 p50/p99
+  2. 入站请求: 主程序替身按速率下发 SEND_TO_CHAT / RUN_COMMAND / PLAYER_LIST, 统计处理速率与回调延迟
+每个阶段同时报告每条消息消耗的 CPU 时间
+
+示例:
+  python tools/bench_ws.py --duration 10 --concurrency 32 --rate 500 --latency-ms 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import standin_server  # noqa: E402  (同时把仓库根目录加入 sys.path)
+
+
+def percentile(samples, p):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def report(title, count, elapsed, cpu, latencies, extra=""):
+    rate = count / elapsed if elapsed else 0
+    cpu_us = cpu / count * 1e6 if count else float("nan")
+    print(f"== {title}")
+    print(f"   messages: {count} in {elapsed:.2f}s -> {rate:.0f} msg/s")
+    print(f"   latency:  p50={percentile(latencies, 50) * 1000:.2f}ms p99={percentile(latencies, 99) * 1000:.2f}ms")
+    print(f"   cpu:      {cpu_us:.1f}us/msg")
+    if extra:
+        print(f"   {extra}")
+
+
+async def bench_requests(client, duration, concurrency, timeout):
+    latencies = []
+    failures = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(index):
+        nonlocal failures
+        sequence = 0
+        while time.perf_counter() < deadline:
+            sequence += 1
+            start = time.perf_counter()
+            try:
+                await client.send_and_wait("GET_SOCIAL_ACCOUNT", {"player_name": f"bench_{index}_{sequence}"}, timeout)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    report("send_and_wait (GET_SOCIAL_ACCOUNT)", len(latencies), elapsed, cpu, latencies,
+           f"failures/timeouts: {failures}")
+
+
+async def bench_inbound(bridge, server, duration, rate):
+    callbacks_before = len(bridge.callback_rtts)
+    broadcasts_before = server.broadcasted
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    sent_before = bridge.sent_requests
+    bridge.start_traffic(rate)
+    await asyncio.sleep(duration)
+    bridge.stop_traffic()
+    elapsed = time.perf_counter() - wall_start
+    await asyncio.sleep(0.5)  # 等待在途回调
+    cpu = time.process_time() - cpu_start
+    rtts = bridge.callback_rtts[callbacks_before:]
+    handled = len(rtts) + (server.broadcasted - broadcasts_before)
+    report(f"inbound exec_op ({', '.join(bridge.mix)} @ {rate:.0f}/s)", handled, elapsed, cpu, rtts,
+           f"sent by bridge: {bridge.sent_requests - sent_before}, callbacks: {len(rtts)}")
+
+
+async def main(args):
+    server = standin_server.install()
+    import easybot_mcdr.impl  # noqa: F401  注册所有 exec_op 处理器
+    from easybot_mcdr.websocket.ws import EasyBotWsClient
+    from mock_bridge import MockBridge
+
+    bridge = MockBridge(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, loss=args.loss,
+                        mix=args.mix.split(","))
+    await bridge.start()
+    client = EasyBotWsClient(bridge.url)
+    await client.start()
+    try:
+        await asyncio.wait_for(bridge.authenticated.wait(), 10)
+        while not client._authenticated:
+            await asyncio.sleep(0.01)
+        await bench_requests(client, args.duration, args.concurrency, args.timeout)
+        if args.rate > 0:
+            await bench_inbound(bridge, server, args.duration, args.rate)
+    finally:
+        await client.stop()
+        await bridge.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EasyBotWsClient 吞吐/延迟压测")
+    parser.add_argument("--port", type=int, default=26991)
+    parser.add_argument("--duration", type=float, default=5.0, help="每个阶段的持续时间(秒)")
+    parser.add_argument("--concurrency", type=int, default=16, help="send_and_wait 并发数")
+    parser.add_argument("--timeout", type=float, default=5.0, help="send_and_wait 超时(秒)")
+    parser.add_argument("--rate", type=float, default=300.0, help="入站阶段主程序下发速率(条/秒), 0 跳过")
+    parser.add_argument("--mix", default="SEND_TO_CHAT,RUN_COMMAND,PLAYER_LIST")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,219 @@
+"""
+本地 EasyBot 主程序替身 (用于压测 EasyBotWsClient)
+
+实现 ws.py 使用的 op 0/1/2/3/4/5 协议:
+  0 HELLO -> 插件发送 1 鉴权 -> 回复 3 鉴权成功, 2 为心跳
+  插件发来的 op 4 请求 (callback_id != "0") 按配置的延迟/丢包回复 op 5
+  记录 REPORT_PLAYERS 上报的在线玩家, 差量同步的基准版本一致时回复 accepted
+  可按指定速率主动下发 SEND_TO_CHAT / RUN_COMMAND / PLAYER_LIST, 并统计插件回调(op 5)的往返延迟
+
+单独运行:
+  python tools/mock_bridge.py --port 26990 --latency-ms 20 --loss 0.01 --rate 200
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+import websockets
+
+DEFAULT_MIX = ("SEND_TO_CHAT", "RUN_COMMAND", "PLAYER_LIST")
+
+
+class MockBridge:
+    def __init__(self, host="127.0.0.1", port=26990, interval=120, latency_ms=0.0, jitter_ms=0.0,
+                 loss=0.0, rate=0.0, mix=DEFAULT_MIX):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rate = rate
+        self.mix = tuple(mix)
+        self.authenticated = asyncio.Event()
+        self.received = {}  # op/exec_op -> 数量
+        self.callback_rtts = []  # 主动下发请求的插件回调往返延迟(秒)
+        self.sent_requests = 0
+        self.dropped = 0
+        self._outstanding = {}  # callback_id -> 发送时间
+        self.presence = {}  # REPORT_PLAYERS 上报的在线玩家 (玩家名 -> 条目)
+        self.presence_version = None
+        self._ids = itertools.count(1)
+        self._server = None
+        self._connections = set()
+        self._generators = set()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/bridge"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+
+    def start_traffic(self, rate: float):
+        """在当前所有连接上按速率主动下发请求"""
+        for websocket in list(self._connections):
+            task = asyncio.create_task(self._generate(websocket, rate))
+            self._generators.add(task)
+            task.add_done_callback(self._generators.discard)
+
+    def stop_traffic(self):
+        for task in list(self._generators):
+            task.cancel()
+
+    async def stop(self):
+        self.stop_traffic()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, websocket):
+        self._connections.add(websocket)
+        try:
+            await websocket.send(json.dumps({
+                "op": 0,
+                "version": "mock",
+                "system": "local",
+                "dotnet": "none",
+                "session_id": f"mock-{next(self._ids)}",
+                "token": "",
+                "interval": self.interval,
+            }))
+            async for message in websocket:
+                packet = json.loads(message)
+                op = packet.get("op")
+                key = packet.get("exec_op") or f"op{op}"
+                self.received[key] = self.received.get(key, 0) + 1
+                if op == 1:
+                    await websocket.send(json.dumps({"op": 3, "server_name": "mock"}))
+                    self.authenticated.set()
+                    if self.rate > 0:
+                        self.start_traffic(self.rate)
+                elif op == 4 and packet.get("exec_op") == "REPORT_PLAYERS" and packet.get("mode") == "full":
+                    self._apply_presence_full(packet)
+                elif op == 4 and packet.get("callback_id") not in (None, "0"):
+                    asyncio.create_task(self._reply(websocket, packet))
+                elif op == 5:
+                    sent_at = self._outstanding.pop(packet.get("callback_id"), None)
+                    if sent_at is not None:
+                        self.callback_rtts.append(time.perf_counter() - sent_at)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(websocket)
+
+    async def _delay(self):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _reply(self, websocket, packet):
+        """模拟主程序对插件请求的回复"""
+        await self._delay()
+        if self.loss and random.random() < self.loss:
+            self.dropped += 1
+            return
+        response = {"op": 5, "callback_id": packet["callback_id"], "exec_op": packet["exec_op"]}
+        response.update(self._response_body(packet))
+        try:
+            await websocket.send(json.dumps(response))
+        except websockets.ConnectionClosed:
+            pass
+
+    def _apply_presence_full(self, packet):
+        if packet.get("chunk") == 0:
+            self.presence = {}
+        self.presence.update({entry["player_name"]: entry for entry in packet.get("players", [])})
+        self.presence_version = packet.get("version")
+
+    def _apply_presence_diff(self, packet) -> bool:
+        """差量基于的版本与记录一致时应用并接受, 否则要求插件完整上报"""
+        if self.presence_version is None or packet.get("base_version") != self.presence_version:
+            return False
+        for name in packet.get("removed", []):
+            self.presence.pop(name, None)
+        self.presence.update({entry["player_name"]: entry for entry in packet.get("added", [])})
+        self.presence_version = packet.get("version")
+        return True
+
+    def _response_body(self, packet) -> dict:
+        exec_op = packet["exec_op"]
+        if exec_op == "REPORT_PLAYERS":
+            return {"accepted": self._apply_presence_diff(packet)}
+        if exec_op == "GET_SOCIAL_ACCOUNT":
+            return {"uuid": "", "name": "", "time": "", "platform": ""}
+        if exec_op == "START_BIND":
+            return {"code": "123456", "time": "5分钟"}
+        if exec_op == "PLAYER_JOIN":
+            return {"kick": False, "kick_message": ""}
+        return {}
+
+    def _build_request(self, exec_op: str) -> dict:
+        callback_id = f"mock_{next(self._ids)}"
+        packet = {"op": 4, "exec_op": exec_op, "callback_id": callback_id}
+        if exec_op == "SEND_TO_CHAT":
+            packet.update({"text": "来自群聊的消息", "extra": [{"type": 2, "text": "来自群聊的消息"}]})
+        elif exec_op == "RUN_COMMAND":
+            packet.update({"command": "list", "enable_papi": False, "player_name": ""})
+        return packet
+
+    async def _generate(self, websocket, rate: float):
+        """按速率主动下发请求"""
+        period = 1 / rate
+        next_at = time.perf_counter()
+        try:
+            for exec_op in itertools.cycle(self.mix):
+                next_at += period
+                packet = self._build_request(exec_op)
+                if exec_op != "SEND_TO_CHAT":  # SEND_TO_CHAT 不回调
+                    self._outstanding[packet["callback_id"]] = time.perf_counter()
+                if self.latency or self.jitter:
+                    asyncio.create_task(self._send_later(websocket, packet))
+                else:
+                    await websocket.send(json.dumps(packet))
+                self.sent_requests += 1
+                sleep = next_at - time.perf_counter()
+                if sleep > 0:
+                    await asyncio.sleep(sleep)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _send_later(self, websocket, packet):
+        await self._delay()
+        try:
+            await websocket.send(json.dumps(packet))
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def _main(args):
+    bridge = MockBridge(args.host, args.port, args.interval, args.latency_ms, args.jitter_ms, args.loss,
+                        args.rate, args.mix.split(","))
+    await bridge.start()
+    print(f"Mock bridge listening on {bridge.url}")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            print(f"received={bridge.received} sent_requests={bridge.sent_requests} dropped={bridge.dropped}")
+    finally:
+        await bridge.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 EasyBot 主程序替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=26990)
+    parser.add_argument("--interval", type=int, default=120, help="会话心跳间隔(秒)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="注入的单向延迟")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0, help="回复丢弃概率 (0~1)")
+    parser.add_argument("--rate", type=float, default=0.0, help="主动下发请求的速率(条/秒)")
+    parser.add_argument("--mix", default=",".join(DEFAULT_MIX), help="主动下发的 exec_op 列表")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,116 @@
+"""
+本地 Mojang API 替身 (用于测试 api/mojang.py 的批量查询/缓存/限流)
+
+实现 POST /minecraft/profile/lookup/bulk/byname:
+  请求体为玩家名列表, 返回其中"存在"的玩家 [{"id": ..., "name": ...}], 以 --missing-prefix 开头的名字视为不存在
+  UUID 由名字确定性生成; 可设置响应延迟, 以及每分钟请求数上限 (超出时返回 429)
+将插件配置 mojang.api_base 指向 http://127.0.0.1:<端口> 即可
+
+单独运行:
+  python tools/mock_mojang.py --port 26991 --latency-ms 50 --limit 60
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BULK_PATH = "/minecraft/profile/lookup/bulk/byname"
+
+
+class MockMojang:
+    def __init__(self, host="127.0.0.1", port=26991, latency_ms=0.0, limit=0, missing_prefix="Ghost"):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.limit = limit
+        self.missing_prefix = missing_prefix
+        self.requests = []  # 每次请求的名字列表
+        self.rejected = 0
+        self._window = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    @staticmethod
+    def profile_id(name: str) -> str:
+        return hashlib.md5(name.lower().encode("utf-8")).hexdigest()
+
+    def _allow(self) -> bool:
+        if not self.limit:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 60]
+            if len(self._window) >= self.limit:
+                self.rejected += 1
+                return False
+            self._window.append(now)
+            return True
+
+    def _make_handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path != BULK_PATH:
+                    self._reply(404, {"error": "Not Found"})
+                    return
+                if not mock._allow():
+                    self._reply(429, {"error": "TooManyRequestsException"}, {"Retry-After": "1"})
+                    return
+                names = json.loads(body)
+                mock.requests.append(names)
+                if mock.latency:
+                    time.sleep(mock.latency)
+                self._reply(200, [{"id": mock.profile_id(name), "name": name}
+                                  for name in names if not name.startswith(mock.missing_prefix)])
+
+            def _reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self):
+        """在后台线程中启动, port 为 0 时使用随机端口"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="MockMojang").start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 Mojang API 替身")
+    parser.add_argument("--port", type=int, default=26991)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每次请求的响应延迟")
+    parser.add_argument("--limit", type=int, default=0, help="每分钟请求数上限, 0 为不限制")
+    parser.add_argument("--missing-prefix", default="Ghost", help="以此开头的名字视为不存在")
+    args = parser.parse_args()
+    mock = MockMojang(port=args.port, latency_ms=args.latency_ms, limit=args.limit,
+                      missing_prefix=args.missing_prefix).start()
+    print(f"Mojang API 替身已启动: {mock.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,96 @@
+"""
+压测/基准工具使用的 ServerInterface 替身
+
+让插件代码在没有运行中的 MCDR 与 Minecraft 服务端时也能执行:
+ServerInterface.get_instance() 返回本替身, 命令执行/广播等操作只计数不输出
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class _ServerInformation:
+    name = "standin"
+    version = "1.21"
+    description = "standin"
+    port = 25565
+    max_players = 100
+
+
+class StandInServer:
+    def __init__(self, working_directory: str = None, log_level: int = logging.WARNING):
+        self.logger = logging.getLogger("EasyBot-StandIn")
+        self.logger.setLevel(log_level)
+        if not self.logger.handlers:
+            self.logger.addHandler(logging.StreamHandler())
+        self.working_directory = working_directory or tempfile.mkdtemp(prefix="easybot-standin-")
+        properties_path = os.path.join(self.working_directory, "server.properties")
+        if not os.path.exists(properties_path):
+            with open(properties_path, "w", encoding="utf-8") as f:
+                f.write("online-mode=false\nenable-rcon=true\nrcon.port=25575\nrcon.password=standin\nlevel-name=world\n")
+        self.executed = 0
+        self.broadcasted = 0
+        self.rcon_queries = 0
+
+    # --- 与插件交互的 ServerInterface 方法 ---
+    def get_server_information(self):
+        return _ServerInformation()
+
+    def get_mcdr_config(self):
+        return {"working_directory": self.working_directory}
+
+    def get_server_directory(self):
+        return self.working_directory
+
+    def get_data_folder(self):
+        folder = os.path.join(self.working_directory, "easybot_data")
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def get_plugin_metadata(self, plugin_id):
+        return None
+
+    def is_server_startup(self):
+        return True
+
+    def is_rcon_running(self):
+        return True
+
+    def rcon_query(self, command):
+        self.rcon_queries += 1
+        return "There are 0 of a max 100 players online: "
+
+    def execute(self, command, *args, **kwargs):
+        self.executed += 1
+
+    def broadcast(self, text, *args, **kwargs):
+        self.broadcasted += 1
+
+    def say(self, text, *args, **kwargs):
+        self.broadcasted += 1
+
+    def tell(self, player, text, *args, **kwargs):
+        self.broadcasted += 1
+
+
+def install(config_overrides: dict = None, **kwargs) -> StandInServer:
+    """
+    安装替身并加载插件默认配置
+    :param config_overrides: 覆盖 data/config.json 中的顶层配置项
+    """
+    from mcdreforged.api.all import ServerInterface
+    import easybot_mcdr.config
+
+    server = StandInServer(**kwargs)
+    ServerInterface.get_instance = staticmethod(lambda: server)
+    with open(os.path.join(ROOT, "data", "config.json"), "r", encoding="utf-8-sig") as f:
+        config = json.load(f)
+    config.update(config_overrides or {})
+    easybot_mcdr.config.config = config
+    return server